@@ -1,9 +1,12 @@
+import argparse
+import csv
 import json
 import pandas as pd
 import numpy as np
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from PIL import Image
-from skimage.filters import gaussian
 
 def frag_area(path):
     """
@@ -19,11 +22,58 @@ def frag_area(path):
     area: int
         The number of non-transparent pixels in the image.
     """
-    image = np.array(Image.open(path).convert('RGBA'))
-    mask = image[:, :, 3] > 0
+    return image_area(Image.open(path).convert('RGBA'))
+
+
+def image_area(image):
+    """
+    Calculates the area of a fragment from its decoded RGBA image (see frag_area).
+    """
+    mask = np.array(image)[:, :, 3] > 0
     return np.abs(np.sum(mask))
 
 
+def fragment_name(name):
+    """
+    Returns the name of a fragment given either its name or the path of its image (e.g. 'RPf_00194' for
+    '.../RPf_00194_intact_mesh.png'), the way calc_adj_matrix names the fragments of the adjacency matrices.
+    """
+    name = os.path.basename(str(name))
+    if name.endswith('.png'):
+        name = name[:-len('.png')]
+    parts = name.split('_')
+    if parts[0] == 'RPf' and len(parts) > 2:
+        name = '_'.join(parts[:2])
+    return name
+
+
+@lru_cache(maxsize=128)
+def load_areas(root_dir):
+    """
+    Loads the areas of all fragments in a directory, decoding every fragment image once per process: the same fragments
+    are usually scored against many predicted adjacency matrices.
+
+    Args:
+    -----
+    root_dir: str
+        The path to the directory containing the fragments.
+
+    Returns:
+    --------
+    names: np.array
+        The names of the fragments (their file names without extension), in the order of the directory listing.
+
+    areas: np.array
+        The areas of the fragments, in the same order (read-only, it is shared by all the callers).
+    """
+    filenames = [path for path in os.listdir(root_dir) if path.endswith('.png')]
+    names = np.array([fragment_name(filename) for filename in filenames], dtype=str)
+    areas = np.array([frag_area(os.path.join(root_dir, filename)) for filename in filenames])
+    names.setflags(write=False)
+    areas.setflags(write=False)
+    return names, areas
+
+
 def load_areas_matrix(root_dir):
     """
     Loads the areas of all fragments in a directory and return a matrix of the sum of the areas of each pair of fragments.
@@ -38,10 +88,8 @@ def load_areas_matrix(root_dir):
     areas_matrix: np.array
         A matrix of the sum of the areas of each pair of fragments.
     """
-    paths = [os.path.join(root_dir, path) for path in os.listdir(root_dir) if path.endswith('.png')]
-    areas = [frag_area(path) for path in paths]
-    return np.array([[areas[i] + areas[j] for j in range(len(areas))] 
-                     for i in range(len(areas))])
+    _, areas = load_areas(os.path.normpath(root_dir))
+    return areas[:, None] + areas[None, :]
 
 
 def load_adj_matrix(path):
@@ -66,12 +114,191 @@ def load_adj_matrix(path):
     elif path.endswith('.json'):
         with open(path, 'r') as f:
             adj_dict = json.load(f)
-        mat = [[1 if frag in adj_dict[frag2] else 0 for frag2 in adj_dict] for frag in adj_dict]
-        return np.array(mat)
-    
-def prescision(adj_pred, adj_true, areas_matrix):
+        # entry [i, j] is 1 when fragment i is in the adjacency list of fragment j (neighbours that are not keys are ignored)
+        index = {frag: i for i, frag in enumerate(adj_dict)}
+        rows = [index[frag] for frag2 in adj_dict for frag in adj_dict[frag2] if frag in index]
+        cols = [index[frag2] for frag2 in adj_dict for frag in adj_dict[frag2] if frag in index]
+        mat = np.zeros((len(index), len(index)), dtype=int)
+        mat[rows, cols] = 1
+        return mat
+
+
+class LabelledAdjacency():
+    """
+    An adjacency matrix labelled by fragment names: the names sorted, and a sparse matrix whose rows and columns follow
+    them. Matrices from different sources (predictions, ground truth, areas) are aligned by name instead of by position,
+    so the order a producer wrote the fragments in does not matter.
+
+    Args:
+    -----
+    names: list
+        The fragment names of the rows and columns of the matrix (file names and paths are reduced to fragment names).
+
+    matrix: np.array or scipy.sparse matrix
+        The adjacency matrix, in the order of names.
     """
-    Calculates the prescision of the predicted adjacency matrix.
+
+    def __init__(self, names, matrix):
+        # scipy is only needed by the labelled scoring, not by the dense one
+        from scipy import sparse
+        names = np.array([fragment_name(name) for name in names], dtype=str)
+        matrix = sparse.csr_matrix(matrix)
+        if matrix.shape != (len(names), len(names)):
+            raise ValueError(f"Adjacency matrix of shape {matrix.shape} for {len(names)} fragments")
+        order = np.argsort(names, kind='stable')
+        self.names = names[order]
+        if len(self.names) > 1 and np.any(self.names[1:] == self.names[:-1]):
+            raise ValueError(f"Duplicate fragment names: {sorted(set(self.names[1:][self.names[1:] == self.names[:-1]]))}")
+        self.matrix = matrix[order][:, order]
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Loads a labelled adjacency matrix from a file, in the formats of load_adj_matrix: CSV files have a column per fragment
+        (the rows follow the order of the columns), JSON files a list of adjacent fragments per fragment.
+        """
+        if path.endswith('.csv'):
+            df = pd.read_csv(path)
+            return cls(df.columns, df.values)
+        elif path.endswith('.json'):
+            with open(path, 'r') as f:
+                adj_dict = json.load(f)
+            # as in load_adj_matrix, entry [i, j] is 1 when fragment i is in the adjacency list of fragment j
+            from scipy import sparse
+            index = {frag: i for i, frag in enumerate(adj_dict)}
+            rows = [index[frag] for frag2 in adj_dict for frag in adj_dict[frag2] if frag in index]
+            cols = [index[frag2] for frag2 in adj_dict for frag in adj_dict[frag2] if frag in index]
+            matrix = sparse.csr_matrix((np.ones(len(rows), dtype=int), (rows, cols)), shape=(len(index), len(index)))
+            # repeated neighbours are summed by scipy
+            matrix.data[:] = 1
+            return cls(list(adj_dict), matrix)
+        raise ValueError(f"Unsupported adjacency matrix file: {path}")
+
+    def reindex(self, names):
+        """
+        Returns the sparse matrix with its rows and columns following sorted fragment names. Fragments not in this matrix
+        get empty rows and columns, and fragments not in names are dropped.
+        """
+        from scipy import sparse
+        positions, found = find_names(names, self.names)
+        coo = self.matrix.tocoo()
+        keep = found[coo.row] & found[coo.col]
+        return sparse.csr_matrix((coo.data[keep], (positions[coo.row[keep]], positions[coo.col[keep]])), shape=(len(names), len(names)))
+
+
+def find_names(sorted_names, names):
+    """
+    Finds fragment names in sorted fragment names, by binary search.
+
+    Args:
+    -----
+    sorted_names: np.array
+        The sorted fragment names to search in.
+
+    names: np.array
+        The fragment names to find.
+
+    Returns:
+    --------
+    positions: np.array
+        The position of every name in sorted_names (meaningless where not found).
+
+    found: np.array
+        Whether every name is in sorted_names.
+    """
+    sorted_names = np.asarray(sorted_names, dtype=str)
+    names = np.asarray(names, dtype=str)
+    positions = np.searchsorted(sorted_names, names)
+    if len(sorted_names) == 0:
+        return positions, np.zeros(len(names), dtype=bool)
+    found = sorted_names[np.minimum(positions, len(sorted_names) - 1)] == names
+    return positions, found
+
+
+def sparse_area_sums(adj_pred, adj_true, areas):
+    """
+    Calculates the sums of area_sums on aligned sparse adjacency matrices, weighting every adjacent pair (i, j) by
+    areas[i] + areas[j] without building the dense areas matrix.
+
+    Args:
+    -----
+    adj_pred: scipy.sparse matrix
+        The predicted adjacency matrix.
+
+    adj_true: scipy.sparse matrix
+        The true adjacency matrix, aligned with adj_pred.
+
+    areas: np.array
+        The areas of the fragments, aligned with the matrices.
+
+    Returns:
+    --------
+    both_areas, true_areas, pred_areas: float
+        As in area_sums.
+    """
+    from scipy import sparse
+
+    def weighted_sum(matrix):
+        coo = sparse.coo_matrix(matrix)
+        return np.sum(coo.data * (areas[coo.row] + areas[coo.col]))
+
+    both = sparse.csr_matrix(adj_pred).astype(bool).multiply(sparse.csr_matrix(adj_true).astype(bool))
+    return weighted_sum(both), weighted_sum(adj_true), weighted_sum(adj_pred)
+
+
+def score_labelled(adj_pred, adj_true, area_names, areas, missing='zero'):
+    """
+    Calculates the prescision, recall, and F1 score of a predicted adjacency matrix, aligning the prediction, the ground
+    truth and the areas by fragment name. The fragments of the ground truth are the ones scored.
+
+    Args:
+    -----
+    adj_pred: LabelledAdjacency
+        The predicted adjacency matrix.
+
+    adj_true: LabelledAdjacency
+        The true adjacency matrix.
+
+    area_names: np.array
+        The names of the fragments of areas (see load_areas).
+
+    areas: np.array
+        The areas of the fragments. Every fragment of the ground truth must have an area.
+
+    missing: str
+        How to handle fragments of the ground truth missing in the prediction, or fragments of the prediction missing in the
+        ground truth: 'zero' scores them as not adjacent to anything (and ignores the extra fragments of the prediction),
+        'raise' raises a ValueError.
+
+    Returns:
+    --------
+    precision, recall, f1: float
+        As in score.
+    """
+    if missing not in ('zero', 'raise'):
+        raise ValueError(f"missing must be 'zero' or 'raise', got {missing!r}")
+    if missing == 'raise':
+        absent = np.setdiff1d(adj_true.names, adj_pred.names)
+        extra = np.setdiff1d(adj_pred.names, adj_true.names)
+        if len(absent) > 0 or len(extra) > 0:
+            raise ValueError(f"Fragments missing in the prediction: {absent.tolist()}, missing in the ground truth: {extra.tolist()}")
+
+    area_names = np.array([fragment_name(name) for name in area_names], dtype=str)
+    order = np.argsort(area_names, kind='stable')
+    positions, found = find_names(area_names[order], adj_true.names)
+    if not np.all(found):
+        raise ValueError(f"No area for the fragments {adj_true.names[~found].tolist()}")
+    aligned_areas = np.asarray(areas)[order][positions]
+
+    both_areas, true_areas, pred_areas = sparse_area_sums(adj_pred.reindex(adj_true.names), adj_true.matrix, aligned_areas)
+    precision = _prescision(both_areas, true_areas)
+    recall = _recall(both_areas, pred_areas)
+    return precision, recall, _f1(precision, recall)
+
+
+def area_sums(adj_pred, adj_true, areas_matrix):
+    """
+    Calculates the area weighted sums shared by the prescision, recall and F1 scores.
 
     Args:
     -----
@@ -86,14 +313,53 @@ def prescision(adj_pred, adj_true, areas_matrix):
 
     Returns:
     --------
-    precision: float
-        The prescision score of the predicted adjacency matrix.
+    both_areas: float
+        The sum of the areas of the pairs adjacent in both matrices.
+
+    true_areas: float
+        The sum of the areas of the pairs adjacent in the true matrix.
+
+    pred_areas: float
+        The sum of the areas of the pairs adjacent in the predicted matrix.
     """
     both = np.logical_and(adj_pred, adj_true)
     both_areas = np.sum(both * areas_matrix)
     true_areas = np.sum(adj_true * areas_matrix)
+    pred_areas = np.sum(adj_pred * areas_matrix)
+    return both_areas, true_areas, pred_areas
+
+def _prescision(both_areas, true_areas):
     return both_areas / true_areas if true_areas > 0 else 0
 
+def _recall(both_areas, pred_areas):
+    return both_areas / pred_areas if pred_areas > 0 else 0
+
+def _f1(prescision, recall):
+    return 2 * prescision * recall / (prescision + recall) if prescision + recall > 0 else 0
+
+def prescision(adj_pred, adj_true, areas_matrix):
+    """
+    Calculates the prescision of the predicted adjacency matrix.
+
+    Args:
+    -----
+    adj_pred: np.array
+        The predicted adjacency matrix.
+
+    adj_true: np.array
+        The true adjacency matrix.
+
+    areas_matrix: np.array
+        The matrix of the sum of the areas of each pair of fragments.
+
+    Returns:
+    --------
+    precision: float
+        The prescision score of the predicted adjacency matrix.
+    """
+    both_areas, true_areas, _ = area_sums(adj_pred, adj_true, areas_matrix)
+    return _prescision(both_areas, true_areas)
+
 def recall(adj_pred, adj_true, areas_matrix):
     """
     Calculates the recall of the predicted adjacency matrix.
@@ -114,10 +380,8 @@ def recall(adj_pred, adj_true, areas_matrix):
     recall: float
         The recall score of the predicted adjacency matrix.
     """
-    both = np.logical_and(adj_pred, adj_true)
-    both_areas = np.sum(both * areas_matrix)
-    pred_areas = np.sum(adj_pred * areas_matrix)
-    return both_areas / pred_areas if pred_areas > 0 else 0
+    both_areas, _, pred_areas = area_sums(adj_pred, adj_true, areas_matrix)
+    return _recall(both_areas, pred_areas)
     
 def f1(adj_pred, adj_true, areas_matrix):
     """
@@ -139,9 +403,7 @@ def f1(adj_pred, adj_true, areas_matrix):
     f1: float
         The F1 score of the predicted adjacency matrix.
     """
-    _prescision = prescision(adj_pred, adj_true, areas_matrix)
-    _recall = recall(adj_pred, adj_true, areas_matrix)
-    return 2 * _prescision * _recall / (_prescision + _recall) if _prescision + _recall > 0 else 0
+    return score(adj_pred, adj_true, areas_matrix)[2]
     
 def score(adj_pred, adj_true, areas_matrix):
     """
@@ -169,14 +431,84 @@ def score(adj_pred, adj_true, areas_matrix):
     f1: float
         The F1 score of the predicted adjacency matrix.
     """
-    _precision = prescision(adj_pred, adj_true, areas_matrix)
-    _recall = recall(adj_pred, adj_true, areas_matrix)
-    _f1 = f1(adj_pred, adj_true, areas_matrix)
-    return _precision, _recall, _f1
+    both_areas, true_areas, pred_areas = area_sums(adj_pred, adj_true, areas_matrix)
+    precision = _prescision(both_areas, true_areas)
+    recall = _recall(both_areas, pred_areas)
+    return precision, recall, _f1(precision, recall)
+
+SCORES_COLUMNS = ['frag_dir', 'precision', 'recall', 'f1', 'adj_pred_path', 'adj_true_path']
+
+def score_one(frag_dir, adj_pred_path, adj_true_path, missing='zero', from_transformations=False):
+    """
+    Scores one predicted adjacency matrix, aligned with the true adjacency matrix and the fragments by name (see score_labelled).
+
+    Args:
+    -----
+    frag_dir: str
+        The path to the directory containing the fragments.
+
+    adj_pred_path: str
+        The path to the file containing the predicted adjacency matrix.
+
+    adj_true_path: str
+        The path to the file containing the true adjacency matrix.
+
+    missing: str
+        How to handle fragments missing in the prediction or in the ground truth, 'zero' or 'raise' (see score_labelled).
+
+    from_transformations: bool
+        Whether adj_pred_path is a solver's transformations CSV file, whose adjacency is estimated in memory (see score_transformations).
+
+    Returns:
+    --------
+    row: list
+        The row of the scores file (see SCORES_COLUMNS).
+    """
+    if from_transformations:
+        precision, recall, f1 = score_transformations(frag_dir, adj_pred_path, adj_true_path, missing=missing)
+    else:
+        adj_pred = LabelledAdjacency.from_file(adj_pred_path)
+        adj_true = LabelledAdjacency.from_file(adj_true_path)
+        area_names, areas = load_areas(os.path.normpath(frag_dir))
+        precision, recall, f1 = score_labelled(adj_pred, adj_true, area_names, areas, missing=missing)
+    return [frag_dir, precision, recall, f1, adj_pred_path, adj_true_path]
+
+def score_group(items, missing='zero', from_transformations=False):
+    """
+    Scores the predictions of the same fragments directory one after the other, in one process.
+
+    Args:
+    -----
+    items: list
+        The (frag_dir, adj_pred_path, adj_true_path) tuples to score, of the same frag_dir.
+
+    missing: str
+        As in score_one.
+
+    from_transformations: bool
+        As in score_one.
+
+    Returns:
+    --------
+    rows: list
+        The rows of the scores file, in the order of items.
+    """
+    return [score_one(*item, missing, from_transformations) for item in items]
+
+def read_scored(output_path):
+    """
+    Reads the (frag_dir, adj_pred_path, adj_true_path) tuples already scored in a scores file.
+    """
+    if not os.path.exists(output_path):
+        return {}
+    with open(output_path, newline='') as f:
+        return {(row['frag_dir'], row['adj_pred_path'], row['adj_true_path']): row for row in csv.DictReader(f)
+                if row.get('f1') not in (None, '')}
 
-def score_batch(batch):
+def score_batch(batch, output_path='scores.csv', workers=1, resume=False, missing='zero', from_transformations=False):
     """
-    Scores several adjacency matrices and saves the results to a CSV file.
+    Scores several adjacency matrices and saves the results to a CSV file. Every score is appended to the file as soon
+    as it is computed, so an interrupted batch can be resumed, and the file is rewritten in the order of the batch at the end.
 
     Args:
     -----
@@ -189,20 +521,64 @@ def score_batch(batch):
         adj_true_path: str
             The path to the file containing the true adjacency matrix.
 
+    output_path: str
+        The path of the CSV file to save the scores to.
+
+    workers: int
+        The number of processes scoring the batch in parallel. The predictions of an object are all scored by the same
+        process, so its fragments are decoded once.
+
+    resume: bool
+        Whether to skip the tuples already scored in the output file.
+
+    missing: str
+        How to handle fragments missing in a prediction or in the ground truth, 'zero' or 'raise' (see score_labelled).
+
+    from_transformations: bool
+        Whether the predictions are solver's transformations CSV files instead of adjacency matrices (see score_transformations).
+
     Returns:
     --------
-    None (saves the results to a CSV file named 'scores.csv' at cwd).
+    None (saves the results to the CSV file at output_path, 'scores.csv' at cwd by default).
     """
-    results = []
-    for frag_dir, adj_pred_path, adj_true_path in batch:
-        print(frag_dir)
-        adj_pred = load_adj_matrix(adj_pred_path)
-        adj_true = load_adj_matrix(adj_true_path)
-        areas_matrix = load_areas_matrix(frag_dir)
-        precision, recall, f1 = score(adj_pred, adj_true, areas_matrix)
-        results.append([frag_dir, precision, recall, f1])
-    results_df = pd.DataFrame(results, columns=['frag_dir', 'precision', 'recall', 'f1'])
-    results_df.to_csv('scores.csv', index=False) 
+    batch = [tuple(item) for item in batch]
+    scored = read_scored(output_path) if resume else {}
+    pending = [item for item in batch if item not in scored]
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if not resume or not os.path.exists(output_path):
+        with open(output_path, 'w', newline='') as f:
+            csv.writer(f).writerow(SCORES_COLUMNS)
+
+    with open(output_path, 'a', newline='') as f:
+        writer = csv.writer(f)
+
+        def write(row):
+            print(row[0])
+            writer.writerow(row)
+            f.flush()
+            scored[tuple(row[i] for i in (0, 4, 5))] = dict(zip(SCORES_COLUMNS, row))
+
+        if workers > 1:
+            # all the predictions of an object go to the same process, which decodes its fragments once (see load_areas)
+            groups = {}
+            for item in pending:
+                groups.setdefault(item[0], []).append(item)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(score_group, items, missing, from_transformations) for items in groups.values()]
+                for future in as_completed(futures):
+                    for row in future.result():
+                        write(row)
+        else:
+            for item in pending:
+                write(score_one(*item, missing, from_transformations))
+
+    results_df = pd.DataFrame([scored[item] for item in batch if item in scored], columns=SCORES_COLUMNS)
+    tmp_path = f"{output_path}.tmp"
+    results_df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
 
 
 def expanded_mask(path, tsfm, canvas_size=(10000, 10000), sig=16):
@@ -228,15 +604,160 @@ def expanded_mask(path, tsfm, canvas_size=(10000, 10000), sig=16):
     mask: np.array
         The mask of the fragment expanded by a Gaussian blur.
     """
-    image = Image.open(path).convert('RGBA').resize((2000, 2000)).rotate(tsfm['rot'], expand=True)
-    canvas = Image.new('RGBA', canvas_size, (0, 0, 0, 0))
+    (x, y), cropped = cropped_expanded_mask(Image.open(path).convert('RGBA'), tsfm, canvas_size, sig)
+    mask = np.zeros((canvas_size[1], canvas_size[0]), dtype=bool)
+    mask[y:y + cropped.shape[0], x:x + cropped.shape[1]] = cropped
+    return mask
+
+
+def cropped_expanded_mask(image, tsfm, canvas_size=(10000, 10000), sig=16, truncate=4.0):
+    """
+    Create the mask of expanded_mask cropped to the part of the canvas the fragment can reach: its pasted bounding box
+    padded by the radius of the Gaussian kernel. Blurring only that part gives the same pixels as blurring the whole canvas.
+
+    Args:
+    -----
+    image: PIL.Image
+        The decoded RGBA image of the fragment.
+
+    tsfm: dict
+        A dictionary containing the transformation parameters of the fragment.
+
+    canvas_size: tuple
+        The size of the canvas to paste the fragment on.
+
+    sig: int
+        The standard deviation of the Gaussian blur.
+
+    truncate: float
+        The radius of the Gaussian kernel in standard deviations (as in skimage.filters.gaussian).
+
+    Returns:
+    --------
+    offset: tuple
+        The (x, y) offset of the cropped mask on the canvas.
+
+    mask: np.array
+        The cropped mask of the fragment expanded by a Gaussian blur.
+    """
+    # scikit-image is only needed to build the adjacency matrices, not to score them
+    from skimage.filters import gaussian
+    image = image.resize((2000, 2000)).rotate(tsfm['rot'], expand=True)
     height, width = image.size
     x, y = tsfm['offset']
     x, y = np.round(x).astype(int) - (height // 2) + 2500, np.round(y).astype(int) - (width // 2) + 2500
-    canvas.paste(image, (x, y), image)
-    mask = np.array(canvas)[:, :, 3]
-    mask = gaussian(mask, sig)
-    return mask > 0
+    radius = int(truncate * sig + 0.5)
+    x0, y0 = max(0, x - radius), max(0, y - radius)
+    x1, y1 = min(canvas_size[0], x + image.size[0] + radius), min(canvas_size[1], y + image.size[1] + radius)
+    if x0 >= x1 or y0 >= y1:
+        return (0, 0), np.zeros((0, 0), dtype=bool)
+    canvas = Image.new('RGBA', (x1 - x0, y1 - y0), (0, 0, 0, 0))
+    canvas.paste(image, (x - x0, y - y0), image)
+    mask = gaussian(np.array(canvas)[:, :, 3], sig, truncate=truncate)
+    return (x0, y0), mask > 0
+
+
+def masks_overlap(mask1, mask2):
+    """
+    Checks whether two cropped masks (see cropped_expanded_mask) share a pixel, looking only at their common part.
+    """
+    (x1, y1), mask1 = mask1
+    (x2, y2), mask2 = mask2
+    left, top = max(x1, x2), max(y1, y2)
+    right, bottom = min(x1 + mask1.shape[1], x2 + mask2.shape[1]), min(y1 + mask1.shape[0], y2 + mask2.shape[0])
+    if left >= right or top >= bottom:
+        return False
+    return np.any(np.logical_and(mask1[top - y1:bottom - y1, left - x1:right - x1], mask2[top - y2:bottom - y2, left - x2:right - x2]))
+
+
+def transformations_adjacency(frag_dir, tsfm_path, canvas_size=(10000, 10000), sig=16):
+    """
+    Estimates the adjacency matrix of the fragments placed by a solver's transformations in memory, as calc_adj_matrix
+    does (without writing it to files). Every fragment image is decoded once for both its expanded mask and its area.
+
+    Args:
+    -----
+    frag_dir: str
+        The path to the directory containing the fragments.
+
+    tsfm_path: str
+        The path to the CSV file containing the transformations of the fragments (rpf, x, y, rot).
+
+    canvas_size: tuple
+        The size of the canvas to paste the fragments on.
+
+    sig: int
+        The standard deviation of the Gaussian blur.
+
+    Returns:
+    --------
+    adj: LabelledAdjacency
+        The adjacency matrix of the transformed fragments (fragments without a transformation are left out).
+
+    area_names: np.array
+        The names of all the fragments of the directory.
+
+    areas: np.array
+        The areas of all the fragments of the directory, in the order of area_names.
+    """
+    tsfms = {
+        fragment_name(tsfm['rpf']): {
+            'offset': (tsfm['x'], tsfm['y']),
+            'rot': tsfm['rot'],
+        }
+    for tsfm in pd.read_csv(tsfm_path).to_dict(orient='records')}
+
+    area_names = []
+    areas = []
+    frag_names = []
+    masks = []
+    for filename in os.listdir(frag_dir):
+        if not filename.endswith('.png'):
+            continue
+        image = Image.open(os.path.join(frag_dir, filename)).convert('RGBA')
+        name = fragment_name(filename)
+        area_names.append(name)
+        areas.append(image_area(image))
+        if name in tsfms:
+            frag_names.append(name)
+            masks.append(cropped_expanded_mask(image, tsfms[name], canvas_size, sig))
+
+    n_frags = len(masks)
+    adj = np.zeros((n_frags, n_frags))
+    for i in range(n_frags):
+        for j in range(i + 1, n_frags):
+            if masks_overlap(masks[i], masks[j]):
+                adj[i, j] = adj[j, i] = 1
+
+    return LabelledAdjacency(frag_names, adj), np.array(area_names, dtype=str), np.array(areas)
+
+
+def score_transformations(frag_dir, tsfm_path, adj_true_path, missing='zero'):
+    """
+    Calculates the prescision, recall, and F1 score of the adjacency of a solver's transformations in one pass, without
+    materializing the predicted adjacency matrix (see transformations_adjacency and score_labelled).
+
+    Args:
+    -----
+    frag_dir: str
+        The path to the directory containing the fragments.
+
+    tsfm_path: str
+        The path to the CSV file containing the transformations of the fragments.
+
+    adj_true_path: str
+        The path to the file containing the true adjacency matrix.
+
+    missing: str
+        How to handle fragments missing in the transformations or in the ground truth, 'zero' or 'raise'.
+
+    Returns:
+    --------
+    precision, recall, f1: float
+        As in score.
+    """
+    adj_pred, area_names, areas = transformations_adjacency(frag_dir, tsfm_path)
+    return score_labelled(adj_pred, LabelledAdjacency.from_file(adj_true_path), area_names, areas, missing=missing)
 
 
 def calc_adj_matrix(frag_paths, tsfm_path, csv_path='adj.csv', json_path='adj.json'):  
@@ -294,3 +815,47 @@ def calc_adj_matrix(frag_paths, tsfm_path, csv_path='adj.csv', json_path='adj.js
             json.dump(adj_dict, f, indent=4)
 
     return adj
+
+
+def find_adjacency_file(directory, name):
+    """
+    Returns the path of the CSV or JSON adjacency matrix of an object in a directory, None when there is none.
+    """
+    for extension in ('.csv', '.json'):
+        path = os.path.join(directory, name + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pieces_dir', type=str, required=True, help='Path to the directory containing a directory of fragments per object')
+    parser.add_argument('--results_dir', type=str, nargs='+', required=True, help='Path(s) to the directories containing the predicted adjacency matrices (csv or json files)')
+    parser.add_argument('--ground_truth_dir', type=str, required=True, help='Path to the directory containing the true adjacency matrices (csv or json files)')
+    parser.add_argument('--output', type=str, default='scores.csv', help='Path of the CSV file to save the scores to')
+    parser.add_argument('--workers', type=int, default=1, help='Number of predictions to score in parallel (each in its own process)')
+    parser.add_argument('--resume', action='store_true', help='Skip the predictions already scored in the output file')
+    parser.add_argument('--from_transformations', action='store_true', help='The results directories contain solver transformations CSV files, their adjacency is estimated in memory')
+    parser.add_argument('--missing', choices=['zero', 'raise'], default='zero', help='Score the fragments missing in a prediction as not adjacent (zero) or fail (raise)')
+    args = parser.parse_args()
+
+    batch = []
+    for filename in sorted(os.listdir(args.ground_truth_dir)):
+        obj, extension = os.path.splitext(filename)
+        if extension not in ('.csv', '.json'):
+            continue
+        for results_dir in args.results_dir:
+            adj_pred_path = find_adjacency_file(results_dir, obj)
+            if adj_pred_path is None:
+                print(f"No predicted adjacency matrix for object {obj} in {results_dir}")
+                continue
+            batch.append((os.path.join(args.pieces_dir, obj), adj_pred_path, os.path.join(args.ground_truth_dir, filename)))
+
+    score_batch(batch, output_path=args.output, workers=args.workers, resume=args.resume, missing=args.missing, from_transformations=args.from_transformations)
+
+    scores_df = pd.read_csv(args.output)
+    print(f"Average precision: {scores_df['precision'].mean()}")
+    print(f"Average recall: {scores_df['recall'].mean()}")
+    print(f"Average F1: {scores_df['f1'].mean()}")
@@ -1,12 +1,14 @@
 import argparse
+import hashlib
+import json
+import math
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from PIL import Image, ImageChops
-from scipy.ndimage import rotate
-from sklearn.metrics import mean_squared_error
 
 
 def get_all_csv_files(directory):
@@ -86,100 +88,587 @@ def read_transformations(transformations_dir, make_non_negative=False):
     return transformations
 
 
-def calculate_shared_canvas_size(pieces_dir, transformations_dir, gt_transformations_dir):
-    """ 
-    Calculate the dimensions of the shared canvas that will be used to place all the pieces, after applying the transformations on them.
+TRANSFORMATION_DTYPE = np.dtype([('x', np.float64), ('y', np.float64), ('rot', np.float64)])
+
+class TransformationTable():
+    """
+    The transformations of the pieces of one object, stored in a structured numpy array of (x, y, rot) records and
+    indexed by the piece filename (rpf), so looking up the transformation of a piece does not scan the whole table.
+    When a piece appears more than once, lookups return its first row (as the pandas lookups did).
     """
-    # Find the largest piece
-    largest_piece = find_largest_fragment(pieces_dir)
-    largest_piece_path = os.path.join(pieces_dir, largest_piece)
-    largest_piece_img = Image.open(largest_piece_path)
-    largest_piece_array = np.array(largest_piece_img)
 
-    # Read transformations
-    transformations = read_transformations(transformations_dir)
-    gt_transformations = read_transformations(gt_transformations_dir)
+    def __init__(self, rpfs, records):
+        self.rpfs = list(rpfs)
+        self.records = records
+        self.index = {}
+        for i, rpf in enumerate(self.rpfs):
+            self.index.setdefault(rpf, i)
+
+    @classmethod
+    def from_dataframe(cls, transformations):
+        records = np.zeros(len(transformations), dtype=TRANSFORMATION_DTYPE)
+        for field in TRANSFORMATION_DTYPE.names:
+            records[field] = transformations[field].to_numpy(dtype=np.float64)
+        return cls(transformations['rpf'].tolist(), records)
+
+    def __len__(self):
+        return len(self.rpfs)
+
+    def __contains__(self, rpf):
+        return rpf in self.index
+
+    def __getitem__(self, rpf):
+        return self.records[self.index[rpf]]
+
+    def rows(self):
+        """
+        Iterates over the (rpf, record) pairs in the order of the csv file.
+        """
+        return zip(self.rpfs, self.records)
+
+    def non_negative(self):
+        """
+        Returns a copy of the table translated so that the minimal x and y are not negative (as in read_transformations).
+        """
+        records = self.records.copy()
+        for field in ('x', 'y'):
+            min_value = records[field].min() if len(records) > 0 else 0
+            if min_value < 0:
+                records[field] = records[field] + abs(min_value)
+        return TransformationTable(self.rpfs, records)
+
+
+def load_transformation_table(transformations, make_non_negative=False):
+    """
+    Loads a transformations csv file into a TransformationTable. Tables are returned as they are, so the evaluation
+    functions accept either a path or an already loaded table and each csv file is read once per object.
 
-    # Initialize the shared canvas size with the dimensions of the largest piece
-    shared_canvas_width = largest_piece_array.shape[1]
-    shared_canvas_height = largest_piece_array.shape[0]
+    ::param transformations: the csv file containing the transformations, or a TransformationTable
+    ::param make_non_negative: whether to translate the transformations to non negative x and y
+    """
+    if not isinstance(transformations, TransformationTable):
+        transformations = TransformationTable.from_dataframe(read_transformations(transformations))
+    return transformations.non_negative() if make_non_negative else transformations
 
-    # Apply the transformations on the largest piece to find the shared canvas size
-    for index, row in transformations.iterrows():
-        piece_filename = row['rpf']
-        x = int(row['x'])
-        y = int(row['y'])
-        rot = row['rot']
 
-        piece_path = os.path.join(pieces_dir, piece_filename)
-        piece_img = Image.open(piece_path)
+def validate_transformations(transformations, gt_transformations, strict=False):
+    """
+    Validates that the pieces of the result transformations match the pieces of the ground truth transformations.
+    Pieces that are not in the ground truth always raise an error, pieces of the ground truth that are missing in the
+    result only raise an error when strict (otherwise they are scored as misplaced pieces).
+
+    ::param transformations: the result TransformationTable
+    ::param gt_transformations: the ground truth TransformationTable
+    ::param strict: whether to raise an error when pieces of the ground truth are missing in the result
+    ::return: the sorted list of the ground truth pieces that are missing in the result
+    """
+    unknown_pieces = sorted(rpf for rpf in transformations.index if rpf not in gt_transformations)
+    if len(unknown_pieces) > 0:
+        raise ValueError(f"The result contains {len(unknown_pieces)} pieces that are not in the ground truth: {unknown_pieces}")
 
-        # Apply rotation directly on the PIL image
-        rotated_piece = piece_img.rotate(rot,expand=True)
+    missing_pieces = sorted(rpf for rpf in gt_transformations.index if rpf not in transformations)
+    if strict and len(missing_pieces) > 0:
+        raise ValueError(f"The result is missing {len(missing_pieces)} pieces of the ground truth: {missing_pieces}")
 
-        # Calculate new canvas size
-        new_width = max(rotated_piece.width, rotated_piece.width + abs(x))
-        new_height = max(rotated_piece.height, rotated_piece.height + abs(y))
+    return missing_pieces
 
-        # Create a new blank image with the new dimensions and the same mode as the rotated image
-        new_piece = Image.new(rotated_piece.mode, (new_width, new_height))
 
-        # Calculate position to paste the rotated image onto the new canvas
-        paste_x = max(0, x)
-        paste_y = max(0, y)
+REPAIR_DATASET_VERSION = "REPAIR_DATASET_NIPS_24"
+GT_CACHE_FORMAT_VERSION = 2
 
-        # Paste the rotated image onto the new canvas
-        new_piece.paste(rotated_piece, (paste_x, paste_y))
+def rotation_matrix(size, rot, center=None):
+    """
+    Returns the affine matrix (a, b, c, d, e, f), mapping destination pixels to source pixels, with which PIL.Image.rotate
+    rotates an image of the given size by rot degrees around center (the center of the image by default).
 
+    ::param size: the (width, height) of the image
+    ::param rot: the rotation in degrees
+    ::param center: the (x, y) center of the rotation
+    """
+    width, height = size
+    if center is None:
+        center = (width / 2, height / 2)
+    angle = -math.radians(rot % 360.0)
+    a, b = round(math.cos(angle), 15), round(math.sin(angle), 15)
+    d, e = round(-math.sin(angle), 15), round(math.cos(angle), 15)
+    c = a * -center[0] + b * -center[1] + center[0]
+    f = d * -center[0] + e * -center[1] + center[1]
+    return a, b, c, d, e, f
+
+
+def rotated_size(size, rot):
+    """
+    Returns the size of an image of the given size after rotating it by rot degrees with expand=True, computed the way
+    PIL.Image.rotate computes it, without rotating any pixels.
 
-        # Update the shared canvas size
-        shared_canvas_width = max(shared_canvas_width, new_piece.width)
-        shared_canvas_height = max(shared_canvas_height, new_piece.height)
+    ::param size: the (width, height) of the image
+    ::param rot: the rotation in degrees
+    """
+    width, height = size
+    angle = rot % 360.0
+    if angle in (0, 180):
+        return width, height
+    if angle in (90, 270):
+        return height, width
 
-    for index, row in gt_transformations.iterrows():
-        piece_filename = row['rpf']
-        x = int(row['x'])
-        y = int(row['y'])
-        rot = row['rot']
+    a, b, c, d, e, f = rotation_matrix(size, rot)
+    xx = [a * x + b * y + c for x, y in ((0, 0), (width, 0), (width, height), (0, height))]
+    yy = [d * x + e * y + f for x, y in ((0, 0), (width, 0), (width, height), (0, height))]
+    return math.ceil(max(xx)) - math.floor(min(xx)), math.ceil(max(yy)) - math.floor(min(yy))
 
-        piece_path = os.path.join(pieces_dir, piece_filename)
-        piece_img = Image.open(piece_path)
 
-        # Apply rotation directly on the PIL image
-        rotated_piece = piece_img.rotate(rot, expand=True)
+def crop_mask(alpha_channel):
+    """
+    Crops a piece mask (non transparent pixels) to its bounding box.
 
-        # Calculate new canvas size
-        new_width = max(rotated_piece.width, rotated_piece.width + abs(x))
-        new_height = max(rotated_piece.height, rotated_piece.height + abs(y))
+    ::param alpha_channel: the alpha channel of the piece as a numpy array
+    ::return: the (x, y) offset of the bounding box and the cropped boolean mask
+    """
+    mask = alpha_channel > 0
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if len(rows) == 0:
+        return (0, 0), np.zeros((0, 0), dtype=bool)
+    return (int(cols[0]), int(rows[0])), mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+
+# number of set bits of every byte value
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+def _bit_window(bits, start, length):
+    # the bits [start, start + length) of every packed row, shifted to start at the first bit of the first byte
+    byte_start, shift = divmod(start, 8)
+    n_bytes = (length + 7) // 8
+    window = np.zeros((bits.shape[0], n_bytes + 1), dtype=np.uint8)
+    available = bits[:, byte_start:byte_start + n_bytes + 1]
+    window[:, :available.shape[1]] = available
+    if shift:
+        window = (window[:, :-1] << shift) | (window[:, 1:] >> (8 - shift))
+    else:
+        window = window[:, :-1]
+    # clear the bits after the end of the window
+    if length % 8:
+        window[:, -1] &= (0xFF << (8 - length % 8)) & 0xFF
+    return window
 
-        # Create a new blank image with the new dimensions and the same mode as the rotated image
-        new_piece = Image.new(rotated_piece.mode, (new_width, new_height))
 
-        # Calculate position to paste the rotated image onto the new canvas
-        paste_x = max(0, x)
-        paste_y = max(0, y)
+class BitMask():
+    """
+    A piece mask cropped to its bounding box and packed 8 pixels per byte (np.packbits along the rows), with the (x, y)
+    offset of the bounding box in the image (or canvas) it belongs to. Areas are counted on the packed bytes and
+    intersections only look at the overlap of the two bounding boxes, so the masks are never unpacked nor padded to a
+    common size. Compared with the RGBA image of a piece, a mask takes 1/32 of the memory (and less once cropped).
+    """
+
+    def __init__(self, offset, shape, bits):
+        self.offset = (int(offset[0]), int(offset[1]))
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.bits = bits
+
+    @classmethod
+    def empty(cls):
+        return cls((0, 0), (0, 0), np.zeros((0, 0), dtype=np.uint8))
+
+    @classmethod
+    def from_array(cls, mask, offset=(0, 0)):
+        """
+        Packs a boolean (or alpha channel) array, cropped to its bounding box.
+
+        ::param mask: the mask, non zero for the pixels of the piece
+        ::param offset: the (x, y) offset of the array in the image
+        """
+        (crop_x, crop_y), cropped = crop_mask(mask)
+        if cropped.size == 0:
+            return cls.empty()
+        return cls((offset[0] + crop_x, offset[1] + crop_y), cropped.shape, np.packbits(cropped, axis=1))
+
+    @classmethod
+    def from_image(cls, image):
+        """
+        Packs the alpha channel of an RGBA image.
+        """
+        return cls.from_array(np.array(image.getchannel('A')))
+
+    @property
+    def width(self):
+        return self.shape[1]
+
+    @property
+    def height(self):
+        return self.shape[0]
+
+    def is_empty(self):
+        return self.shape[0] == 0 or self.shape[1] == 0
+
+    def to_array(self):
+        """
+        Unpacks the mask into a boolean array of its bounding box.
+        """
+        if self.is_empty():
+            return np.zeros(self.shape, dtype=bool)
+        return np.unpackbits(self.bits, axis=1, count=self.width).astype(bool)
+
+    def to_image(self, size):
+        """
+        Draws the mask on an 'L' image of the given size (255 for the pixels of the piece, 0 elsewhere).
+        """
+        image = Image.new('L', size, 0)
+        if not self.is_empty():
+            image.paste(Image.fromarray(self.to_array().astype(np.uint8) * 255), self.offset)
+        return image
+
+    def area(self):
+        """
+        The number of pixels of the mask.
+        """
+        return np.sum(_POPCOUNT[self.bits], dtype=np.int64)
+
+    def translate(self, dx, dy):
+        return BitMask((self.offset[0] + dx, self.offset[1] + dy), self.shape, self.bits)
+
+    def window(self, x0, y0, x1, y1):
+        """
+        Returns the packed rows of the part of the mask inside the window [x0, x1) x [y0, y1) of the image, which must be
+        inside the bounding box of the mask.
+        """
+        rows = self.bits[y0 - self.offset[1]:y1 - self.offset[1]]
+        return _bit_window(rows, x0 - self.offset[0], x1 - x0)
+
+    def crop(self):
+        """
+        Crops the mask to the bounding box of its pixels.
+        """
+        if self.is_empty():
+            return BitMask.empty()
+        rows = np.flatnonzero(self.bits.any(axis=1))
+        if len(rows) == 0:
+            return BitMask.empty()
+        cols = np.flatnonzero(np.unpackbits(np.bitwise_or.reduce(self.bits, axis=0), count=self.width))
+        x0, y0 = self.offset[0] + int(cols[0]), self.offset[1] + int(rows[0])
+        x1, y1 = self.offset[0] + int(cols[-1]) + 1, self.offset[1] + int(rows[-1]) + 1
+        return BitMask((x0, y0), (y1 - y0, x1 - x0), self.window(x0, y0, x1, y1))
+
+    def clip(self, size):
+        """
+        Clips the mask to an image of the given size.
+        """
+        x0, y0 = max(0, self.offset[0]), max(0, self.offset[1])
+        x1, y1 = min(size[0], self.offset[0] + self.width), min(size[1], self.offset[1] + self.height)
+        if x0 >= x1 or y0 >= y1:
+            return BitMask.empty()
+        if (x0, y0, x1, y1) == (self.offset[0], self.offset[1], self.offset[0] + self.width, self.offset[1] + self.height):
+            return self
+        return BitMask((x0, y0), (y1 - y0, x1 - x0), self.window(x0, y0, x1, y1)).crop()
+
+    def intersection_area(self, other):
+        """
+        The number of pixels shared by two masks of the same image, counted on the overlap of their bounding boxes.
+        """
+        x0, y0 = max(self.offset[0], other.offset[0]), max(self.offset[1], other.offset[1])
+        x1 = min(self.offset[0] + self.width, other.offset[0] + other.width)
+        y1 = min(self.offset[1] + self.height, other.offset[1] + other.height)
+        if x0 >= x1 or y0 >= y1:
+            return np.int64(0)
+        return np.sum(_POPCOUNT[self.window(x0, y0, x1, y1) & other.window(x0, y0, x1, y1)], dtype=np.int64)
+
+
+def _fix(value):
+    # 16.16 fixed point, as in PIL's affine transform
+    return math.floor(value * 65536.0 + 0.5)
+
+def _fits_fixed_point(matrix, x, y):
+    a, b, c, d, e, f = matrix
+    return abs(a * x + b * y + c) < 32768.0 and abs(d * x + e * y + f) < 32768.0
+
+def warp_mask(bitmask, matrix, size):
+    """
+    Warps a BitMask with an affine matrix (mapping destination pixels to source pixels, see rotation_matrix) using
+    nearest neighbour sampling. Only the destination pixels around the warped mask are computed, instead of warping a
+    whole RGBA canvas. The sampling follows PIL's affine transform (16.16 fixed point arithmetics, unless the image is too
+    large for it), so the warped mask is the same as the alpha channel of the image warped by PIL.
+
+    ::param bitmask: the BitMask in the source image
+    ::param matrix: the affine matrix (a, b, c, d, e, f)
+    ::param size: the (width, height) of the destination image, the warped mask is clipped to it
+    ::return: the BitMask in the destination image
+    """
+    if bitmask.is_empty():
+        return BitMask.empty()
+
+    offset = bitmask.offset
+    mask = bitmask.to_array()
+    a, b, c, d, e, f = matrix
+    width, height = size
+    mask_height, mask_width = mask.shape
+
+    # The bounding box of the warped mask, from the inverse mapping of the corners of the cropped mask
+    determinant = a * e - b * d
+    xs = []
+    ys = []
+    for x, y in ((0, 0), (mask_width, 0), (mask_width, mask_height), (0, mask_height)):
+        x, y = offset[0] + x - c, offset[1] + y - f
+        xs.append((e * x - b * y) / determinant)
+        ys.append((a * y - d * x) / determinant)
+    x0, x1 = max(0, math.floor(min(xs)) - 2), min(width, math.ceil(max(xs)) + 2)
+    y0, y1 = max(0, math.floor(min(ys)) - 2), min(height, math.ceil(max(ys)) + 2)
+    if x0 >= x1 or y0 >= y1:
+        return BitMask.empty()
+
+    xx = np.arange(x0, x1, dtype=np.int64)[None, :]
+    yy = np.arange(y0, y1, dtype=np.int64)[:, None]
+    if b == 0 and d == 0:
+        source_x = np.floor(c + a * (xx + 0.5)).astype(np.int64)
+        source_y = np.floor(f + e * (yy + 0.5)).astype(np.int64)
+    elif _fits_fixed_point(matrix, 0, 0) and _fits_fixed_point(matrix, width, height):
+        source_x = (_fix(c + a * 0.5 + b * 0.5) + yy * _fix(b) + xx * _fix(a)) >> 16
+        source_y = (_fix(f + d * 0.5 + e * 0.5) + yy * _fix(e) + xx * _fix(d)) >> 16
+    else:
+        source_x = np.floor(c + b * (yy + 0.5) + a * (xx + 0.5)).astype(np.int64)
+        source_y = np.floor(f + e * (yy + 0.5) + d * (xx + 0.5)).astype(np.int64)
+
+    source_x, source_y = np.broadcast_arrays(source_x - offset[0], source_y - offset[1])
+    inside = (source_x >= 0) & (source_x < mask_width) & (source_y >= 0) & (source_y < mask_height)
+    warped = np.zeros(inside.shape, dtype=bool)
+    warped[inside] = mask[source_y[inside], source_x[inside]]
+
+    return BitMask.from_array(warped, offset=(x0, y0))
+
+
+def rotate_mask(bitmask, size, rot, center=None):
+    """
+    Rotates a BitMask like PIL.Image.rotate(rot, expand=False, center=center) rotates the image it belongs to.
+
+    ::param bitmask: the BitMask in the image
+    ::param size: the (width, height) of the image
+    ::param rot: the rotation in degrees
+    ::param center: the (x, y) center of the rotation, the center of the image by default
+    """
+    if center is None and rot % 360.0 == 0:
+        return bitmask
+    return warp_mask(bitmask, rotation_matrix(size, rot, center), size)
+
+
+def place_mask(bitmask, x, y, size, additional_x=0, additional_y=0):
+    """
+    Places the BitMask of a (rotated) piece on the shared canvas, where apply_transformations_on_piece pastes the piece.
+
+    ::param bitmask: the BitMask in the piece image
+    ::param x, y: the translation of the piece
+    ::param size: the (width, height) of the shared canvas, the placed mask is clipped to it
+    ::param additional_x, additional_y: the additional translation of the piece
+    """
+    paste_x = max(0, x)
+    if additional_x != 0:
+        paste_x = max(0, paste_x + additional_x)
+    paste_y = max(0, y)
+    if additional_y != 0:
+        paste_y = max(0, paste_y + additional_y)
+    return bitmask.translate(paste_x, paste_y).clip(size)
+
+
+class GroundTruthArtifacts():
+    """
+    Everything the evaluation needs from the pieces and the ground truth of one object, independently of the evaluated
+    result: the area, size and BitMask of every piece, the largest piece, the size of the canvas needed by the
+    ground truth placement, and the BitMask of every piece rotated by its ground truth rotation. Computing these decodes
+    every piece image, so they are cached on disk (see load_gt_artifacts) and shared by all the evaluated results.
+    """
+
+    def __init__(self, piece_names, areas, piece_sizes, piece_masks, largest_piece, gt_canvas_size, gt_masks):
+        self.piece_names = list(piece_names)
+        self.areas = areas
+        self.piece_sizes = piece_sizes
+        self.piece_masks = piece_masks
+        self.largest_piece = largest_piece
+        self.gt_canvas_size = gt_canvas_size
+        self.gt_masks = gt_masks
+
+    @property
+    def largest_piece_size(self):
+        return self.piece_sizes[self.largest_piece]
+
+
+def compute_gt_artifacts(pieces_dir, gt_transformations_dir):
+    """
+    Computes the GroundTruthArtifacts of an object, decoding every piece image once.
+
+    ::param pieces_dir: the directory containing the pieces
+    ::param gt_transformations_dir: the csv file containing the ground truth transformations (or its TransformationTable)
+    """
+    gt_transformations = load_transformation_table(gt_transformations_dir)
+
+    piece_names = []
+    areas = {}
+    piece_sizes = {}
+    piece_masks = {}
+    gt_masks = {}
+    largest_piece = None
+    max_area = 0
+    for filename in os.listdir(pieces_dir):
+        if filename.endswith(".png"):
+            piece = Image.open(os.path.join(pieces_dir, filename))
+            piece_masks[filename] = BitMask.from_array(np.array(piece)[:, :, 3])
+            area = piece_masks[filename].area()
+            piece_names.append(filename)
+            areas[filename] = area
+            piece_sizes[filename] = piece.size
+            # the same selection as find_largest_fragment
+            if area > max_area:
+                max_area = area
+                largest_piece = filename
+            if filename in gt_transformations:
+                gt_rot = int(gt_transformations[filename]['rot'])
+                gt_masks[filename] = rotate_mask(piece_masks[filename], piece.size, gt_rot)
+
+    # the part of the shared canvas needed to place the ground truth pieces (see calculate_shared_canvas_size)
+    gt_canvas_width = gt_canvas_height = 0
+    for piece_filename, row in gt_transformations.rows():
+        if piece_filename not in piece_sizes:
+            raise FileNotFoundError(f"The piece {piece_filename} of the ground truth is not in {pieces_dir}")
+        rotated_width, rotated_height = rotated_size(piece_sizes[piece_filename], row['rot'])
+        gt_canvas_width = max(gt_canvas_width, rotated_width + abs(int(row['x'])))
+        gt_canvas_height = max(gt_canvas_height, rotated_height + abs(int(row['y'])))
+
+    return GroundTruthArtifacts(piece_names, areas, piece_sizes, piece_masks, largest_piece, (gt_canvas_width, gt_canvas_height), gt_masks)
+
+
+def gt_cache_path(cache_dir, pieces_dir, gt_transformations_dir, dataset_version=REPAIR_DATASET_VERSION):
+    """
+    Returns the path of the cached GroundTruthArtifacts of an object. The file name holds a hash of the dataset version
+    and of the content of the ground truth csv file, so a changed ground truth is never read from a stale cache.
+    """
+    key = hashlib.sha1(f"{GT_CACHE_FORMAT_VERSION}:{dataset_version}:".encode('utf-8'))
+    with open(gt_transformations_dir, 'rb') as f:
+        key.update(f.read())
+    object_name = os.path.basename(os.path.normpath(pieces_dir))
+    return os.path.join(cache_dir, f"{object_name}_{key.hexdigest()[:16]}.npz")
+
+
+def _masks_to_arrays(masks, names):
+    # the packed bytes of all the masks are concatenated, the shape of every mask gives back its bytes
+    offsets = np.array([masks[name].offset for name in names], dtype=np.int64).reshape(-1, 2)
+    shapes = np.array([masks[name].shape for name in names], dtype=np.int64).reshape(-1, 2)
+    data = np.concatenate([masks[name].bits.ravel() for name in names]) if len(names) > 0 else np.zeros(0, dtype=np.uint8)
+    return offsets, shapes, data
 
-        # Paste the rotated image onto the new canvas
-        new_piece.paste(rotated_piece, (paste_x, paste_y))
+
+def _arrays_to_masks(names, offsets, shapes, data):
+    masks = {}
+    start = 0
+    for name, offset, shape in zip(names, offsets, shapes):
+        packed_shape = (int(shape[0]), (int(shape[1]) + 7) // 8)
+        end = start + packed_shape[0] * packed_shape[1]
+        masks[name] = BitMask(offset, shape, data[start:end].reshape(packed_shape))
+        start = end
+    return masks
+
+
+def save_gt_artifacts(artifacts, path):
+    """
+    Saves GroundTruthArtifacts to a compressed npz file. The file is written under a temporary name and then renamed,
+    so parallel evaluation workers never read a partially written cache.
+    """
+    gt_names = [name for name in artifacts.piece_names if name in artifacts.gt_masks]
+    piece_offsets, piece_shapes, piece_data = _masks_to_arrays(artifacts.piece_masks, artifacts.piece_names)
+    gt_offsets, gt_shapes, gt_data = _masks_to_arrays(artifacts.gt_masks, gt_names)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path,
+                        piece_names=np.array(artifacts.piece_names, dtype=str),
+                        areas=np.array([artifacts.areas[name] for name in artifacts.piece_names], dtype=np.int64),
+                        piece_sizes=np.array([artifacts.piece_sizes[name] for name in artifacts.piece_names], dtype=np.int64).reshape(-1, 2),
+                        piece_offsets=piece_offsets, piece_shapes=piece_shapes, piece_data=piece_data,
+                        largest_piece=np.array("" if artifacts.largest_piece is None else artifacts.largest_piece),
+                        gt_canvas_size=np.array(artifacts.gt_canvas_size, dtype=np.int64),
+                        gt_names=np.array(gt_names, dtype=str),
+                        gt_offsets=gt_offsets, gt_shapes=gt_shapes, gt_data=gt_data)
+    os.replace(tmp_path, path)
+
+
+def read_gt_artifacts(path):
+    """
+    Reads GroundTruthArtifacts saved by save_gt_artifacts.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        piece_names = data['piece_names'].tolist()
+        gt_names = data['gt_names'].tolist()
+        largest_piece = str(data['largest_piece']) or None
+        return GroundTruthArtifacts(
+            piece_names,
+            {name: area for name, area in zip(piece_names, data['areas'])},
+            {name: (int(size[0]), int(size[1])) for name, size in zip(piece_names, data['piece_sizes'])},
+            _arrays_to_masks(piece_names, data['piece_offsets'], data['piece_shapes'], data['piece_data']),
+            largest_piece,
+            tuple(int(value) for value in data['gt_canvas_size']),
+            _arrays_to_masks(gt_names, data['gt_offsets'], data['gt_shapes'], data['gt_data']))
+
+
+def load_gt_artifacts(pieces_dir, gt_transformations_dir, cache_dir=None, dataset_version=REPAIR_DATASET_VERSION):
+    """
+    Returns the GroundTruthArtifacts of an object, from the cache when they were already computed.
+
+    ::param pieces_dir: the directory containing the pieces
+    ::param gt_transformations_dir: the csv file containing the ground truth transformations
+    ::param cache_dir: the directory of the cache, None to always compute the artifacts
+    ::param dataset_version: the version of the dataset, part of the cache key
+    """
+    if cache_dir is None:
+        return compute_gt_artifacts(pieces_dir, gt_transformations_dir)
+
+    path = gt_cache_path(cache_dir, pieces_dir, gt_transformations_dir, dataset_version)
+    if os.path.exists(path):
+        return read_gt_artifacts(path)
+
+    artifacts = compute_gt_artifacts(pieces_dir, gt_transformations_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    save_gt_artifacts(artifacts, path)
+    return artifacts
+
+
+def calculate_shared_canvas_size(pieces_dir, transformations_dir, gt_transformations_dir, gt_artifacts=None):
+    """ 
+    Calculate the dimensions of the shared canvas that will be used to place all the pieces, after applying the transformations on them.
+    The ground truth part of the canvas comes from the GroundTruthArtifacts, so only the result transformations are applied here.
+    """
+    if gt_artifacts is None:
+        gt_artifacts = compute_gt_artifacts(pieces_dir, gt_transformations_dir)
+
+    # Read transformations
+    transformations = load_transformation_table(transformations_dir)
+
+    # Initialize the shared canvas size with the dimensions of the largest piece and of the placed ground truth pieces
+    shared_canvas_width = max(gt_artifacts.largest_piece_size[0], gt_artifacts.gt_canvas_size[0])
+    shared_canvas_height = max(gt_artifacts.largest_piece_size[1], gt_artifacts.gt_canvas_size[1])
+
+    # Apply the transformations on the pieces to find the shared canvas size
+    for piece_filename, row in transformations.rows():
+        x = int(row['x'])
+        y = int(row['y'])
+
+        # The rotated piece (expanded) is pasted on a new canvas of its size plus the translation
+        rotated_width, rotated_height = rotated_size(gt_artifacts.piece_sizes[piece_filename], row['rot'])
 
         # Update the shared canvas size
-        shared_canvas_width = max(shared_canvas_width, new_piece.width)
-        shared_canvas_height = max(shared_canvas_height, new_piece.height)
+        shared_canvas_width = max(shared_canvas_width, rotated_width + abs(x))
+        shared_canvas_height = max(shared_canvas_height, rotated_height + abs(y))
 
     return shared_canvas_width, shared_canvas_height
 
 def get_transformation_for_largest_piece(pieces_dir, results_csv_path, gt_csv_path, largest_piece=None):
-    # Load the CSV files
-    results_df = pd.read_csv(results_csv_path)
-    gt_df = pd.read_csv(gt_csv_path)
+    # Load the CSV files (or use the already loaded tables)
+    results_table = load_transformation_table(results_csv_path)
+    gt_table = load_transformation_table(gt_csv_path)
     
     if largest_piece is None:
         # Find the largest piece using the existing function
         largest_piece = find_largest_fragment(pieces_dir)
     
+    if largest_piece not in gt_table or largest_piece not in results_table:
+        raise ValueError(f"The largest piece {largest_piece} is missing in the result or in the ground truth transformations")
+
     # Get the ground truth transformation for the largest piece
-    gt_largest_piece = gt_df[gt_df['rpf'] == largest_piece].iloc[0]
-    results_largest_piece = results_df[results_df['rpf'] == largest_piece].iloc[0]
+    gt_largest_piece = gt_table[largest_piece]
+    results_largest_piece = results_table[largest_piece]
     
     # Calculate the transformation difference for the largest piece
     dx = gt_largest_piece['x'] - results_largest_piece['x']
@@ -226,40 +715,33 @@ def apply_transformations_on_piece(piece_img, x, y, rot, additional_x=0, additio
         return new_piece
 
 
+def as_bitmask(piece):
+    """
+    Returns the BitMask of a piece given either as a BitMask or as an RGBA image.
+    """
+    if isinstance(piece, BitMask):
+        return piece
+    return BitMask.from_image(piece)
+
 def calculate_area(piece):
-    piece_array = np.array(piece)
-    alpha_channel = piece_array[:, :, 3]
-    area = np.sum(alpha_channel > 0)
-    return area
-
-def pad_and_fit_images(image1, image2):
-    width1, height1 = image1.size
-    width2, height2 = image2.size
-    new_width = max(width1, width2)
-    new_height = max(height1, height2)
-    new_image1 = Image.new('RGBA', (new_width, new_height), (0, 0, 0, 0))
-    new_image2 = Image.new('RGBA', (new_width, new_height), (0, 0, 0, 0))
-    new_image1.paste(image1, (0, 0))
-    new_image2.paste(image2, (0, 0))
-    return new_image1, new_image2
+    return as_bitmask(piece).area()
 
 def calculate_shared_area(piece1, piece2):
-    piece1, piece2 = pad_and_fit_images(piece1, piece2)
-    piece1 = np.array(piece1)[:, :, 3]
-    piece2 = np.array(piece2)[:, :, 3]
-    intersection = np.logical_and(piece1 > 0, piece2 > 0)
-    shared_area = np.sum(intersection)
-    return shared_area
-
-def calculate_pieces_weights(pieces_dir, exclude_largest_piece=False, largest_piece=None):
+    # images are aligned on their top left corner, masks by their offsets
+    return as_bitmask(piece1).intersection_area(as_bitmask(piece2))
+
+def calculate_pieces_weights(pieces_dir, exclude_largest_piece=False, largest_piece=None, gt_artifacts=None):
     pieces_weights = {}
     pieces_areas = {}
-    for filename in os.listdir(pieces_dir):
-        if filename.endswith(".png"):
-            piece_path = os.path.join(pieces_dir, filename)
-            piece = Image.open(piece_path)
-            area = calculate_area(piece)
-            pieces_areas[filename] = area
+    if gt_artifacts is not None:
+        pieces_areas = {filename: gt_artifacts.areas[filename] for filename in gt_artifacts.piece_names}
+    else:
+        for filename in os.listdir(pieces_dir):
+            if filename.endswith(".png"):
+                piece_path = os.path.join(pieces_dir, filename)
+                piece = Image.open(piece_path)
+                area = calculate_area(piece)
+                pieces_areas[filename] = area
     if exclude_largest_piece and largest_piece is not None:
         del pieces_areas[largest_piece]
     areas_sum = sum(pieces_areas.values())
@@ -268,25 +750,30 @@ def calculate_pieces_weights(pieces_dir, exclude_largest_piece=False, largest_pi
     return pieces_weights
 
 
-def calculate_position_score(pieces_dir, transformations_dir, gt_transformations_dir, log=False, debug=False):
+def calculate_position_score(pieces_dir, transformations_dir, gt_transformations_dir, log=False, debug=False, gt_artifacts=None):
     """
     Calculates the score of the placement of the pieces on the shared canvas.
 
     ::param pieces_dir: the directory containing the pieces
-    ::param transformations_dir: the csv file containing the result transformations
-    ::param gt_transformations_dir: the csv file containing the ground truth transformations
+    ::param transformations_dir: the csv file containing the result transformations (or its TransformationTable)
+    ::param gt_transformations_dir: the csv file containing the ground truth transformations (or its TransformationTable)
     ::param log: whether to print the intermediate results or not
+    ::param gt_artifacts: the GroundTruthArtifacts of the object (see load_gt_artifacts), computed when not given
     """
 
-    transformations = read_transformations(transformations_dir, make_non_negative=True)
-    gt_transformations = read_transformations(gt_transformations_dir)
+    raw_transformations = load_transformation_table(transformations_dir)
+    gt_transformations = load_transformation_table(gt_transformations_dir)
+    validate_transformations(raw_transformations, gt_transformations)
+    transformations = raw_transformations.non_negative()
+    if gt_artifacts is None:
+        gt_artifacts = compute_gt_artifacts(pieces_dir, gt_transformations)
 
     # Initialize the shared canvas with the largest piece
 
-    shared_canvas_width, shared_canvas_height = calculate_shared_canvas_size(pieces_dir, transformations_dir, gt_transformations_dir)
+    shared_canvas_width, shared_canvas_height = calculate_shared_canvas_size(pieces_dir, raw_transformations, gt_transformations, gt_artifacts=gt_artifacts)
     
 
-    additional_transformation = get_transformation_for_largest_piece(pieces_dir, transformations_dir, gt_transformations_dir)
+    additional_transformation = get_transformation_for_largest_piece(pieces_dir, raw_transformations, gt_transformations, largest_piece=gt_artifacts.largest_piece)
 
     additional_x = additional_x_for_gt = additional_y = additional_y_for_gt = 0
     if additional_transformation['x'] < 0:
@@ -300,50 +787,40 @@ def calculate_position_score(pieces_dir, transformations_dir, gt_transformations
     
     additional_rot = additional_transformation['rot']
 
-    pieces_weights = calculate_pieces_weights(pieces_dir, exclude_largest_piece=True, largest_piece=additional_transformation['largest_piece_name'])
+    pieces_weights = calculate_pieces_weights(pieces_dir, exclude_largest_piece=True, largest_piece=additional_transformation['largest_piece_name'], gt_artifacts=gt_artifacts)
 
     q_pos = 0
 
+    canvas_size = (shared_canvas_width, shared_canvas_height)
     image_canvases = {}
     gt_image_canvases = {}
 
-    # Apply the transformations on all the pieces then place them on the shared canvas
-    for index, row in transformations.iterrows():
-        piece_filename = row['rpf']
+    # Apply the transformations on all the pieces then place them on the shared canvas. Only the alpha channel of the
+    # pieces is used, so every piece is kept as its BitMask on the canvas
+    for piece_filename, row in transformations.rows():
         x = int(row['x'])
         y = int(row['y'])
         rot = row['rot']
-        gt_x = int(gt_transformations[gt_transformations['rpf'] == piece_filename].iloc[0]['x'])
-        gt_y = int(gt_transformations[gt_transformations['rpf'] == piece_filename].iloc[0]['y'])
-        gt_rot = int(gt_transformations[gt_transformations['rpf'] == piece_filename].iloc[0]['rot'])
-
-        piece_path = os.path.join(pieces_dir, piece_filename)
-        piece_img = Image.open(piece_path)
-
-        new_piece = apply_transformations_on_piece(piece_img, x, y, rot, additional_x, additional_y)
-        new_canvas = Image.new('RGBA', (shared_canvas_width, shared_canvas_height), (0, 0, 0, 0))
-        new_canvas.alpha_composite(new_piece)
-        image_canvases[piece_filename] = new_canvas
-
-        gt_new_piece = apply_transformations_on_piece(piece_img, gt_x, gt_y, gt_rot, additional_x_for_gt, additional_y_for_gt)
-        new_gt_canvas = Image.new('RGBA', (shared_canvas_width, shared_canvas_height), (0, 0, 0, 0))
-        new_gt_canvas.alpha_composite(gt_new_piece)
-        gt_image_canvases[piece_filename] = new_gt_canvas
+        gt_row = gt_transformations[piece_filename]
+        gt_x = int(gt_row['x'])
+        gt_y = int(gt_row['y'])
+
+        rotated_mask = rotate_mask(gt_artifacts.piece_masks[piece_filename], gt_artifacts.piece_sizes[piece_filename], rot)
+        image_canvases[piece_filename] = place_mask(rotated_mask, x, y, canvas_size, additional_x, additional_y)
+
+        # the ground truth mask is already rotated by the ground truth rotation
+        gt_image_canvases[piece_filename] = place_mask(gt_artifacts.gt_masks[piece_filename], gt_x, gt_y, canvas_size, additional_x_for_gt, additional_y_for_gt)
     
+    # Rotate all the pieces around the center of the bounding box of the largest piece, with one precomputed matrix
     rotated_image_canvases = {}
-    largest_piece = image_canvases[f'{additional_transformation["largest_piece_name"]}']
-    non_alpha_bbox = Image.fromarray(np.array(largest_piece)[:, :, 3]).getbbox()
-    center_x = (non_alpha_bbox[2] + non_alpha_bbox[0]) / 2
-    center_y = (non_alpha_bbox[3] + non_alpha_bbox[1]) / 2
-    rotated_largest_piece = largest_piece.rotate(additional_rot, expand=False, center=(center_x, center_y))
-    rotated_image_canvases[f'{additional_transformation["largest_piece_name"]}'] = rotated_largest_piece
+    largest_piece_mask = image_canvases[f'{additional_transformation["largest_piece_name"]}']
+    if largest_piece_mask.is_empty():
+        raise ValueError(f"The largest piece {additional_transformation['largest_piece_name']} is outside of the shared canvas")
+    center_x = (2 * largest_piece_mask.offset[0] + largest_piece_mask.width) / 2
+    center_y = (2 * largest_piece_mask.offset[1] + largest_piece_mask.height) / 2
+    additional_rotation_matrix = rotation_matrix(canvas_size, additional_rot, center=(center_x, center_y))
     for piece_filename in image_canvases:
-        if piece_filename == f'{additional_transformation["largest_piece_name"]}':
-            continue
-        else:
-            piece = image_canvases[piece_filename]
-            rotated_piece = piece.rotate(additional_rot, expand=False, center=(center_x, center_y))
-            rotated_image_canvases[piece_filename] = rotated_piece
+        rotated_image_canvases[piece_filename] = warp_mask(image_canvases[piece_filename], additional_rotation_matrix, canvas_size)
 
     # Calculate the Q_pos score
     for piece_filename in image_canvases:
@@ -365,30 +842,86 @@ def calculate_position_score(pieces_dir, transformations_dir, gt_transformations
     if log:
         print(f"Q_pos score: {q_pos}")    
     
+    if debug:
+        # draw the masks back on RGBA canvases (as their alpha channel)
+        for canvases in (rotated_image_canvases, gt_image_canvases):
+            for piece_filename, bitmask in canvases.items():
+                canvas = Image.new('RGBA', canvas_size, (0, 0, 0, 0))
+                canvas.putalpha(bitmask.to_image(canvas_size))
+                canvases[piece_filename] = canvas
+
     return q_pos if not debug else (q_pos, rotated_image_canvases, gt_image_canvases)
 
 
-def calculate_rmse_with_anchor(pieces_dir, results_csv, ground_truth_csv, pxls_to_m_scaler=(1/7.369)): 
-    # Load the CSV files into pandas DataFrames
-    results_df = pd.read_csv(results_csv)
-    ground_truth_df = pd.read_csv(ground_truth_csv)
-    
-    # Merge the DataFrames on the 'rpf' column to align the results with the ground truth
-    merged_df = pd.merge(results_df, ground_truth_df, on='rpf', suffixes=('_result', '_gt'))
+def stack_transformations(transformations_list, rpfs=None):
+    """
+    Stacks the transformations of many results of the same object into one array, to score them with calculate_rmse_batch.
+
+    ::param transformations_list: the csv files (or TransformationTables) of the results
+    ::param rpfs: the order of the pieces in the stacked array, the pieces of the first result when not given
+    ::return: the stacked array of shape (n_results, n_pieces, 3) holding the x, y and rot of every piece, and the list of rpfs
+    """
+    tables = [load_transformation_table(transformations) for transformations in transformations_list]
+    if rpfs is None:
+        rpfs = tables[0].rpfs if len(tables) > 0 else []
+    rpfs = list(rpfs)
+
+    results = np.zeros((len(tables), len(rpfs), 3))
+    for i, table in enumerate(tables):
+        missing_pieces = [rpf for rpf in rpfs if rpf not in table]
+        if len(missing_pieces) > 0:
+            raise ValueError(f"Result {i} is missing {len(missing_pieces)} pieces: {missing_pieces}")
+        records = table.records[[table.index[rpf] for rpf in rpfs]]
+        results[i] = np.stack([records['x'], records['y'], records['rot']], axis=-1)
+
+    return results, rpfs
 
-    # Get the transformation for the largest piece
-    additional_transformation = get_transformation_for_largest_piece(pieces_dir, results_csv, ground_truth_csv)
-    # remove the "largest_piece" from merged_df
-    merged_df = merged_df[merged_df['rpf'] != additional_transformation['largest_piece_name']]
-    merged_df['x_result'] = merged_df['x_result'] + additional_transformation['x']
-    merged_df['y_result'] = merged_df['y_result'] + additional_transformation['y']
-    merged_df['rot_result'] = (merged_df['rot_result'] + additional_transformation['rot']) % 360
 
+def calculate_rmse_batch(pieces_dir, results, rpfs, ground_truth_csv, pxls_to_m_scaler=(1/7.369), largest_piece=None, gt_artifacts=None):
+    """
+    Calculates the RMSE scores of many results of the same object in one vectorized pass (e.g. all the individuals of a
+    solver population, or the outputs of many solvers stacked with stack_transformations). Every result is anchored on
+    the ground truth by its largest piece, as in calculate_rmse_with_anchor.
 
-    rmse_translation = np.average(np.sqrt((merged_df['x_result'] - merged_df['x_gt'])**2 + 
-                                            (merged_df['y_result'] - merged_df['y_gt'])**2) * pxls_to_m_scaler) * 1/np.sqrt(2)
+    ::param pieces_dir: the directory containing the pieces
+    ::param results: array of shape (n_results, n_pieces, 3) holding the x, y and rot of every piece in every result
+    ::param rpfs: the filenames of the pieces, in the order of the second axis of results
+    ::param ground_truth_csv: the csv file containing the ground truth transformations (or its TransformationTable)
+    ::param pxls_to_m_scaler: the scale from pixels to the unit of the translation error
+    ::param largest_piece: the filename of the largest piece, taken from gt_artifacts or found in pieces_dir when not given
+    ::param gt_artifacts: the GroundTruthArtifacts of the object (see load_gt_artifacts)
+    ::return: a dictionary with the arrays of shape (n_results,) of the 'RMSE_rot' and the 'RMSE_translation' of every result
+    """
+    results = np.asarray(results, dtype=np.float64)
+    rpfs = list(rpfs)
+    if results.ndim != 3 or results.shape[1:] != (len(rpfs), 3):
+        raise ValueError(f"Expected results of shape (n_results, {len(rpfs)}, 3), got {results.shape}")
 
-    rmse_rot = 1/np.sqrt(2) * np.average(np.sqrt((merged_df['rot_result'] % 360 - merged_df['rot_gt'] % 360)**2))
+    ground_truth_table = load_transformation_table(ground_truth_csv)
+    if largest_piece is None:
+        largest_piece = gt_artifacts.largest_piece if gt_artifacts is not None else find_largest_fragment(pieces_dir)
+    if largest_piece not in ground_truth_table or largest_piece not in rpfs:
+        raise ValueError(f"The largest piece {largest_piece} is missing in the result or in the ground truth transformations")
+
+    # The transformation anchoring the largest piece of every result on the ground truth (see get_transformation_for_largest_piece)
+    largest_index = rpfs.index(largest_piece)
+    gt_largest_piece = ground_truth_table[largest_piece]
+    dx = np.trunc(gt_largest_piece['x'] - results[:, largest_index, 0])
+    dy = np.trunc(gt_largest_piece['y'] - results[:, largest_index, 1])
+    drot = (gt_largest_piece['rot'] - results[:, largest_index, 2] + 360) % 360
+
+    # Align the results with the ground truth by the piece filename, without the "largest_piece"
+    aligned_indices = [i for i, rpf in enumerate(rpfs) if rpf in ground_truth_table and rpf != largest_piece]
+    gt = ground_truth_table.records[[ground_truth_table.index[rpfs[i]] for i in aligned_indices]]
+    aligned = results[:, aligned_indices]
+    x_result = aligned[:, :, 0] + dx[:, None]
+    y_result = aligned[:, :, 1] + dy[:, None]
+    rot_result = (aligned[:, :, 2] + drot[:, None]) % 360
+
+    rmse_translation = np.average(np.sqrt((x_result - gt['x'])**2 + 
+                                            (y_result - gt['y'])**2) * pxls_to_m_scaler, axis=1) * 1/np.sqrt(2)
+
+    rmse_rot = 1/np.sqrt(2) * np.average(np.sqrt((rot_result % 360 - gt['rot'] % 360)**2), axis=1)
 
     rmse_values = {
         'RMSE_rot': rmse_rot % 360,
@@ -398,6 +931,101 @@ def calculate_rmse_with_anchor(pieces_dir, results_csv, ground_truth_csv, pxls_t
     return rmse_values
 
 
+def calculate_rmse_with_anchor(pieces_dir, results_csv, ground_truth_csv, pxls_to_m_scaler=(1/7.369), gt_artifacts=None): 
+    # Load the CSV file (or use the already loaded table) and score it as a batch of one result
+    results_table = load_transformation_table(results_csv)
+    results = np.stack([results_table.records['x'], results_table.records['y'], results_table.records['rot']], axis=-1)
+
+    rmse_values = calculate_rmse_batch(pieces_dir, results[None], results_table.rpfs, ground_truth_csv, pxls_to_m_scaler, gt_artifacts=gt_artifacts)
+
+    return {key: values[0] for key, values in rmse_values.items()}
+
+
+def evaluate_object(obj, pieces_base_dir, results_dir, ground_truth_dir, gt_cache_dir=None, dataset_version=REPAIR_DATASET_VERSION):
+    """
+    Calculates all the scores of a single object. Runs in a worker process when evaluating with several workers,
+    so errors are caught and returned (together with the elapsed time) instead of being raised.
+
+    ::param obj: the name of the object (the name of its pieces directory and of its csv files)
+    ::param pieces_base_dir: the directory containing a pieces directory per object
+    ::param results_dir: the directory containing the results csv files
+    ::param ground_truth_dir: the directory containing the ground truth csv files
+    ::param gt_cache_dir: the directory of the ground truth artifacts cache, None to disable the cache
+    ::param dataset_version: the version of the dataset, part of the cache key
+    """
+    pieces_dir = os.path.join(pieces_base_dir, obj)
+    results_csv = os.path.join(results_dir, f"{obj}.csv")
+    ground_truth_csv = os.path.join(ground_truth_dir, f"{obj}.csv")
+
+    start_time = time.perf_counter()
+    try:
+        # read both csv files once for all the scores
+        results_table = load_transformation_table(results_csv)
+        ground_truth_table = load_transformation_table(ground_truth_csv)
+        # the ground truth side of the evaluation, shared by all the evaluated results
+        gt_artifacts = load_gt_artifacts(pieces_dir, ground_truth_csv, gt_cache_dir, dataset_version)
+        # calculate Q_pos
+        q_pos = calculate_position_score(pieces_dir, results_table, ground_truth_table, gt_artifacts=gt_artifacts)
+        # calculate RMSE
+        rmse_values = calculate_rmse_with_anchor(pieces_dir, results_table, ground_truth_table, gt_artifacts=gt_artifacts)
+        scores = {'object_name': obj, 'Q_pos': q_pos, 'RMSE_rot': rmse_values['RMSE_rot'], 'RMSE_translation': rmse_values['RMSE_translation']}
+        error = None
+    except Exception as e:
+        scores = None
+        error = f"{type(e).__name__}: {e}"
+
+    return {'object_name': obj, 'scores': scores, 'error': error, 'seconds': time.perf_counter() - start_time}
+
+
+def evaluation_record(evaluation):
+    """
+    Flattens the evaluation of an object (see evaluate_object) into a record of the scores stream.
+    """
+    record = {'object_name': evaluation['object_name'],
+              'status': 'ok' if evaluation['error'] is None else 'failed',
+              'seconds': evaluation['seconds'],
+              'error': evaluation['error']}
+    if evaluation['scores'] is not None:
+        record.update({key: float(value) for key, value in evaluation['scores'].items() if key != 'object_name'})
+    return record
+
+
+def append_evaluation(stream_path, record):
+    """
+    Appends the record of an evaluated object (see evaluation_record) as a JSON line to the scores stream, and flushes it
+    to disk so the evaluated objects are kept if the run is killed.
+
+    ::param stream_path: the path of the scores stream (a JSON lines file)
+    ::param record: the record of the evaluated object
+    """
+    with open(stream_path, 'a') as stream:
+        stream.write(json.dumps(record) + '\n')
+        stream.flush()
+        os.fsync(stream.fileno())
+
+
+def read_evaluations(stream_path):
+    """
+    Reads the scores stream written by append_evaluation. When an object was evaluated more than once the last record wins,
+    and a truncated last line (the run was killed while writing it) is ignored.
+
+    ::param stream_path: the path of the scores stream (a JSON lines file)
+    ::return: a dictionary of the records by object name, empty if the stream does not exist
+    """
+    records = {}
+    if not os.path.exists(stream_path):
+        return records
+
+    with open(stream_path) as stream:
+        for line in stream:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record['object_name']] = record
+    return records
+
+
 if __name__ == "__main__":
     
     # parse args to get the input variables pieces_dir, results_dir, ground_truth_dir, scores_dir (optional)
@@ -406,8 +1034,15 @@ if __name__ == "__main__":
     parser.add_argument('--results_dir', type=str, required=True, help='Path to the directory containing the results csv files')
     parser.add_argument('--ground_truth_dir', type=str, required=True, help='Path to the directory containing the ground truth csv files')
     parser.add_argument('--scores_dir', type=str, required=False, help='Path to the directory to save the scores')
+    parser.add_argument('--workers', type=int, default=1, help='Number of objects to evaluate in parallel (each in its own process)')
+    parser.add_argument('--gt_cache_dir', type=str, required=False, help='Path to a directory to cache the ground truth side of the evaluation across runs')
+    parser.add_argument('--dataset_version', type=str, default=REPAIR_DATASET_VERSION, help='Version of the dataset (part of the ground truth cache key)')
+    parser.add_argument('--resume', action='store_true', help='Skip the objects already scored in the scores stream of scores_dir (e.g. after the run was killed)')
     args = parser.parse_args()
 
+    if args.resume and args.scores_dir is None:
+        parser.error('--resume requires --scores_dir')
+
     pieces_base_dir = args.pieces_dir
     results_dir = args.results_dir
     ground_truth_dir = args.ground_truth_dir
@@ -415,36 +1050,54 @@ if __name__ == "__main__":
 
     print(f"Calculating scores for the pieces in {pieces_base_dir} using the results in {results_dir} and the ground truth in {ground_truth_dir}")
 
+    stream_path = None
     if scores_dir is not None:
         if not os.path.exists(scores_dir):
             os.makedirs(scores_dir)
-    scores_df = pd.DataFrame(columns=['object_name', 'Q_pos', 'RMSE_rot', 'RMSE_translation'])
-
-        object_names = [os.path.splitext(filename)[0] for filename in os.listdir(ground_truth_dir)]
-
-    for obj in object_names:
-        pieces_dir = os.path.join(pieces_base_dir, obj)
-        results_csv = os.path.join(results_dir, f"{obj}.csv")
-        ground_truth_csv = os.path.join(ground_truth_dir, f"{obj}.csv")
-
-        try:
-            # calculate Q_pos
-            q_pos = calculate_position_score(pieces_dir, results_csv, ground_truth_csv)
-            # calculate RMSE
-            rmse_values = calculate_rmse_with_anchor(pieces_dir, results_csv, ground_truth_csv)
-            # save the scores in a dataframe
-            new_row = pd.DataFrame([{'object_name': obj, 'Q_pos': q_pos, 'RMSE_rot': rmse_values['RMSE_rot'], 'RMSE_translation': rmse_values['RMSE_translation']}])
-            scores_df = pd.concat([scores_df, new_row], ignore_index=True)
-        except Exception as e:
-            print(f"Error calculating scores for object {obj}: {e}")
-            
+        stream_path = os.path.join(scores_dir, 'scores.jsonl')
+        if not args.resume and os.path.exists(stream_path):
+            os.remove(stream_path)
+
+    object_names = [os.path.splitext(filename)[0] for filename in os.listdir(ground_truth_dir)]
+
+    # the objects scored by a previous run (the failed ones are evaluated again)
+    records = read_evaluations(stream_path) if args.resume else {}
+    pending_objects = [obj for obj in object_names if records.get(obj, {}).get('status') != 'ok']
+    if args.resume:
+        print(f"Resuming: {len(object_names) - len(pending_objects)} objects already scored, {len(pending_objects)} to evaluate")
+
+    def record_evaluation(evaluation):
+        record = evaluation_record(evaluation)
+        if record['status'] != 'ok':
+            print(f"Error calculating scores for object {record['object_name']}: {record['error']}")
+        if stream_path is not None:
+            append_evaluation(stream_path, record)
+        records[record['object_name']] = record
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(evaluate_object, obj, pieces_base_dir, results_dir, ground_truth_dir,
+                                       args.gt_cache_dir, args.dataset_version) for obj in pending_objects]
+            for future in as_completed(futures):
+                record_evaluation(future.result())
+    else:
+        for obj in pending_objects:
+            record_evaluation(evaluate_object(obj, pieces_base_dir, results_dir, ground_truth_dir, args.gt_cache_dir, args.dataset_version))
+
+    # keep the order of the ground truth directory regardless of the order the objects finished in
+    evaluated = [records[obj] for obj in object_names if obj in records]
+
+    scores_df = pd.DataFrame([record for record in evaluated if record['status'] == 'ok'], columns=['object_name', 'Q_pos', 'RMSE_rot', 'RMSE_translation'])
+    timings_df = pd.DataFrame(evaluated, columns=['object_name', 'seconds', 'status'])
+    errors_df = pd.DataFrame([record for record in evaluated if record['status'] != 'ok'], columns=['object_name', 'seconds', 'error'])
+
     # fill in blank values with 0
     scores_df.fillna(0, inplace=True)
 
     if scores_dir is not None:
-        if not os.path.exists(scores_dir):
-            os.makedirs(scores_dir)
         scores_df.to_csv(os.path.join(scores_dir, 'scores.csv'), index=False)
+        timings_df.to_csv(os.path.join(scores_dir, 'timings.csv'), index=False)
+        errors_df.to_csv(os.path.join(scores_dir, 'errors.csv'), index=False)
     
     avg_q_pos = scores_df['Q_pos'].mean()
     avg_rmse_rot = scores_df['RMSE_rot'].mean()
@@ -453,8 +1106,9 @@ if __name__ == "__main__":
     print(f"Average Q_pos: {avg_q_pos}")
     print(f"Average RMSE_rot: {avg_rmse_rot}")
     print(f"Average RMSE_translation: {avg_rmse_translation}")
+    print(f"Evaluated {len(scores_df)} objects in {timings_df['seconds'].sum():.1f} seconds of work, {len(errors_df)} failed")
 
     
 
 # Example usage:
-# python 2D_reconstruction_evaluation.py --pieces_dir RePAIR_objects/ --results_dir derech_results/ --ground_truth_dir test_set_gt/ --scores_dir scores/
+# python 2D_reconstruction_evaluation.py --pieces_dir RePAIR_objects/ --results_dir derech_results/ --ground_truth_dir test_set_gt/ --scores_dir scores/ --workers 8
\ No newline at end of file
@@ -46,7 +46,6 @@ def init_population(population_size, n_fragments):
     population[:, :, 2] = np.random.ranf((population_size, n_fragments)) * 360
     return population
 
-import matplotlib.pyplot as plt
 def get_solution_image(puzzle, solution, canvas_size=args.canvas_size, get_overlap=False):
     """
     Creates an image, depicting the given solution to the puzzle
@@ -0,0 +1,30 @@
+import sys
+
+sys.path.append("geometric_greedy_solver")
+
+import argparse
+from src import solver
+from src import batch
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dataset_root", required=True, help="Path to the folder of the objects folders (each containing the images of its pieces)")
+    parser.add_argument("--coordinates_path", required=True,
+                        help="Path to the folder containing piece coordinate CSV files")
+    parser.add_argument("--output_dir", required=True, help="Output folder of the results CSV of every object (<object>.csv)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of objects solved concurrently, each in its own process")
+    parser.add_argument("--overwrite", action="store_true", help="Solve again the objects whose results CSV already exists")
+    parser.add_argument("--manifest_path", default=None, help="Path of the JSON manifest of the run, default: <output_dir>/manifest.json")
+    parser.add_argument("--traces_dir", default=None, help="Folder of the Chrome traces of the objects (<object>.json), default: no traces")
+    parser.add_argument("--objects", nargs="+", default=None, help="Names of the objects to solve, default: all the objects folders")
+    solver.add_arguments(parser)
+
+    args = parser.parse_args()
+    solver.check_arguments(parser, args)
+
+    manifest = batch.run_batch(args.dataset_root, args.coordinates_path, args.output_dir, workers=args.workers,
+                               overwrite=args.overwrite, manifest_path=args.manifest_path, objects=args.objects,
+                               context_options=solver.context_options(args), solve_options=solver.solve_options(args),
+                               traces_dir=args.traces_dir)
+    print(f"finished: {manifest['summary']}")
@@ -1,5 +1,6 @@
 from src.piece import Piece
 from functools import reduce
+import math
 
 class AnchorConf():
 
@@ -19,3 +20,9 @@ class AnchorConf():
     
     def get_num_anchors(self):
         return len(self.anchor_points)
+
+    def segment_length(self):
+        '''
+            length of the contour segment spanned by the anchors (the polyline through the anchor points)
+        '''
+        return sum(math.dist(p1,p2) for p1,p2 in zip(self.anchor_points[:-1],self.anchor_points[1:]))
@@ -1,8 +1,19 @@
 from src.assembler import physical_assemler
 
-def overlapping(pair2response:dict):
+def overlapping(pair2response:dict,scorer=None,context=None):
+    '''
+        scorer - an OverlapScorer scoring all the responses in bulk,
+                 None scores every response from its final coordinates (physical_assemler.score_pairwise)
+        context - SolverContext of the pieces, scored by its overlap_scorer when no scorer is given
+    '''
+    if scorer is None and context is not None:
+        scorer = context.overlap_scorer
+
+    if scorer is not None:
+        return dict(zip(pair2response.keys(),scorer.score_many(list(pair2response.values()))))
+
     pair2overlapping = {}
     for pair, res in pair2response.items():
         pair2overlapping[pair] = physical_assemler.score_pairwise(res)
     
-    return pair2overlapping
\ No newline at end of file
+    return pair2overlapping
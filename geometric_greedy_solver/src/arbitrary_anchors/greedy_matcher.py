@@ -0,0 +1,87 @@
+import heapq
+import math
+from collections import defaultdict
+
+# overlapping scores from this value on (and non finite ones) are never selected
+MAX_OVERLAPPING = 999999999999
+
+
+def parent_piece_id(conf_repr:str):
+    '''
+        the piece id of an anchor configuration node name (format: "frag_PIECE_ID-...")
+    '''
+    return conf_repr.split("-")[0].replace("frag_", "")
+
+class GreedyPairMatcher():
+    '''
+        Greedy selection of the conf pairs by increasing overlapping.
+        Once a pair is selected, the other pairs of the same two pieces and the pairs sharing one of its confs are dropped.
+        The pairs are kept in a heap, dropped pairs are only marked and skipped when popped (lazy invalidation),
+        and indexed by their pieces and confs, so selecting a pair and dropping its conflicts costs O(log P) per pair.
+    '''
+
+    def __init__(self,pair2overlapping:dict,pair2pieces:dict=None):
+        '''
+            pair2overlapping - dict of the overlapping score of every conf pair (tuple of the two conf node names)
+            pair2pieces - dict of the two piece ids of every conf pair, parsed from the conf node names by default
+        '''
+        self.pair2pieces = {}
+        self.removed = set()
+        self.covered_pieces = set()
+        self.pieces2pairs = defaultdict(list)
+        self.conf2pairs = defaultdict(list)
+        self.heap = []
+        self.num_selections = 0 # greedy steps, one per selected pair
+        self.num_pops = 0 # pairs popped from the heap, the selected and the skipped ones
+
+        for i, (pair, overlapping) in enumerate(pair2overlapping.items()):
+            if pair2pieces is None:
+                pieces = (parent_piece_id(pair[0]), parent_piece_id(pair[1]))
+            else:
+                pieces = tuple(pair2pieces[pair])
+
+            self.pieces2pairs[frozenset(pieces)].append(pair)
+            self.conf2pairs[pair[0]].append(pair)
+            self.conf2pairs[pair[1]].append(pair)
+            self.pair2pieces[pair] = pieces
+
+            # the index keeps the order of pair2overlapping among equal scores
+            if math.isfinite(overlapping) and overlapping < MAX_OVERLAPPING:
+                self.heap.append((overlapping, i, pair))
+
+        heapq.heapify(self.heap)
+
+    def _remove_conflicting(self,pair):
+        conflicting = self.pieces2pairs[frozenset(self.pair2pieces[pair])] + self.conf2pairs[pair[0]] + self.conf2pairs[pair[1]]
+        self.removed.update(conflicting)
+
+    def pop_best(self):
+        '''
+            returns the remaining pair of minimal overlapping and its overlapping (None when no pair is left),
+            and drops the pairs conflicting with it
+        '''
+        while len(self.heap) > 0:
+            overlapping, _, pair = heapq.heappop(self.heap)
+            self.num_pops += 1
+            if pair in self.removed:
+                continue
+
+            self._remove_conflicting(pair)
+            self.covered_pieces.update(self.pair2pieces[pair])
+            self.num_selections += 1
+            return pair, overlapping
+
+        return None
+
+    def select(self,num_pieces=None):
+        '''
+            selects pairs until num_pieces pieces are covered (or no pair is left), returns them in the selection order
+        '''
+        best_pairs = []
+        while num_pieces is None or len(self.covered_pieces) != num_pieces:
+            best = self.pop_best()
+            if best is None:
+                break
+            best_pairs.append(best[0])
+
+        return best_pairs
@@ -1,12 +1,8 @@
 import networkx as nx
-import matplotlib.pyplot as plt
+import numpy as np
 from src.arbitrary_anchors.anchor_conf import AnchorConf
+from src.arbitrary_anchors import pair_filters
 
-graph_ =  nx.Graph()
-group2node_ = {}
-piece2node_ = {}
-
-pos_ = {}
 PAIRING_DELIMITER = "<=>"
 STRONG_SPRING_CONNECTION = 1
 WEAK_SPRING_CONNECTION = 0.5
@@ -15,106 +11,267 @@ LINK_TYPE_SAME_PIECE = "same_piece"
 LINK_TYPE_INTER_PIECE = "inter_piece"
 
 
-def initGraph(anchor_confs:list):
-    
-    for conf in anchor_confs:
-        assert isinstance(conf,AnchorConf)
+class LeanMatingGraph():
+    '''
+        Only the inter piece edges of the mating graph, as two arrays of conf indices (first < second),
+        generated piece pair by piece pair and sorted as the edges of the networkx graph.
+        There are no same piece edges and no layout, so it cannot be drawn.
+    '''
 
-    global graph_
-    global group2node_
-    global pos_
-    global piece2node_
+    def __init__(self,anchor_confs:list,min_length_ratio=None):
+        '''
+            min_length_ratio - keep only the pairs of confs whose pair_filters.length_ratio is at least it
+                               (None keeps all the pairs), the others are counted in num_dropped_by_length
+        '''
+        # confs of the same name are the same node, as in the networkx graph
+        self.name2index = {}
+        self.confs = []
+        for conf in anchor_confs:
+            name = repr(conf)
+            if name in self.name2index:
+                self.confs[self.name2index[name]] = conf
+            else:
+                self.name2index[name] = len(self.confs)
+                self.confs.append(conf)
+        self.names = list(self.name2index.keys())
 
-    graph_ = nx.Graph()
+        piece2indices = {}
+        for ii,conf in enumerate(self.confs):
+            piece2indices.setdefault(conf.parent_piece,[]).append(ii)
+        pieces_indices = [np.array(indices,dtype=np.int64) for indices in piece2indices.values()]
 
-    for conf in anchor_confs:
-        graph_.add_node(repr(conf),conf=conf)
+        if min_length_ratio is not None:
+            lengths = np.array([conf.segment_length() for conf in self.confs])
 
-    for ii,conf1 in enumerate(anchor_confs):
-        for conf2 in anchor_confs[ii+1:]:
-            
-            edge_type = LINK_TYPE_SAME_PIECE
-            pos_weight = STRONG_SPRING_CONNECTION
+        self.num_dropped_by_length = 0
+        firsts = [np.zeros(0,dtype=np.int64)]
+        seconds = [np.zeros(0,dtype=np.int64)]
+        for ii,indices1 in enumerate(pieces_indices):
+            for indices2 in pieces_indices[ii+1:]:
+                first = np.repeat(indices1,len(indices2))
+                second = np.tile(indices2,len(indices1))
 
-            if conf1.parent_piece != conf2.parent_piece:
-                edge_type = LINK_TYPE_INTER_PIECE
-                pos_weight = WEAK_SPRING_CONNECTION
+                if min_length_ratio is not None:
+                    is_compatible = pair_filters.length_ratios(lengths[first],lengths[second]) >= min_length_ratio
+                    self.num_dropped_by_length += len(first) - int(np.count_nonzero(is_compatible))
+                    first, second = first[is_compatible], second[is_compatible]
 
-            graph_.add_edge(repr(conf1),repr(conf2),edge_type=edge_type,pos_weight=pos_weight)
-    
-    pos_tmp = nx.shell_layout(graph_)  
-    pos_ = nx.kamada_kawai_layout(graph_,pos=pos_tmp,weight="pos_weight")
+                firsts.append(np.minimum(first,second))
+                seconds.append(np.maximum(first,second))
 
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        order = np.lexsort((second,first))
+        self.first = first[order]
+        self.second = second[order]
 
-# def get_node_name(anchor_point,piece):
-#     return f"{repr(piece)}--{anchor_point}"
+    def __len__(self):
+        return len(self.first)
 
-def get_inter_piece_edges(is_data=True):
-    global graph_
-
-    graph_links = graph_.edges(data=True)
-    
-    if is_data:
-        return [(u,v,data) for u,v,data in graph_links if data["edge_type"] == LINK_TYPE_INTER_PIECE]
-    else:
-        return [(u,v) for u,v,data in graph_links if data["edge_type"] == LINK_TYPE_INTER_PIECE]
-    
-def get_confs_pairing()->dict:
-    global graph_
+    def get_edges(self):
+        return [(self.names[u],self.names[v]) for u,v in zip(self.first.tolist(),self.second.tolist())]
 
-    graph_links = graph_.edges(data=True)
-    pairs = {}
+    def get_confs_pairing(self):
+        return {(self.names[u],self.names[v]):(self.confs[u],self.confs[v]) for u,v in zip(self.first.tolist(),self.second.tolist())}
 
-    for u,v,data in graph_links:
-        if data["edge_type"] == LINK_TYPE_INTER_PIECE:
-            data_u = graph_.nodes[u]
-            data_v = graph_.nodes[v]
-            pairs[(u,v)] = (data_u["conf"],data_v["conf"])
-    
-    return pairs
+    def get_conf(self,node):
+        return self.confs[self.name2index[node]]
 
+    def remove_edges(self,edges_to_remove:list):
+        to_remove = np.array([sorted((self.name2index[u],self.name2index[v])) for u,v in edges_to_remove],dtype=np.int64).reshape(-1,2)
+        keys = self.first * len(self.names) + self.second
+        keep = ~np.isin(keys,to_remove[:,0] * len(self.names) + to_remove[:,1])
+        self.first = self.first[keep]
+        self.second = self.second[keep]
 
-def get_node_data(node):
-    global graph_
 
-    return graph_.nodes[node]
+class MatingGraph():
+    '''
+        The graph of the anchor confs of one object, owned by its SolverContext
+    '''
 
-def draw( ax=None,**kwargs):
-    global graph_
-    global pos_
+    def __init__(self):
+        self.graph = nx.Graph()
+        self.lean_graph = None
+        self.pos = None # layout of graph, computed on the first draw (None until then or after edges removal)
 
-    if ax is None:
-        ax = plt.subplot()
+    def init(self,anchor_confs:list,lean=False,min_length_ratio=None):
+        '''
+            lean - keep only the inter piece candidate pairs in a LeanMatingGraph, instead of the networkx graph of all
+                   the conf pairs (with the same piece ones) and its layout
+            min_length_ratio - pre-filter of the candidate pairs of the lean graph by their segment lengths,
+                               as pair_filters.filter_pairs
+        '''
+        
+        for conf in anchor_confs:
+            assert isinstance(conf,AnchorConf)
 
-    
-    pos_spaced = pos_ #nx.kamada_kawai_layout(graph_,pos=pos_,weight="draw_weight")
-    
-    nx.draw_networkx_nodes(graph_, pos=pos_spaced, node_color="skyblue",ax=ax)
-    nx.draw_networkx_labels(graph_, pos=pos_spaced, font_size=8, font_color='black',ax=ax)
+        self.graph = nx.Graph()
+        self.pos = None
 
-    graph_links = graph_.edges(data=True)
+        if lean:
+            self.lean_graph = LeanMatingGraph(anchor_confs,min_length_ratio)
+            return
 
-    inter_piece_links = []
-    same_piece_links = []
+        assert min_length_ratio is None, "min_length_ratio filters only the lean graph, use pair_filters.filter_pairs"
+        self.lean_graph = None
 
-    for u,v,data in graph_links:
-        if data["edge_type"] == LINK_TYPE_SAME_PIECE:
-            same_piece_links.append((u,v,data))
-        elif data["edge_type"] == LINK_TYPE_INTER_PIECE:
-            inter_piece_links.append((u,v,data))
+        for conf in anchor_confs:
+            self.graph.add_node(repr(conf),conf=conf)
 
+        for ii,conf1 in enumerate(anchor_confs):
+            for conf2 in anchor_confs[ii+1:]:
+                
+                edge_type = LINK_TYPE_SAME_PIECE
+                pos_weight = STRONG_SPRING_CONNECTION
 
-    nx.draw_networkx_edges(graph_,pos=pos_spaced,edge_color="black",edgelist=same_piece_links,width=3,ax=ax)
-    nx.draw_networkx_edges(graph_,pos=pos_spaced,edge_color="blue",edgelist=inter_piece_links,width=3,ax=ax)
+                if conf1.parent_piece != conf2.parent_piece:
+                    edge_type = LINK_TYPE_INTER_PIECE
+                    pos_weight = WEAK_SPRING_CONNECTION
 
+                self.graph.add_edge(repr(conf1),repr(conf2),edge_type=edge_type,pos_weight=pos_weight)
 
-def remove_edges(edges_to_remove:list):
-    '''
-        edges_to_remove - list of tuples
-    '''
-    global graph_
-    global pos_
+    def get_num_nodes(self):
+        if self.lean_graph is not None:
+            return len(self.lean_graph.confs)
+        return self.graph.number_of_nodes()
+
+    def get_num_dropped_by_length(self):
+        '''
+            the candidate pairs the lean graph did not generate for their segment lengths (none for the networkx graph)
+        '''
+        if self.lean_graph is not None:
+            return self.lean_graph.num_dropped_by_length
+        return 0
+
+    def get_num_edges(self):
+        '''
+            all the edges of the graph, the same piece ones included (the lean graph has none of them)
+        '''
+        if self.lean_graph is not None:
+            return len(self.lean_graph)
+        return self.graph.number_of_edges()
+
+    def get_inter_piece_edges(self,is_data=True):
+        if self.lean_graph is not None:
+            edges = self.lean_graph.get_edges()
+            if is_data:
+                return [(u,v,{"edge_type":LINK_TYPE_INTER_PIECE,"pos_weight":WEAK_SPRING_CONNECTION}) for u,v in edges]
+            return edges
+
+        graph_links = self.graph.edges(data=True)
+        
+        if is_data:
+            return [(u,v,data) for u,v,data in graph_links if data["edge_type"] == LINK_TYPE_INTER_PIECE]
+        else:
+            return [(u,v) for u,v,data in graph_links if data["edge_type"] == LINK_TYPE_INTER_PIECE]
+        
+    def get_confs_pairing(self)->dict:
+        if self.lean_graph is not None:
+            return self.lean_graph.get_confs_pairing()
+
+        graph_links = self.graph.edges(data=True)
+        pairs = {}
+
+        for u,v,data in graph_links:
+            if data["edge_type"] == LINK_TYPE_INTER_PIECE:
+                data_u = self.graph.nodes[u]
+                data_v = self.graph.nodes[v]
+                pairs[(u,v)] = (data_u["conf"],data_v["conf"])
+        
+        return pairs
+
+    def get_node_data(self,node):
+        if self.lean_graph is not None:
+            return {"conf":self.lean_graph.get_conf(node)}
+
+        return self.graph.nodes[node]
+
+    def get_layout(self):
+        '''
+            the positions of the nodes for drawing, the layout is quadratic in the number of nodes so it is only
+            computed when needed and cached until the graph changes
+        '''
+        if self.pos is None:
+            pos_tmp = nx.shell_layout(self.graph)  
+            self.pos = nx.kamada_kawai_layout(self.graph,pos=pos_tmp,weight="pos_weight")
+
+        return self.pos
+
+    def draw(self,ax=None,**kwargs):
+        if self.lean_graph is not None:
+            raise ValueError("The lean mating graph has no layout, init the graph with lean=False to draw it")
+
+        if ax is None:
+            # matplotlib is only needed for drawing, keep it off the import path of the solver
+            import matplotlib.pyplot as plt
+            ax = plt.subplot()
 
-    graph_.remove_edges_from(edges_to_remove)
-    pos_tmp = nx.shell_layout(graph_)  
-    pos_ = nx.kamada_kawai_layout(graph_,pos=pos_tmp,weight="pos_weight")
\ No newline at end of file
+        
+        pos_spaced = self.get_layout() #nx.kamada_kawai_layout(graph_,pos=pos_,weight="draw_weight")
+        
+        nx.draw_networkx_nodes(self.graph, pos=pos_spaced, node_color="skyblue",ax=ax)
+        nx.draw_networkx_labels(self.graph, pos=pos_spaced, font_size=8, font_color='black',ax=ax)
+
+        graph_links = self.graph.edges(data=True)
+
+        inter_piece_links = []
+        same_piece_links = []
+
+        for u,v,data in graph_links:
+            if data["edge_type"] == LINK_TYPE_SAME_PIECE:
+                same_piece_links.append((u,v,data))
+            elif data["edge_type"] == LINK_TYPE_INTER_PIECE:
+                inter_piece_links.append((u,v,data))
+
+
+        nx.draw_networkx_edges(self.graph,pos=pos_spaced,edge_color="black",edgelist=same_piece_links,width=3,ax=ax)
+        nx.draw_networkx_edges(self.graph,pos=pos_spaced,edge_color="blue",edgelist=inter_piece_links,width=3,ax=ax)
+
+    def remove_edges(self,edges_to_remove:list):
+        '''
+            edges_to_remove - list of tuples
+        '''
+        if self.lean_graph is not None:
+            self.lean_graph.remove_edges(edges_to_remove)
+            return
+
+        self.graph.remove_edges_from(edges_to_remove)
+        self.pos = None
+
+
+# The graph of the module functions, for the callers without a SolverContext
+default_graph_ = MatingGraph()
+group2node_ = {}
+piece2node_ = {}
+
+# the module globals of the graph before the MatingGraph class, read from the default graph
+_DEFAULT_GRAPH_ATTRIBUTES = {"graph_": "graph", "lean_graph_": "lean_graph", "pos_": "pos"}
+
+def __getattr__(name):
+    if name in _DEFAULT_GRAPH_ATTRIBUTES:
+        return getattr(default_graph_, _DEFAULT_GRAPH_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def initGraph(anchor_confs:list,lean=False,min_length_ratio=None):
+    default_graph_.init(anchor_confs,lean=lean,min_length_ratio=min_length_ratio)
+
+# def get_node_name(anchor_point,piece):
+#     return f"{repr(piece)}--{anchor_point}"
+
+def get_inter_piece_edges(is_data=True):
+    return default_graph_.get_inter_piece_edges(is_data)
+
+def get_confs_pairing()->dict:
+    return default_graph_.get_confs_pairing()
+
+def get_node_data(node):
+    return default_graph_.get_node_data(node)
+
+def get_layout():
+    return default_graph_.get_layout()
+
+def draw(ax=None,**kwargs):
+    default_graph_.draw(ax,**kwargs)
+
+def remove_edges(edges_to_remove:list):
+    default_graph_.remove_edges(edges_to_remove)
@@ -0,0 +1,84 @@
+import math
+import numpy as np
+from src.arbitrary_anchors.anchor_conf import AnchorConf
+
+
+def length_ratio(conf1:AnchorConf,conf2:AnchorConf):
+    '''
+        ratio of the shortest to the longest segment length of the two confs, in [0,1] (1 for equal lengths)
+    '''
+    return float(length_ratios(conf1.segment_length(),conf2.segment_length()))
+
+def length_ratios(lengths1,lengths2):
+    '''
+        length_ratio of segment lengths, element-wise on arrays of them
+    '''
+    lengths1, lengths2 = np.asarray(lengths1,dtype=float), np.asarray(lengths2,dtype=float)
+    longest = np.maximum(lengths1,lengths2)
+    return np.divide(np.minimum(lengths1,lengths2),longest,out=np.ones_like(longest),where=longest > 0)
+
+def curvature_signature(conf:AnchorConf):
+    '''
+        sinuosity of the contour between the first and the last anchors of the conf (the shortest of the two arcs
+        of the parent piece polygon between them): contour length / straight distance, 1 for a straight contour
+        the anchors are expected to be vertices of the polygon (the segmenting points are), else the closest vertices are used
+    '''
+    coords = np.array(conf.parent_piece.get_polygon().exterior.coords)[:-1]
+    edges_lengths = np.linalg.norm(np.roll(coords,-1,axis=0) - coords,axis=1)
+    perimeter = edges_lengths.sum()
+    cumulative = np.concatenate([[0],np.cumsum(edges_lengths)])
+
+    start, end = [int(np.argmin(np.linalg.norm(coords - point,axis=1))) for point in (conf.anchor_points[0],conf.anchor_points[-1])]
+    forward_length = (cumulative[end] - cumulative[start]) % perimeter if perimeter > 0 else 0
+    arc_length = min(forward_length,perimeter - forward_length)
+    chord_length = math.dist(coords[start],coords[end])
+
+    if chord_length == 0:
+        return 1.0
+    return arc_length / chord_length
+
+def filter_pairs(pairs2confs:dict,min_length_ratio=None,curvature_tolerance=None):
+    '''
+        Drops the conf pairs that cannot mate, before simulating them
+        min_length_ratio - drop the pairs whose length_ratio is below it (None keeps them all)
+        curvature_tolerance - drop the pairs whose curvature signatures differ by more than this fraction of the largest one
+                              (None keeps them all)
+        returns the kept pairs (in the same order) and the statistics of the filtering
+    '''
+    signatures = {}
+    def get_signature(conf):
+        if repr(conf) not in signatures:
+            signatures[repr(conf)] = curvature_signature(conf)
+        return signatures[repr(conf)]
+
+    kept = {}
+    stats = {"total": len(pairs2confs), "dropped_by_length": 0, "dropped_by_curvature": 0}
+
+    for pair, (conf1, conf2) in pairs2confs.items():
+        if min_length_ratio is not None and length_ratio(conf1,conf2) < min_length_ratio:
+            stats["dropped_by_length"] += 1
+            continue
+
+        if curvature_tolerance is not None:
+            signature1, signature2 = get_signature(conf1), get_signature(conf2)
+            if abs(signature1 - signature2) > curvature_tolerance * max(signature1,signature2):
+                stats["dropped_by_curvature"] += 1
+                continue
+
+        kept[pair] = (conf1, conf2)
+
+    stats["kept"] = len(kept)
+    stats["dropped_fraction"] = (len(pairs2confs) - len(kept)) / len(pairs2confs) if len(pairs2confs) > 0 else 0.0
+    return kept, stats
+
+
+def add_dropped_by_length(stats:dict,num_dropped:int):
+    '''
+        the statistics of filter_pairs with the pairs dropped by length before it (e.g. by the lean mating graph),
+        as if filter_pairs had dropped them
+    '''
+    stats = dict(stats)
+    stats["total"] += num_dropped
+    stats["dropped_by_length"] += num_dropped
+    stats["dropped_fraction"] = (stats["total"] - stats["kept"]) / stats["total"] if stats["total"] > 0 else 0.0
+    return stats
@@ -1,6 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
 from src.arbitrary_anchors.anchor_conf import AnchorConf
 from src.assembler.matings import VertexMating
 from src.assembler import physical_assemler
+from src.assembler import rigid_transformations
 
 
 def conf_to_matings_(conf1:AnchorConf,conf2:AnchorConf):
@@ -18,17 +21,81 @@ def conf_to_matings_(conf1:AnchorConf,conf2:AnchorConf):
     
     return matings
 
-def simulate(pairs2confs:dict,is_debug=False):
+def stack_conf_pairs(pairs2confs:dict):
+    '''
+        Stacks the mated anchor points of all the conf pairs (as paired by conf_to_matings_), padded to the longest pair
+        returns the pairs, the first confs anchors and the second confs anchors of shape (n_pairs,max_anchors,2),
+        and the weights of shape (n_pairs,max_anchors) - 1 for the mated anchors and 0 for the padding
+    '''
+    pairs = list(pairs2confs)
+    num_anchors = [min(conf1.get_num_anchors(),conf2.get_num_anchors()) for conf1,conf2 in pairs2confs.values()]
+    max_anchors = max(num_anchors,default=0)
+
+    first_points = np.zeros((len(pairs),max_anchors,2))
+    second_points = np.zeros((len(pairs),max_anchors,2))
+    weights = np.zeros((len(pairs),max_anchors))
+
+    for i,(pair,n) in enumerate(zip(pairs,num_anchors)):
+        conf1, conf2 = pairs2confs[pair]
+        first_points[i,:n] = conf1.anchor_points[:n]
+        second_points[i,:n] = conf2.anchor_points[:n]
+        weights[i,:n] = 1
+
+    return pairs, first_points, second_points, weights
+
+def align(pairs2confs:dict):
+    '''
+        The rigid transformation of the second piece of every conf pair bringing its anchors onto the anchors of the
+        first piece (kept in place, as the anchor of the simulation), computed for all the pairs in one vectorized pass
+        returns the pairs, the angles (radians) of shape (n_pairs,) and the translations of shape (n_pairs,2),
+        the second piece coordinates p are aligned as R(angle) * p + translation
+    '''
+    pairs, first_points, second_points, weights = stack_conf_pairs(pairs2confs)
+    if len(pairs) == 0:
+        return pairs, np.zeros(0), np.zeros((0,2))
+
+    angles, translations = rigid_transformations.rigid_align(second_points,first_points,weights)
+    return pairs, angles, translations
+
+def simulate(pairs2confs:dict,is_debug=False,max_workers=1,max_in_flight=None,batch_size=None,context=None):
     '''
         conf_pairs - list of tuples of AnchorConf to simulate their overlapping
+        max_workers - number of simulation requests sent to the springs server concurrently (1 sends them one by one)
+        max_in_flight - maximal number of submitted requests not yet answered (2*max_workers by default),
+                        keeps the memory bounded when there are many pairs
+        batch_size - number of pairs simulated by a single batch request (None sends a request per pair)
+        context - SolverContext whose simulator answers the requests (None for the physical_assemler ones)
+        returns the responses in the order of pairs2confs, whatever the order the server answered in
     '''
-    pair2response = {}
+    pairs = list(pairs2confs)
+    chunk_size = 1 if batch_size is None else batch_size
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+    def simulate_chunk(chunk):
+        matings_list = [conf_to_matings_(*pairs2confs[pair]) for pair in chunk]
+        if batch_size is None:
+            return [physical_assemler.simulate(matings_list[0],isDebug=is_debug,context=context)]
+        return physical_assemler.simulate_batch(matings_list,isDebug=is_debug,context=context)
+
+    responses = {}
+    if max_workers <= 1:
+        for chunk in chunks:
+            responses.update(zip(chunk,simulate_chunk(chunk)))
+    else:
+        if max_in_flight is None:
+            max_in_flight = 2 * max_workers
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = {}
+            for chunk in chunks:
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        responses.update(zip(in_flight.pop(future),future.result()))
+
+                in_flight[executor.submit(simulate_chunk,chunk)] = chunk
 
-    for pair,confs in pairs2confs.items():
-        conf1,conf2 = confs
-        
-        matings = conf_to_matings_(conf1,conf2)
-        response = physical_assemler.simulate(matings,isDebug=is_debug) # 
-        pair2response[pair] = response
+            for future in list(in_flight):
+                responses.update(zip(in_flight.pop(future),future.result()))
 
-    return pair2response
+    return {pair: responses[pair] for pair in pairs}
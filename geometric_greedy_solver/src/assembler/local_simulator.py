@@ -0,0 +1,131 @@
+import json
+import math
+import numpy as np
+from src import shared_parameters
+from src.piece import piece_id_from_full_name
+from src.assembler import rigid_transformations
+
+
+class LocalRigidSimulator():
+    '''
+        In-process stand-in for the springs server (same interface as SpringsHTTPClient).
+        Instead of simulating springs between the mated vertices, every piece is aligned analytically:
+        the first piece of the matings is the anchor and keeps its place (and its fixed rotation, if given),
+        then the pieces are placed one after the other (breadth first over the matings) by the rigid transformation
+        minimizing the squared distances between their mated vertices and the already placed ones (2D Procrustes).
+        Collisions are not simulated, the collision mode is ignored.
+        The response has the shape of the server's: piecesFinalCoords and piecesFinalTransformations,
+        with the final coordinates of a piece being R(rotationRadians) * p + translateVector for its polygon vertices p.
+    '''
+
+    def __init__(self, polygons=None, active_pieces=None):
+        '''
+            polygons - dict of the polygon vertices of the pieces by full name (piece_id + "_intact_mesh"),
+                       pieces missing there are read from active_pieces
+            active_pieces - dict of the pieces by piece id (the pieces of a SolverContext), shared_parameters.active_pieces by default
+        '''
+        self.polygons = {} if polygons is None else dict(polygons)
+        self.active_pieces = shared_parameters.active_pieces if active_pieces is None else active_pieces
+
+    def get_polygon_coords(self, piece_full_name):
+        if piece_full_name not in self.polygons:
+            piece_id = piece_id_from_full_name(piece_full_name)
+            if piece_id not in self.active_pieces:
+                raise KeyError(f"Unknown piece {piece_full_name}, it is not an active piece")
+            polygon = self.active_pieces[piece_id].get_polygon()
+            self.polygons[piece_full_name] = list(polygon.exterior.coords)[:-1]
+
+        return self.polygons[piece_full_name]
+
+    def send_sanity(self):
+        return "local"
+
+    def send_reconstruct_request(self, body, screenshot_name="",isInteractive=False,isDebug=False,
+                                 headers=None,collision=""):
+        return self.reconstruct(json.loads(body))
+
+    def send_reconstruct_batch_request(self, bodies, isDebug=False, headers=None, collision=""):
+        return [self.reconstruct(body) for body in bodies]
+
+    def reconstruct(self, body):
+        '''
+            body - the request body of the server: {"matings": [...], "fixedRotation": [...] (optional)}
+        '''
+        matings = body["matings"]
+        fixed_rotation = {}
+        for fixed in body.get("fixedRotation", []):
+            fixed_rotation[fixed["piece"]] = fixed["initialAngleRadians"]
+
+        # the pieces in order of first appearance, and the mated vertices of every pair of pieces
+        pieces = []
+        pairs = {}
+        for mating in matings:
+            first, second = mating["firstPiece"], mating["secondPiece"]
+            for piece in (first, second):
+                if piece not in pairs:
+                    pieces.append(piece)
+                    pairs[piece] = []
+            pairs[first].append((mating["firstPieceLocalCoords"], second, mating["secondPieceLocalCoords"]))
+            pairs[second].append((mating["secondPieceLocalCoords"], first, mating["firstPieceLocalCoords"]))
+
+        transformations = {}
+        for piece in pieces:
+            if piece in transformations:
+                continue
+
+            # a new connected component, anchored in place
+            transformations[piece] = (fixed_rotation.get(piece, 0.0), np.zeros(2))
+            placed_any = True
+            while placed_any:
+                placed_any = False
+                for other in pieces:
+                    if other in transformations:
+                        continue
+                    src = [local for local, partner, _ in pairs[other] if partner in transformations]
+                    if len(src) == 0:
+                        continue
+                    dst = [_apply(transformations[partner], partner_local) for _, partner, partner_local in pairs[other] if partner in transformations]
+                    transformations[other] = rigid_align(src, dst, fixed_rotation.get(other))
+                    placed_any = True
+
+        response = {"piecesFinalCoords": [], "piecesFinalTransformations": []}
+        for piece in pieces:
+            angle, translation = transformations[piece]
+            coords = _apply((angle, translation), self.get_polygon_coords(piece))
+            response["piecesFinalCoords"].append({
+                "pieceId": piece,
+                "coordinates": coords.tolist()
+            })
+            response["piecesFinalTransformations"].append({
+                "pieceId": piece,
+                "rotationRadians": float(angle),
+                "translateVectorX": float(translation[0]),
+                "translateVectorY": float(translation[1])
+            })
+
+        return response
+
+
+def _rotation_matrix(angle):
+    return np.array([[math.cos(angle), -math.sin(angle)],
+                     [math.sin(angle), math.cos(angle)]])
+
+def _apply(transformation, points):
+    angle, translation = transformation
+    points = np.asarray(points, dtype=float)
+    return points @ _rotation_matrix(angle).T + translation
+
+def rigid_align(src, dst, angle=None):
+    '''
+        closed-form 2D Procrustes: the rotation angle and translation minimizing sum |R(angle) * src + t - dst|^2
+        angle - a fixed rotation to use instead of the optimal one (only the translation is solved)
+        a single pair of points does not determine the rotation, it is kept at 0
+    '''
+    if angle is None:
+        angle, translation = rigid_transformations.rigid_align(src, dst)
+        return float(angle), translation
+
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    translation = dst.mean(axis=0) - _rotation_matrix(angle) @ src.mean(axis=0)
+    return angle, translation
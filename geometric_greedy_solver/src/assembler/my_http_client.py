@@ -2,14 +2,20 @@ import urllib3
 import json
 from urllib.parse import urlencode
 
+# statuses of servers without the batch reconstruction endpoint
+BATCH_UNSUPPORTED_STATUSES = (404, 405, 501)
 
 class SpringsHTTPClient:
-    def __init__(self, host="localhost", port=8888):
+    def __init__(self, host="localhost", port=8888, maxsize=1):
+        '''
+            maxsize - number of connections kept open to the server, as many as the threads sending requests concurrently
+        '''
         self.host = host
         self.port = port
-        self.http = urllib3.PoolManager()
+        self.http = urllib3.PoolManager(maxsize=maxsize)
         self.url_prefix = "v0/RePAIR"
         self.base_target = f"http://{self.host}:{self.port}/{self.url_prefix}"
+        self.batch_supported = True
 
     def send_sanity(self):
         target = f"{self.base_target}/sanity"
@@ -20,8 +26,7 @@ class SpringsHTTPClient:
 
         return response.data.decode('utf-8')
 
-    def send_reconstruct_request(self, body, screenshot_name="",isInteractive=False,isDebug=False,
-                                 headers={'Content-Type': 'application/json'},collision=""):
+    def _query_string(self, screenshot_name="",isInteractive=False,isDebug=False,collision=""):
         query_parameters = {}
 
         if screenshot_name != "":
@@ -36,7 +41,11 @@ class SpringsHTTPClient:
         if collision != "":
             query_parameters["collision"] = collision # On, OffThenOn, Off
 
-        encoded_args = urlencode(query_parameters)
+        return urlencode(query_parameters)
+
+    def send_reconstruct_request(self, body, screenshot_name="",isInteractive=False,isDebug=False,
+                                 headers={'Content-Type': 'application/json'},collision=""):
+        encoded_args = self._query_string(screenshot_name,isInteractive,isDebug,collision)
         query_parameters_str = "reconstructions?" + encoded_args
         target = f"{self.base_target}/{query_parameters_str}"
 
@@ -48,4 +57,40 @@ class SpringsHTTPClient:
         )
 
         return json.loads(response.data.decode('utf-8'))
-    
+
+    def send_reconstruct_batch_request(self, bodies, isDebug=False,
+                                       headers={'Content-Type': 'application/json'},collision=""):
+        '''
+            bodies - list of independent reconstruction bodies (dicts, as encoded for send_reconstruct_request)
+            returns the list of the responses, in the order of bodies
+            servers without the batch endpoint are sent the bodies one by one (and are not asked for batches again)
+        '''
+        if len(bodies) == 0:
+            return []
+
+        if self.batch_supported:
+            encoded_args = self._query_string(isDebug=isDebug,collision=collision)
+            target = f"{self.base_target}/reconstructions/batch?{encoded_args}"
+
+            response = self.http.request(
+                'POST',
+                target,
+                body=json.dumps({"problems": bodies}),
+                headers=headers
+            )
+
+            if response.status not in BATCH_UNSUPPORTED_STATUSES:
+                if response.status != 200:
+                    raise Exception(response.reason)
+
+                responses = json.loads(response.data.decode('utf-8'))
+                if isinstance(responses, dict):
+                    responses = responses["responses"]
+                if len(responses) != len(bodies):
+                    raise Exception(f"Expected {len(bodies)} responses from the batch reconstruction, got {len(responses)}")
+                return responses
+
+            self.batch_supported = False
+
+        return [self.send_reconstruct_request(json.dumps(body),isDebug=isDebug,headers=headers,collision=collision)
+                for body in bodies]
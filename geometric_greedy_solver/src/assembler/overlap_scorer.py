@@ -0,0 +1,80 @@
+import numpy as np
+import shapely
+from shapely import unary_union
+from shapely import errors as shapely_errors
+
+
+class OverlapScorer():
+    '''
+        Scores the overlapping of simulated pieces as physical_assemler.score_pairwise (semi dice coefficient),
+        from the final coordinates of the responses: the polygons of all the responses are built at once,
+        from one array of their vertices, and the pairs of two pieces (all the pairwise simulations) are scored in bulk,
+        with vectorized shapely intersections.
+        The polygons are not cached per piece and moved by the transformations of the responses: the translateVector of
+        the springs server is not the translation of R(rotationRadians) applied to the local polygon of the piece,
+        so only the final coordinates give the simulated placement for both simulators.
+    '''
+
+    def final_polygons(self, responses):
+        '''
+            the polygons of the final coordinates of every response, one list of polygons per response
+        '''
+        coords, rings_idxs, pieces_counts = [], [], []
+        for response in responses:
+            pieces_counts.append(len(response["piecesFinalCoords"]))
+            for piece_json in response["piecesFinalCoords"]:
+                coords.append(np.asarray(piece_json["coordinates"], dtype=float).reshape(-1, 2))
+                rings_idxs.append(np.full(len(coords[-1]), len(rings_idxs)))
+
+        if len(coords) == 0:
+            return [[] for _ in responses]
+
+        # as Polygon(coordinates), the rings are closed when their last vertex is not the first one
+        polygons = shapely.polygons(shapely.linearrings(np.concatenate(coords), indices=np.concatenate(rings_idxs)))
+        return [list(response_polygons) for response_polygons in np.split(polygons, np.cumsum(pieces_counts)[:-1])]
+
+    def score(self, response):
+        return self.score_many([response])[0]
+
+    def score_many(self, responses):
+        '''
+            returns the semi dice coefficient of every response, in the same order
+        '''
+        scores = [None] * len(responses)
+        pairs_idxs, firsts, seconds = [], [], []
+
+        for i, polygons in enumerate(self.final_polygons(responses)):
+            if len(polygons) == 2:
+                pairs_idxs.append(i)
+                firsts.append(polygons[0])
+                seconds.append(polygons[1])
+            else:
+                scores[i] = _semi_dice(polygons)
+
+        if len(pairs_idxs) > 0:
+            firsts, seconds = np.array(firsts, dtype=object), np.array(seconds, dtype=object)
+            try:
+                # the intersection of two pieces is the one of every piece with the "union of the others"
+                shared = shapely.area(shapely.intersection(firsts, seconds))
+                pair_scores = shared / shapely.area(firsts) + shared / shapely.area(seconds)
+            except shapely_errors.GEOSException:
+                # an invalid polygon, score the pairs one by one to fix only the failing ones
+                pair_scores = [_semi_dice([first, second]) for first, second in zip(firsts, seconds)]
+            for i, score in zip(pairs_idxs, pair_scores):
+                scores[i] = float(score)
+
+        return scores
+
+
+def _semi_dice(polygons):
+    # as physical_assemler.semi_dice_coef_overlapping, from the polygons
+    dice_sum = 0
+    for i in range(len(polygons)):
+        other_union = unary_union([polygons[j] for j in range(len(polygons)) if i != j])
+        try:
+            curr_intersect_with_other = polygons[i].intersection(other_union)
+        except shapely_errors.GEOSException:
+            curr_intersect_with_other = polygons[i].buffer(0).intersection(other_union.buffer(0))
+        dice_sum += curr_intersect_with_other.area / polygons[i].area
+
+    return dice_sum
@@ -11,15 +11,45 @@ import math
 import re
 from src import shared_parameters
 from shapely import errors as shapely_errors
+from contextlib import nullcontext
     
 
 
 http_ = SpringsHTTPClient()
 
-def simulate(matings,fixed_rotation={}, screenshot_name="",isInteractive=False,isDebug=False,collision="Off"):
+def set_backend(backend):
     '''
-        matings - list of VertexMating
+        backend - the simulator answering the reconstruction requests: a SpringsHTTPClient (the springs server)
+                  or an in-process LocalRigidSimulator
+    '''
+    global http_
+    http_ = backend
+
+
+# ResponseCache of the simulations, None to always ask the server
+response_cache_ = None
+
+def set_response_cache(cache):
+    global response_cache_
+    response_cache_ = cache
+
+def _backend(context):
     '''
+        the simulator and the response cache of the context, the module ones without a context
+    '''
+    if context is None:
+        return http_, response_cache_
+    return context.simulator, context.response_cache
+
+def _request_timer(context,num_simulations=1):
+    '''
+        times a request to the simulator in the stats of the context (nothing without a context)
+    '''
+    if context is None or context.stats is None:
+        return nullcontext()
+    return context.stats.request(num_simulations)
+
+def _reconstruct_body(matings,fixed_rotation={}):
     matings_as_list = [mating.as_dict() for mating in matings]
 
     body = {
@@ -29,12 +59,61 @@ def simulate(matings,fixed_rotation={}, screenshot_name="",isInteractive=False,i
     if len(fixed_rotation) > 0:
         body["fixedRotation"] = fixed_rotation
 
+    return body
+
+def simulate(matings,fixed_rotation={}, screenshot_name="",isInteractive=False,isDebug=False,collision="Off",context=None):
+    '''
+        matings - list of VertexMating
+        context - SolverContext whose simulator and response cache are used (None for the module ones)
+    '''
+    http, response_cache = _backend(context)
+    body = _reconstruct_body(matings,fixed_rotation)
+
+    # visual and debug runs are for the side effects of the server, never cached
+    use_cache = response_cache is not None and screenshot_name == "" and not isInteractive and not isDebug
+    if use_cache:
+        response = response_cache.get(body,collision)
+        if response is not None:
+            return response
+
     encoded_body = json.dumps(body)
-    response = http_.send_reconstruct_request(encoded_body,screenshot_name=screenshot_name,
-                                                    isInteractive=isInteractive,isDebug=isDebug,collision=collision)
+    with _request_timer(context):
+        response = http.send_reconstruct_request(encoded_body,screenshot_name=screenshot_name,
+                                                        isInteractive=isInteractive,isDebug=isDebug,collision=collision)
+
+    if use_cache:
+        response_cache.put(body,response,collision)
 
     return response
 
+def simulate_batch(matings_list,fixed_rotations=None,isDebug=False,collision="Off",context=None):
+    '''
+        matings_list - list of independent simulations, each a list of VertexMating
+        fixed_rotations - the fixed_rotation of every simulation (None for none)
+        context - SolverContext whose simulator and response cache are used (None for the module ones)
+        returns the responses of the simulations, in the order of matings_list
+    '''
+    http, response_cache = _backend(context)
+    if fixed_rotations is None:
+        fixed_rotations = [{}] * len(matings_list)
+
+    bodies = [_reconstruct_body(matings,fixed_rotation) for matings,fixed_rotation in zip(matings_list,fixed_rotations)]
+    if response_cache is None or isDebug:
+        with _request_timer(context,len(bodies)):
+            return http.send_reconstruct_batch_request(bodies,isDebug=isDebug,collision=collision)
+
+    # only the simulations missing in the cache are sent to the server
+    responses = [response_cache.get(body,collision) for body in bodies]
+    missing = [i for i,response in enumerate(responses) if response is None]
+    if len(missing) > 0:
+        with _request_timer(context,len(missing)):
+            missing_responses = http.send_reconstruct_batch_request([bodies[i] for i in missing],isDebug=isDebug,collision=collision)
+        for i,response in zip(missing,missing_responses):
+            response_cache.put(bodies[i],response,collision)
+            responses[i] = response
+
+    return responses
+
 def semi_dice_coef_overlapping(polygons:list):
     shapely_polygons = [Polygon(poly) for poly in polygons]
     dice_sum = 0
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache():
+    '''
+        Content addressed on-disk cache of the simulator responses: the key is a hash of the namespace, of the
+        canonicalized request body (matings, fixed rotation) and of the collision mode, the value is the response JSON.
+        Simulations are deterministic in these inputs, so rerunning the solver on the same object reuses them.
+        The namespace names the simulator answering the requests ("springs", "local"), the simulators do not
+        give the same responses to the same request, so a cache directory shared by them never mixes their responses.
+        The cache keeps at most max_entries responses, evicting the least recently used ones.
+        The order of use is indexed in memory, from a scan of the directory on the first request (not on construction,
+        the solver makes a cache per object), so the bound is per process: the processes sharing a directory
+        each evict among the entries they know, and the directory can hold more than max_entries responses.
+    '''
+
+    def __init__(self, cache_dir, max_entries=100000, namespace="springs"):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock_ = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries_ = None # indexed by _index on the first request
+
+    def _index(self):
+        '''
+            the entries from the least to the most recently used, scanned from the directory on the first call
+            (the modification time of a file is its last use), to call with the lock held
+        '''
+        if self.entries_ is None:
+            entries = []
+            for dir_name in os.listdir(self.cache_dir):
+                sub_dir = os.path.join(self.cache_dir, dir_name)
+                if not os.path.isdir(sub_dir):
+                    continue
+                for file_name in os.listdir(sub_dir):
+                    if file_name.endswith(".json"):
+                        path = os.path.join(sub_dir, file_name)
+                        entries.append((os.path.getmtime(path), file_name[:-len(".json")]))
+            self.entries_ = OrderedDict((key, None) for _, key in sorted(entries))
+            self._evict()
+        return self.entries_
+
+    @staticmethod
+    def key(body, collision="", namespace="springs"):
+        canonical_body = json.dumps(body, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{namespace}|{canonical_body}|{collision}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, body, collision=""):
+        '''
+            returns the cached response of the request, None if it is not cached
+        '''
+        key = self.key(body, collision, self.namespace)
+        with self.lock_:
+            entries = self._index()
+            if key not in entries:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self.hits += 1
+
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                response = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            # removed or corrupted behind our back, simulate again
+            with self.lock_:
+                self.entries_.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+        return response
+
+    def put(self, body, response, collision=""):
+        key = self.key(body, collision, self.namespace)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(response, f)
+        os.replace(tmp_path, path)
+
+        with self.lock_:
+            entries = self._index()
+            entries[key] = None
+            entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while len(self.entries_) > self.max_entries:
+            key, _ = self.entries_.popitem(last=False)
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def __len__(self):
+        with self.lock_:
+            return len(self._index())
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / requests if requests > 0 else 0.0
+        }
@@ -21,6 +21,9 @@ def _mask_transparency(piece_img):
     return piece_mask
 
 
+def _active_pieces(context):
+    return shared_parameters.active_pieces if context is None else context.active_pieces
+
 def _mask(piece_img,rot_radians):
     piece_mask = _mask_transparency(piece_img)
     rot_degrees= math.degrees(-rot_radians)
@@ -28,7 +31,7 @@ def _mask(piece_img,rot_radians):
     
     return rotated_mask
 
-def position_final_assembly_image(assembly_json,is_extrapolation=False,background_size=(3000,3000),piece_img_width=None):
+def position_final_assembly_image(assembly_json,is_extrapolation=False,background_size=(3000,3000),piece_img_width=None,context=None):
     screen_center_x = background_size[0]//2
     screen_center_y = background_size[1]//2 
 
@@ -38,7 +41,7 @@ def position_final_assembly_image(assembly_json,is_extrapolation=False,backgroun
 
     for transformation in assembly_json[f"piecesFinalTransformations"]:
         piece_name = re.search("RPf_\d{5}",transformation["pieceId"]).group(0)
-        piece = shared_parameters.active_pieces[piece_name]
+        piece = _active_pieces(context)[piece_name]
         
         tx,ty = physical_assemler.get_final_translation_vector_unbias(assembly_json,piece)
         
@@ -74,12 +77,12 @@ def position_final_assembly_image(assembly_json,is_extrapolation=False,backgroun
     return positions 
 
 
-def mask_final_assembly_image(assembly_json,is_extrapolation=False):
+def mask_final_assembly_image(assembly_json,is_extrapolation=False,context=None):
     masks = []
 
     for transformation in assembly_json[f"piecesFinalTransformations"]:
         piece_name = re.search("RPf_\d{5}",transformation["pieceId"]).group(0)
-        piece = shared_parameters.active_pieces[piece_name]
+        piece = _active_pieces(context)[piece_name]
         
         if is_extrapolation:
             piece_img = piece.extrapolated_img
@@ -93,12 +96,12 @@ def mask_final_assembly_image(assembly_json,is_extrapolation=False):
     
     return masks
 
-def rotate_pieces_img_final_assembly_image(assembly_json,is_extrapolation=False):
+def rotate_pieces_img_final_assembly_image(assembly_json,is_extrapolation=False,context=None):
     imgs = []
 
     for transformation in assembly_json[f"piecesFinalTransformations"]:
         piece_name = re.search("RPf_\d{5}",transformation["pieceId"]).group(0)
-        piece = shared_parameters.active_pieces[piece_name]
+        piece = _active_pieces(context)[piece_name]
         
         if is_extrapolation:
             piece_img = piece.extrapolated_img
@@ -111,12 +114,15 @@ def rotate_pieces_img_final_assembly_image(assembly_json,is_extrapolation=False)
     
     return imgs
 
-def restore_final_assembly_image(assembly_json,is_extrapolation=False,background_size=(3000,3000)):
+def restore_final_assembly_image(assembly_json,is_extrapolation=False,background_size=(3000,3000),context=None):
+    '''
+        context - SolverContext of the pieces of the assembly (None for shared_parameters.active_pieces)
+    '''
     background_img = Image.new("RGBA",background_size,color=0)
     
-    positions = position_final_assembly_image(assembly_json,is_extrapolation=is_extrapolation,background_size=background_size)
-    masks = mask_final_assembly_image(assembly_json,is_extrapolation=is_extrapolation)
-    rotated_images = rotate_pieces_img_final_assembly_image(assembly_json,is_extrapolation=is_extrapolation)
+    positions = position_final_assembly_image(assembly_json,is_extrapolation=is_extrapolation,background_size=background_size,context=context)
+    masks = mask_final_assembly_image(assembly_json,is_extrapolation=is_extrapolation,context=context)
+    rotated_images = rotate_pieces_img_final_assembly_image(assembly_json,is_extrapolation=is_extrapolation,context=context)
 
     for img,(mask,pos) in zip(rotated_images,zip(masks,positions)):
         background_img.paste(img,box=pos,mask=mask)
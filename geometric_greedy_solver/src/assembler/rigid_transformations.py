@@ -46,3 +46,47 @@ def center_of_mass(poly:ShapelyPolygon):
     return com_x, com_y
 
 
+
+
+def rotation_matrices(angles):
+    '''
+        angles - array of angles (radians), returns the counter-clockwise rotation matrices, shape (*angles.shape,2,2)
+    '''
+    angles = np.asarray(angles,dtype=float)
+    cos, sin = np.cos(angles), np.sin(angles)
+    return np.stack([np.stack([cos,-sin],axis=-1),np.stack([sin,cos],axis=-1)],axis=-2)
+
+def rigid_align(src,dst,weights=None):
+    '''
+        Closed-form 2D Procrustes of many point sets at once: the rotation angle and translation minimizing
+        sum w * |R(angle) * src + t - dst|^2 for every set
+        src,dst - arrays of shape (n_sets,n_points,2) (or (n_points,2) for a single set)
+        weights - array of shape (n_sets,n_points), 0 for the padding of sets with less points (all ones by default)
+        returns angles of shape (n_sets,) and translations of shape (n_sets,2)
+        a set of a single point does not determine the rotation, its angle is 0
+    '''
+    src = np.asarray(src,dtype=float)
+    dst = np.asarray(dst,dtype=float)
+    is_single = src.ndim == 2
+    if is_single:
+        src, dst = src[np.newaxis], dst[np.newaxis]
+        if weights is not None:
+            weights = np.asarray(weights)[np.newaxis]
+
+    weights = np.ones(src.shape[:2]) if weights is None else np.asarray(weights,dtype=float)
+    total = weights.sum(axis=1)
+    total = np.where(total > 0,total,1)[:,np.newaxis]
+
+    src_center = np.einsum("np,npc->nc",weights,src) / total
+    dst_center = np.einsum("np,npc->nc",weights,dst) / total
+    src_centered = src - src_center[:,np.newaxis]
+    dst_centered = dst - dst_center[:,np.newaxis]
+
+    dot = np.einsum("np,npc,npc->n",weights,src_centered,dst_centered)
+    cross = np.einsum("np,np->n",weights,src_centered[...,0] * dst_centered[...,1] - src_centered[...,1] * dst_centered[...,0])
+    angles = np.arctan2(cross,dot)
+    translations = dst_center - np.einsum("nij,nj->ni",rotation_matrices(angles),src_center)
+
+    if is_single:
+        return angles[0], translations[0]
+    return angles, translations
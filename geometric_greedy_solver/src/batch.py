@@ -0,0 +1,117 @@
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from src import solver
+
+
+def find_objects(dataset_root):
+    '''
+        the object folders of the dataset root (the folders with piece images), sorted by name
+    '''
+    return sorted(path.name for path in Path(dataset_root).iterdir() if path.is_dir() and any(path.glob("*.png")))
+
+def solve_object(object_name,pieces_path,coordinates_path,output_path,context_options,solve_options,trace_path=None):
+    '''
+        solves one object in its own SolverContext (own pieces, graph and simulator connection)
+        trace_path - path of the Chrome trace of the object (None for none)
+        returns its manifest record (with the PipelineStats of the object),
+        the failures are recorded instead of raised so the other objects go on
+    '''
+    started = time.time()
+    record = {"object": object_name, "output_path": str(output_path)}
+    context = None
+    try:
+        context = solver.make_context(**context_options)
+        df_output = solver.solve(pieces_path, coordinates_path, context=context, verbose=False, **solve_options)
+        solver.write_output(df_output, output_path)
+        record["status"] = "done"
+        record["num_pieces"] = len(df_output)
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+    record["seconds"] = time.time() - started
+
+    # the stats of a failed object show the stage it failed in
+    if context is not None:
+        record["stats"] = context.stats.to_dict()
+        if trace_path is not None:
+            context.stats.write_chrome_trace(trace_path)
+
+    return record
+
+def summarize(records):
+    return {status: sum(1 for record in records.values() if record["status"] == status) for status in ("done", "skipped", "failed")}
+
+def write_manifest(manifest_path,manifest):
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def run_batch(dataset_root,coordinates_path,output_dir,workers=1,overwrite=False,manifest_path=None,objects=None,
+              context_options=None,solve_options=None,traces_dir=None):
+    '''
+        Solves every object folder of dataset_root into output_dir/<object>.csv
+        workers - number of objects solved concurrently, each in its own process (1 solves them in this process)
+        overwrite - solve again the objects whose output already exists (skipped by default)
+        manifest_path - JSON manifest of the run (output_dir/manifest.json by default), rewritten as every object ends,
+                        with the status, the time and the failure reason of every object
+        objects - names of the objects to solve (all the object folders by default)
+        context_options, solve_options - keyword arguments of solver.make_context and solver.solve
+        traces_dir - folder of the Chrome traces of the objects (<object>.json), None for none
+        returns the manifest
+    '''
+    context_options = {} if context_options is None else context_options
+    solve_options = {} if solve_options is None else solve_options
+    manifest_path = Path(output_dir) / "manifest.json" if manifest_path is None else Path(manifest_path)
+    objects = find_objects(dataset_root) if objects is None else objects
+
+    started = time.time()
+    manifest = {
+        "dataset_root": str(dataset_root),
+        "coordinates_path": str(coordinates_path),
+        "output_dir": str(output_dir),
+        "workers": workers,
+        "options": {**context_options, **solve_options},
+        "objects": {}
+    }
+
+    def record_done(record):
+        manifest["objects"][record["object"]] = record
+        manifest["seconds"] = time.time() - started
+        manifest["summary"] = summarize(manifest["objects"])
+        write_manifest(manifest_path, manifest)
+        print(f"{record['object']}: {record['status']} ({len(manifest['objects'])}/{len(objects)})")
+
+    tasks = []
+    for object_name in objects:
+        output_path = Path(output_dir) / f"{object_name}.csv"
+        if output_path.exists() and not overwrite:
+            record_done({"object": object_name, "output_path": str(output_path), "status": "skipped", "seconds": 0.0})
+            continue
+        trace_path = None if traces_dir is None else str(Path(traces_dir) / f"{object_name}.json")
+        tasks.append((object_name, str(Path(dataset_root) / object_name), str(coordinates_path), str(output_path),
+                      context_options, solve_options, trace_path))
+
+    if workers <= 1:
+        for task in tasks:
+            record_done(solve_object(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(solve_object, *task) for task in tasks]
+            for future in as_completed(futures):
+                record_done(future.result())
+
+    # the objects in the order they were given, whatever the order they ended in
+    manifest["objects"] = {object_name: manifest["objects"][object_name] for object_name in objects}
+    manifest["seconds"] = time.time() - started
+    manifest["summary"] = summarize(manifest["objects"])
+    write_manifest(manifest_path, manifest)
+
+    return manifest
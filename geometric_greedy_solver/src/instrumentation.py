@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+
+# upper bounds (milliseconds) of the buckets of the requests latency histogram, the last bucket is unbounded
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class PipelineStats():
+    '''
+        Timings and counters of solving one object: the wall time of every stage of the pipeline, counters
+        (anchor confs, graph size, simulated pairs, greedy iterations...) and the latency of the simulator requests.
+        The requests can be timed from several threads.
+        Written as JSON (to_dict / write_json) and as a Chrome trace (chrome://tracing or Perfetto, write_chrome_trace).
+    '''
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.latencies = []
+        self.events = []
+        self.lock_ = threading.Lock()
+
+    def _event(self, name, category, started, finished, args=None):
+        event = {"name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                 "ts": (started - self.origin) * 1e6, "dur": (finished - started) * 1e6}
+        if args is not None:
+            event["args"] = args
+        self.events.append(event)
+
+    @contextmanager
+    def stage(self, name):
+        '''
+            times the block as the stage name (the stages run more than once add up)
+        '''
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            with self.lock_:
+                stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+                stage["seconds"] += finished - started
+                stage["calls"] += 1
+                self._event(name, "stage", started, finished)
+
+    @contextmanager
+    def request(self, num_simulations=1):
+        '''
+            times the block as one request to the simulator, answering num_simulations simulations
+        '''
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            with self.lock_:
+                self.latencies.append(finished - started)
+                self.counters["requests"] = self.counters.get("requests", 0) + 1
+                self.counters["requested_simulations"] = self.counters.get("requested_simulations", 0) + num_simulations
+                self._event("request", "http", started, finished, {"simulations": num_simulations})
+
+    def count(self, name, value=1):
+        with self.lock_:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        with self.lock_:
+            self.counters[name] = value
+
+    def latency_histogram(self):
+        latencies_ms = np.array(self.latencies) * 1000
+        counts = np.bincount(np.searchsorted(LATENCY_BUCKETS_MS, latencies_ms), minlength=len(LATENCY_BUCKETS_MS) + 1)
+        histogram = {
+            "buckets_ms": LATENCY_BUCKETS_MS + [None],
+            "counts": counts.tolist(),
+            "count": len(latencies_ms)
+        }
+        if len(latencies_ms) > 0:
+            histogram.update({
+                "mean_ms": float(latencies_ms.mean()),
+                "p50_ms": float(np.percentile(latencies_ms, 50)),
+                "p95_ms": float(np.percentile(latencies_ms, 95)),
+                "max_ms": float(latencies_ms.max())
+            })
+        return histogram
+
+    def to_dict(self):
+        with self.lock_:
+            return {
+                "total_seconds": time.perf_counter() - self.origin,
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "counters": dict(self.counters),
+                "request_latency": self.latency_histogram()
+            }
+
+    def write_json(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def write_chrome_trace(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self.lock_:
+            trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        with open(path, "w") as f:
+            json.dump(trace, f)
@@ -7,11 +7,23 @@ import pandas as pd
 from numpy import pi
 import glob
 
+FULL_NAME_SUFFIX = "_intact_mesh"
+
+def piece_id_from_full_name(full_name):
+    '''
+        inverse of Piece.get_full_name, the piece ids used by the springs server are the full names
+    '''
+    return full_name[:-len(FULL_NAME_SUFFIX)] if full_name.endswith(FULL_NAME_SUFFIX) else full_name
+
 
 class Piece():
 
     def __init__(self, piece_id, original_img_path, polygon_coords_path,
-                 count_in_shared_parameters=True) -> None:
+                 count_in_shared_parameters=True, active_pieces=None) -> None:
+        '''
+            active_pieces - dict of the pieces of the object (of its SolverContext) the piece is counted in,
+                            shared_parameters.active_pieces by default
+        '''
         self.piece_id = piece_id
         self.group_id = None  # No longer needed for path construction
 
@@ -25,10 +37,12 @@ class Piece():
         self.original_cropped_img = None
 
         if count_in_shared_parameters:
-            shared_parameters.active_pieces[piece_id] = self
+            if active_pieces is None:
+                active_pieces = shared_parameters.active_pieces
+            active_pieces[piece_id] = self
 
     def get_full_name(self):
-        return f"{self.piece_id}_intact_mesh"
+        return f"{self.piece_id}{FULL_NAME_SUFFIX}"
 
     def load_original_image(self):
         self.original_img = Image.open(self.original_img_path)
@@ -62,7 +76,7 @@ class Piece():
         return self.segmenting_polygon_points
 
 
-def explore_group(pieces_path, coordinates_path):
+def explore_group(pieces_path, coordinates_path, active_pieces=None):
     pieces = []
 
     # Get all image files in the pieces directory
@@ -106,7 +120,7 @@ def explore_group(pieces_path, coordinates_path):
 
     # Match pieces to coordinates by corresponding piece names
     for img_path, csv_path, piece_name in zip(piece_img_paths, coord_csv_paths, piece_names):
-        piece = Piece(piece_name, img_path, csv_path)
+        piece = Piece(piece_name, img_path, csv_path, active_pieces=active_pieces)
         pieces.append(piece)
 
     return pieces
\ No newline at end of file
@@ -0,0 +1,182 @@
+import os
+from pathlib import Path
+import pandas as pd
+from src.piece import explore_group
+from src.arbitrary_anchors.anchor_conf import AnchorConf
+from src.arbitrary_anchors import recipes
+from src.arbitrary_anchors import compatibilities
+from src.arbitrary_anchors.greedy_matcher import GreedyPairMatcher
+from src.arbitrary_anchors import pair_filters
+from src.solver_context import SolverContext
+from src.assembler import physical_assemler
+from src.assembler.my_http_client import SpringsHTTPClient
+from src.assembler.response_cache import ResponseCache
+from src.assembler.local_simulator import LocalRigidSimulator
+from src.assembler.overlap_scorer import OverlapScorer
+
+
+def add_arguments(parser):
+    '''
+        the options of solve and make_context, shared by main.py and batch_main.py
+    '''
+    parser.add_argument("--is_debug_final_assembly", action="store_true", help="Debug mode.", default=False)
+    parser.add_argument("--segmenting_curvedness_threshold", default="0.1")
+    parser.add_argument("--lean_mating_graph", action="store_true", help="Keep only the inter piece candidate pairs of anchor configurations, without the full networkx mating graph")
+    parser.add_argument("--min_segment_length_ratio", type=float, default=None, help="Do not simulate pairs of anchor configurations whose shortest to longest segment length ratio is below this value (range: (0,1])")
+    parser.add_argument("--curvature_tolerance", type=float, default=None, help="Do not simulate pairs of anchor configurations whose contour sinuosities differ by more than this fraction")
+    parser.add_argument("--simulator", choices=["springs", "local"], default="springs", help="Simulate the matings with the springs server or with the in-process rigid alignment")
+    parser.add_argument("--simulation_cache_dir", default=None, help="Directory of an on-disk cache of the simulation responses, reused by the following runs")
+    parser.add_argument("--simulation_cache_size", type=int, default=100000, help="Maximal number of simulation responses kept in the cache")
+    parser.add_argument("--simulation_batch_size", type=int, default=None, help="Number of pairwise simulations sent in a single batch request (the server falls back to single requests if it does not support batches)")
+    parser.add_argument("--simulation_workers", type=int, default=1, help="Number of pairwise simulation requests sent to the springs server concurrently")
+
+def check_arguments(parser, args):
+    if args.min_segment_length_ratio is not None and not 0 < args.min_segment_length_ratio <= 1:
+        parser.error("--min_segment_length_ratio must be in (0,1]")
+
+def context_options(args):
+    return {"simulator": args.simulator, "simulation_workers": args.simulation_workers,
+            "simulation_cache_dir": args.simulation_cache_dir, "simulation_cache_size": args.simulation_cache_size}
+
+def solve_options(args):
+    return {"segmenting_curvedness_threshold": eval(args.segmenting_curvedness_threshold),
+            "is_debug_final_assembly": args.is_debug_final_assembly,
+            "lean_mating_graph": args.lean_mating_graph,
+            "min_segment_length_ratio": args.min_segment_length_ratio, "curvature_tolerance": args.curvature_tolerance,
+            "simulation_workers": args.simulation_workers, "simulation_batch_size": args.simulation_batch_size}
+
+def make_context(simulator="springs",simulation_workers=1,simulation_cache_dir=None,simulation_cache_size=100000):
+    '''
+        simulator - "springs" for the springs server, "local" for the in-process LocalRigidSimulator
+    '''
+    context = SolverContext(simulator=SpringsHTTPClient(maxsize=simulation_workers),overlap_scorer=OverlapScorer())
+    if simulator == "local":
+        context.simulator = LocalRigidSimulator(active_pieces=context.active_pieces)
+    if simulation_cache_dir is not None:
+        context.response_cache = ResponseCache(simulation_cache_dir, max_entries=simulation_cache_size, namespace=simulator)
+
+    return context
+
+def solve(pieces_path,coordinates_path,context=None,segmenting_curvedness_threshold=0.1,is_debug_final_assembly=False,
+          lean_mating_graph=False,min_segment_length_ratio=None,curvature_tolerance=None,
+          simulation_workers=1,simulation_batch_size=None,verbose=True):
+    '''
+        Solves the object of the pieces in pieces_path (images) and coordinates_path (contours csvs)
+        context - SolverContext of the object (a new one with a springs server client by default),
+                  the timings and counters of the stages are recorded in context.stats
+        returns the final transformations of the pieces as a DataFrame (columns rpf,x,y,rot)
+    '''
+    log = print if verbose else (lambda *args, **kwargs: None)
+    if context is None:
+        context = make_context(simulation_workers=simulation_workers)
+
+    stats = context.stats
+    log(f"Loading pieces from {pieces_path}")
+    log(f"Loading coordinates from {coordinates_path}")
+
+    with stats.stage("load_pieces"):
+        pieces = explore_group(pieces_path, coordinates_path, active_pieces=context.active_pieces)
+    stats.set("pieces", len(pieces))
+
+    log("Segmenting")
+
+    anchor_confs = []
+    curvedness_threshold = segmenting_curvedness_threshold
+    segmenting_points_to_index = {}
+
+    with stats.stage("segmenting"):
+        for piece in pieces:
+            contour = piece.get_polygon()
+            segmenting_points = piece.segment_polygon_by_curvedness()
+            num_segmenting_points = len(segmenting_points)
+
+            for ii in range(num_segmenting_points):
+                segmenting_point_1 = segmenting_points[ii].tolist()
+                segmenting_point_2 = segmenting_points[(ii + 1) % num_segmenting_points].tolist()
+
+                segmenting_points_to_index[str(segmenting_point_1)] = ii
+                segmenting_points_to_index[str(segmenting_point_2)] = (ii + 1) % num_segmenting_points
+
+                anchors = [segmenting_point_1, segmenting_point_2]
+                anchor_confs.append(AnchorConf(anchors, piece))
+                anchor_confs.append(AnchorConf(list(reversed(anchors)), piece))
+    stats.set("anchor_confs", len(anchor_confs))
+
+    log("Compute the mating graph")
+
+    with stats.stage("mating_graph"):
+        # the lean graph drops the pairs of too different segment lengths while generating them
+        graph_length_ratio = min_segment_length_ratio if lean_mating_graph else None
+        context.mating_graph.init(anchor_confs,lean=lean_mating_graph,min_length_ratio=graph_length_ratio)
+        total_pieces_names = [piece.piece_id for piece in pieces]
+        pairs2confs = context.mating_graph.get_confs_pairing()
+    stats.set("graph_nodes", context.mating_graph.get_num_nodes())
+    stats.set("graph_edges", context.mating_graph.get_num_edges())
+    stats.set("candidate_pairs", len(pairs2confs))
+
+    filter_length_ratio = None if lean_mating_graph else min_segment_length_ratio
+    if min_segment_length_ratio is not None or curvature_tolerance is not None:
+        with stats.stage("filter_pairs"):
+            pairs2confs, filter_stats = pair_filters.filter_pairs(pairs2confs, min_length_ratio=filter_length_ratio, curvature_tolerance=curvature_tolerance)
+        # the pairs the lean graph did not generate are reported as dropped by the filter
+        filter_stats = pair_filters.add_dropped_by_length(filter_stats, context.mating_graph.get_num_dropped_by_length())
+        stats.set("pairs_filtering", filter_stats)
+        log(f"Pairs filtering: {filter_stats}")
+    stats.set("simulated_pairs", len(pairs2confs))
+
+    with stats.stage("simulate_pairs"):
+        pair2response = recipes.simulate(pairs2confs, max_workers=simulation_workers, batch_size=simulation_batch_size, context=context)
+
+    for p, res in pair2response.items():
+        assert not res["piecesFinalCoords"][0]["coordinates"][0][0] is None is None, f"{p} is problematic"
+
+    with stats.stage("overlapping"):
+        pair2overlapping = compatibilities.overlapping(pair2response,context=context)
+
+    with stats.stage("greedy_selection"):
+        pair2pieces = {pair: (conf1.parent_piece.piece_id, conf2.parent_piece.piece_id) for pair, (conf1, conf2) in pairs2confs.items()}
+        matcher = GreedyPairMatcher(pair2overlapping, pair2pieces)
+        best_pairs = matcher.select(len(total_pieces_names))
+    stats.set("greedy_iterations", matcher.num_selections)
+    stats.set("heap_pops", matcher.num_pops)
+    stats.set("selected_pairs", len(best_pairs))
+
+    final_matings = []
+
+    for pair in best_pairs:
+        conf = pairs2confs[pair]
+        final_matings += recipes.conf_to_matings_(*conf)
+
+    log("Compute the final assembly")
+
+    with stats.stage("final_assembly"):
+        response = physical_assemler.simulate(final_matings, collision="OffThenOn", isDebug=is_debug_final_assembly, context=context)
+
+    # if is_debug_final_assembly:
+
+    #     for piece in context.active_pieces.values():
+    #         piece.load_original_image()
+
+    #     final_image = restore_assembly_img.restore_final_assembly_image(response,background_size=(5000,5000),context=context)
+    #     plt.imshow(final_image)
+    #     plt.show()
+
+    if context.response_cache is not None:
+        stats.set("cache", context.response_cache.stats())
+        log(f"Simulation cache: {context.response_cache.stats()}")
+
+    final_transfomations = physical_assemler.get_final_transformations(response)
+
+    return pd.DataFrame(final_transfomations)
+
+def write_output(df_output,output_path):
+    '''
+        writes the results CSV through a temporary file, so an existing output is always complete
+    '''
+    # Create output directory if it doesn't exist
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    df_output.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
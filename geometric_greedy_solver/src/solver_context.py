@@ -0,0 +1,30 @@
+from src.arbitrary_anchors.mating_graph import MatingGraph
+from src.assembler.my_http_client import SpringsHTTPClient
+from src.instrumentation import PipelineStats
+
+
+class SolverContext():
+    '''
+        The state of solving one object: its pieces, its mating graph, the simulator answering its reconstruction
+        requests, the cache of the responses and the scorer of their overlapping.
+        Every object gets its own context, so objects can be solved one after the other or concurrently in one process
+        without sharing pieces (shared_parameters.active_pieces and the module globals stay for the callers without a context).
+    '''
+
+    def __init__(self,simulator=None,response_cache=None,stats=None,overlap_scorer=None):
+        '''
+            simulator - SpringsHTTPClient or LocalRigidSimulator (a new SpringsHTTPClient by default)
+            response_cache - ResponseCache of the simulations (None to always ask the simulator)
+            stats - PipelineStats of the solving (new ones by default)
+            overlap_scorer - OverlapScorer scoring the simulated pairs in bulk (None to score them one by one)
+        '''
+        self.active_pieces = {}
+        self.mating_graph = MatingGraph()
+        self.simulator = SpringsHTTPClient() if simulator is None else simulator
+        self.response_cache = response_cache
+        self.stats = PipelineStats() if stats is None else stats
+        self.overlap_scorer = overlap_scorer
+
+    def add_piece(self,piece):
+        self.active_pieces[piece.piece_id] = piece
+        return piece
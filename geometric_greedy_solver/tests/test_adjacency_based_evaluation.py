@@ -0,0 +1,243 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import importlib.util
+import json
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_script(script_name, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIR, script_name))
+    module = importlib.util.module_from_spec(spec)
+    # registered, so the process pool workers find the functions of the script
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+evaluation = load_script("2D_adjacency_based_evaluation.py", "adjacency_based_evaluation")
+estimate_adjacency = load_script("estimate_adjacency.py", "estimate_adjacency")
+
+
+def write_fragments(frag_dir, num_fragments, rng):
+    os.makedirs(frag_dir)
+    for i in range(num_fragments):
+        alpha = 255 * (rng.random((20, 20)) < rng.uniform(0.1, 0.9))
+        image = np.dstack([np.zeros((20, 20, 3)), alpha]).astype(np.uint8)
+        Image.fromarray(image, "RGBA").save(os.path.join(frag_dir, f"RPf_{i:05d}_intact_mesh.png"))
+
+
+def write_csv_adjacency(path, names, matrix):
+    pd.DataFrame(matrix, columns=names).to_csv(path, index=False)
+
+
+def write_json_adjacency(path, names, matrix):
+    # entry [i, j] is 1 when fragment i is in the adjacency list of fragment j
+    with open(path, "w") as f:
+        json.dump({names[j]: [names[i] for i in range(len(names)) if matrix[i, j]] for j in range(len(names))}, f)
+
+
+class TestLabelledScoring(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.frag_dir = os.path.join(self.tmp_dir.name, "fragments")
+        self.rng = np.random.default_rng(0)
+        write_fragments(self.frag_dir, 8, self.rng)
+        # the dense scoring expects the matrices in the order of the directory listing
+        self.names, self.areas = evaluation.load_areas(os.path.normpath(self.frag_dir))
+        self.areas_matrix = evaluation.load_areas_matrix(self.frag_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def random_adjacency(self):
+        return (self.rng.random((len(self.names), len(self.names))) < 0.4).astype(int)
+
+    def labelled(self, matrix, order):
+        return evaluation.LabelledAdjacency(self.names[order], matrix[order][:, order])
+
+    def test_score_labelled_as_score(self):
+        for _ in range(20):
+            adj_pred, adj_true = self.random_adjacency(), self.random_adjacency()
+            expected = evaluation.score(adj_pred, adj_true, self.areas_matrix)
+            # every source in its own order
+            pred_order, true_order, areas_order = (self.rng.permutation(len(self.names)) for _ in range(3))
+            scores = evaluation.score_labelled(self.labelled(adj_pred, pred_order), self.labelled(adj_true, true_order),
+                                               self.names[areas_order], self.areas[areas_order], missing='raise')
+            np.testing.assert_allclose(scores, expected)
+
+    def test_files_as_score(self):
+        adj_pred, adj_true = self.random_adjacency(), self.random_adjacency()
+        expected = evaluation.score(adj_pred, adj_true, self.areas_matrix)
+        order = self.rng.permutation(len(self.names))
+        pred_path = os.path.join(self.tmp_dir.name, "pred.csv")
+        true_path = os.path.join(self.tmp_dir.name, "true.json")
+        write_csv_adjacency(pred_path, self.names[order], adj_pred[order][:, order])
+        write_json_adjacency(true_path, list(self.names), adj_true)
+
+        self.assertEqual(evaluation.LabelledAdjacency.from_file(pred_path).names.tolist(), sorted(self.names))
+        row = evaluation.score_one(self.frag_dir, pred_path, true_path)
+        np.testing.assert_allclose(row[1:4], expected)
+        # load_adj_matrix reads the same matrix from the file
+        np.testing.assert_allclose(evaluation.score(evaluation.load_adj_matrix(true_path), adj_true, self.areas_matrix), (1, 1, 1))
+
+    def test_missing_fragment(self):
+        adj_pred, adj_true = self.random_adjacency(), self.random_adjacency()
+        kept = np.arange(1, len(self.names))
+        adj_pred_missing = adj_pred.copy()
+        adj_pred_missing[0, :] = 0
+        adj_pred_missing[:, 0] = 0
+        expected = evaluation.score(adj_pred_missing, adj_true, self.areas_matrix)
+
+        adj_true_labelled = self.labelled(adj_true, np.arange(len(self.names)))
+        np.testing.assert_allclose(evaluation.score_labelled(self.labelled(adj_pred, kept), adj_true_labelled, self.names, self.areas), expected)
+        with self.assertRaises(ValueError):
+            evaluation.score_labelled(self.labelled(adj_pred, kept), adj_true_labelled, self.names, self.areas, missing='raise')
+
+    def test_duplicate_names(self):
+        with self.assertRaises(ValueError):
+            evaluation.LabelledAdjacency(["RPf_00001", "RPf_00001_intact_mesh.png"], np.zeros((2, 2)))
+
+
+class TestTransformationsAdjacency(unittest.TestCase):
+    # a canvas and a blur small enough to build the full canvas masks of estimate_adjacency
+    CANVAS_SIZE = (3000, 3000)
+    SIG = 4
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.frag_dir = os.path.join(self.tmp_dir.name, "fragments")
+        os.makedirs(self.frag_dir)
+        # the opaque top left quarter of every fragment is 1000 x 1000 pixels once resized to 2000 x 2000
+        for i in range(4):
+            image = np.zeros((20, 20, 4), dtype=np.uint8)
+            image[:10, :10, 3] = 255
+            Image.fromarray(image, "RGBA").save(os.path.join(self.frag_dir, f"RPf_{i:05d}_intact_mesh.png"))
+        # RPf_00001 is 20 pixels right of RPf_00000, RPf_00002 100 pixels below it, RPf_00003 is rotated next to RPf_00001
+        self.tsfm_path = os.path.join(self.tmp_dir.name, "tsfm.csv")
+        pd.DataFrame({"rpf": [f"RPf_{i:05d}_intact_mesh.png" for i in range(4)],
+                      "x": [-1400, -380, -1400, 640], "y": [-1400, -1400, -300, -2400],
+                      "rot": [0, 0, 0, 90]}).to_csv(self.tsfm_path, index=False)
+        self.true_path = os.path.join(self.tmp_dir.name, "true.csv")
+        write_csv_adjacency(self.true_path, [f"RPf_{i:05d}" for i in range(4)],
+                            np.array([[0, 1, 1, 0], [1, 0, 0, 1], [1, 0, 0, 0], [0, 1, 0, 0]]))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_same_as_expanded_mask(self):
+        adj, area_names, areas = evaluation.transformations_adjacency(self.frag_dir, self.tsfm_path, self.CANVAS_SIZE, self.SIG)
+
+        # the full canvas masks of estimate_adjacency, compared as calc_adj_matrix compares them
+        tsfms = pd.read_csv(self.tsfm_path).to_dict(orient='records')
+        masks = [estimate_adjacency.expanded_mask(os.path.join(self.frag_dir, tsfm['rpf']), {'offset': (tsfm['x'], tsfm['y']), 'rot': tsfm['rot']},
+                                                  self.CANVAS_SIZE, self.SIG) for tsfm in tsfms]
+        expected = np.array([[i != j and np.sum(np.logical_and(masks[i], masks[j])) > 0 for j in range(len(masks))]
+                             for i in range(len(masks))], dtype=int)
+
+        self.assertEqual(adj.names.tolist(), [f"RPf_{i:05d}" for i in range(4)])
+        np.testing.assert_array_equal(adj.matrix.toarray(), expected)
+        np.testing.assert_array_equal(expected, [[0, 1, 0, 0], [1, 0, 0, 1], [0, 0, 0, 0], [0, 1, 0, 0]])
+
+        # the cropped masks are the full canvas ones
+        for tsfm, mask in zip(tsfms, masks):
+            image = Image.open(os.path.join(self.frag_dir, tsfm['rpf'])).convert('RGBA')
+            (x, y), cropped = evaluation.cropped_expanded_mask(image, {'offset': (tsfm['x'], tsfm['y']), 'rot': tsfm['rot']}, self.CANVAS_SIZE, self.SIG)
+            np.testing.assert_array_equal(mask[y:y + cropped.shape[0], x:x + cropped.shape[1]], cropped)
+            self.assertEqual(np.sum(cropped), np.sum(mask))
+
+        names, expected_areas = evaluation.load_areas(os.path.normpath(self.frag_dir))
+        self.assertEqual(sorted(zip(area_names, areas)), sorted(zip(names, expected_areas)))
+
+    def test_score_transformations_as_written_adjacency(self):
+        # the adjacency written to a file, as calc_adj_matrix does, then scored as a predicted adjacency matrix
+        adj, _, _ = evaluation.transformations_adjacency(self.frag_dir, self.tsfm_path)
+        adj_pred_path = os.path.join(self.tmp_dir.name, "pred.csv")
+        write_csv_adjacency(adj_pred_path, adj.names, adj.matrix.toarray())
+        area_names, areas = evaluation.load_areas(os.path.normpath(self.frag_dir))
+        expected = evaluation.score_labelled(evaluation.LabelledAdjacency.from_file(adj_pred_path),
+                                             evaluation.LabelledAdjacency.from_file(self.true_path), area_names, areas)
+        self.assertGreater(expected[2], 0)
+        self.assertLess(expected[2], 1)
+
+        np.testing.assert_allclose(evaluation.score_transformations(self.frag_dir, self.tsfm_path, self.true_path), expected)
+        # the --from_transformations path of the batch
+        output_path = os.path.join(self.tmp_dir.name, "scores.csv")
+        evaluation.score_batch([(self.frag_dir, self.tsfm_path, self.true_path)], output_path, from_transformations=True)
+        np.testing.assert_allclose(pd.read_csv(output_path)[['precision', 'recall', 'f1']].values[0], expected)
+
+
+class TestScoreBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(1)
+        self.batch = []
+        for obj in range(3):
+            frag_dir = os.path.join(self.tmp_dir.name, f"object{obj}")
+            write_fragments(frag_dir, 5, rng)
+            names = [f"RPf_{i:05d}" for i in range(5)]
+            pred_path = os.path.join(self.tmp_dir.name, f"pred{obj}.csv")
+            true_path = os.path.join(self.tmp_dir.name, f"true{obj}.json")
+            write_csv_adjacency(pred_path, names, (rng.random((5, 5)) < 0.5).astype(int))
+            write_json_adjacency(true_path, names, rng.random((5, 5)) < 0.5)
+            self.batch.append((frag_dir, pred_path, true_path))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_resume(self):
+        full_path = os.path.join(self.tmp_dir.name, "full.csv")
+        evaluation.score_batch(self.batch, full_path)
+        full = pd.read_csv(full_path)
+        self.assertEqual(list(full.columns), evaluation.SCORES_COLUMNS)
+        self.assertEqual(full['frag_dir'].tolist(), [item[0] for item in self.batch])
+
+        # a batch interrupted after its second item (and a partially written row)
+        resumed_path = os.path.join(self.tmp_dir.name, "resumed.csv")
+        with open(full_path) as f:
+            lines = f.readlines()
+        with open(resumed_path, "w") as f:
+            f.writelines([lines[0], lines[2], lines[1].split(',')[0] + ',\n'])
+
+        with mock.patch.object(evaluation, "score_one", wraps=evaluation.score_one) as score_one:
+            evaluation.score_batch(self.batch, resumed_path, resume=True)
+        self.assertEqual([call.args[0] for call in score_one.call_args_list], [self.batch[0][0], self.batch[2][0]])
+        pd.testing.assert_frame_equal(pd.read_csv(resumed_path), full)
+
+    def test_workers(self):
+        # two predictions of every object
+        batch = self.batch + [(frag_dir, self.batch[(i + 1) % len(self.batch)][1], true_path)
+                              for i, (frag_dir, _, true_path) in enumerate(self.batch)]
+        serial_path = os.path.join(self.tmp_dir.name, "serial.csv")
+        evaluation.score_batch(batch, serial_path)
+
+        submitted = []
+        class RecordingExecutor(evaluation.ProcessPoolExecutor):
+            def submit(self, fn, *args):
+                submitted.append(args[0])
+                return super().submit(fn, *args)
+
+        parallel_path = os.path.join(self.tmp_dir.name, "parallel.csv")
+        with mock.patch.object(evaluation, "ProcessPoolExecutor", RecordingExecutor):
+            evaluation.score_batch(batch, parallel_path, workers=2)
+        pd.testing.assert_frame_equal(pd.read_csv(parallel_path), pd.read_csv(serial_path))
+
+        # one task per object, with all its predictions
+        self.assertEqual(sorted(items[0][0] for items in submitted), sorted(item[0] for item in self.batch))
+        for items in submitted:
+            self.assertEqual(len(items), 2)
+            self.assertEqual({item[0] for item in items}, {items[0][0]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from PIL import Image
+from src import batch
+
+SHAPES = {
+    "RPf_00001": [(100, 100), (300, 100), (300, 300), (100, 300)],
+    "RPf_00002": [(100, 100), (300, 100), (200, 300)],
+    "RPf_00003": [(100, 100), (350, 120), (300, 300), (120, 250)]
+}
+
+
+def make_dataset(root):
+    coordinates_path = os.path.join(root, "csv")
+    os.makedirs(coordinates_path)
+    for piece_id, points in SHAPES.items():
+        xs, ys = [], []
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+            for t in np.linspace(0, 1, 20, endpoint=False):
+                xs.append(x1 + (x2 - x1) * t)
+                ys.append(y1 + (y2 - y1) * t)
+        pd.DataFrame({"x": xs, "y": ys}).to_csv(os.path.join(coordinates_path, f"{piece_id}.csv"), index=False)
+
+    objects = {"RPobj_g1_o0001": ["RPf_00001", "RPf_00002"], "RPobj_g1_o0002": ["RPf_00001", "RPf_00002", "RPf_00003"],
+               # more pieces than coordinates files
+               "RPobj_g1_o0003": ["RPf_00001", "RPf_00002", "RPf_00003", "RPf_00004"]}
+    dataset_root = os.path.join(root, "images")
+    for object_name, piece_ids in objects.items():
+        os.makedirs(os.path.join(dataset_root, object_name))
+        for piece_id in piece_ids:
+            Image.new("RGBA", (400, 400)).save(os.path.join(dataset_root, object_name, f"{piece_id}_intact_mesh.png"))
+
+    return dataset_root, coordinates_path
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dataset_root, self.coordinates_path = make_dataset(self.tmp_dir.name)
+        self.output_dir = os.path.join(self.tmp_dir.name, "results")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_batch(self, **kwargs):
+        return batch.run_batch(self.dataset_root, self.coordinates_path, self.output_dir,
+                               context_options={"simulator": "local"}, **kwargs)
+
+    def test_find_objects(self):
+        self.assertEqual(batch.find_objects(self.dataset_root), ["RPobj_g1_o0001", "RPobj_g1_o0002", "RPobj_g1_o0003"])
+
+    def test_solves_and_records_failures(self):
+        manifest = self.run_batch()
+
+        self.assertEqual(manifest["summary"], {"done": 2, "skipped": 0, "failed": 1})
+        self.assertEqual(list(manifest["objects"].keys()), ["RPobj_g1_o0001", "RPobj_g1_o0002", "RPobj_g1_o0003"])
+        self.assertIn("ValueError", manifest["objects"]["RPobj_g1_o0003"]["error"])
+        self.assertEqual(manifest["objects"]["RPobj_g1_o0002"]["stats"]["counters"]["pieces"], 3)
+        self.assertIn("final_assembly", manifest["objects"]["RPobj_g1_o0002"]["stats"]["stages"])
+        self.assertNotIn("segmenting", manifest["objects"]["RPobj_g1_o0003"]["stats"]["stages"])
+        self.assertEqual(len(pd.read_csv(os.path.join(self.output_dir, "RPobj_g1_o0002.csv"))), 3)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "RPobj_g1_o0003.csv")))
+        with open(os.path.join(self.output_dir, "manifest.json")) as f:
+            self.assertEqual(json.load(f), manifest)
+
+    def test_skips_completed_outputs(self):
+        self.run_batch(objects=["RPobj_g1_o0001"])
+        manifest = self.run_batch(objects=["RPobj_g1_o0001", "RPobj_g1_o0002"])
+        self.assertEqual(manifest["objects"]["RPobj_g1_o0001"]["status"], "skipped")
+        self.assertEqual(manifest["objects"]["RPobj_g1_o0002"]["status"], "done")
+
+        manifest = self.run_batch(objects=["RPobj_g1_o0001"], overwrite=True)
+        self.assertEqual(manifest["objects"]["RPobj_g1_o0001"]["status"], "done")
+
+    def test_traces(self):
+        traces_dir = os.path.join(self.tmp_dir.name, "traces")
+        self.run_batch(objects=["RPobj_g1_o0001"], traces_dir=traces_dir)
+        with open(os.path.join(traces_dir, "RPobj_g1_o0001.json")) as f:
+            stages = [event["name"] for event in json.load(f)["traceEvents"] if event["cat"] == "stage"]
+        self.assertEqual(stages[0], "load_pieces")
+        self.assertEqual(stages[-1], "final_assembly")
+
+    def test_process_pool(self):
+        sequential = self.run_batch(objects=["RPobj_g1_o0001", "RPobj_g1_o0002"])
+        expected = {name: pd.read_csv(record["output_path"]) for name, record in sequential["objects"].items()}
+
+        manifest = self.run_batch(objects=["RPobj_g1_o0001", "RPobj_g1_o0002"], workers=2, overwrite=True)
+        self.assertEqual(manifest["summary"]["done"], 2)
+        for name, record in manifest["objects"].items():
+            pd.testing.assert_frame_equal(pd.read_csv(record["output_path"]), expected[name])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import random
+from src.arbitrary_anchors.greedy_matcher import GreedyPairMatcher, parent_piece_id
+
+
+def reference_selection(pair2overlapping, num_pieces):
+    # the original greedy loop of main.py, rescanning all the pairs every iteration
+    pair2overlapping = dict(pair2overlapping)
+    best_pairs = []
+    pieces_with_best_pairs = []
+    while len(pieces_with_best_pairs) != num_pieces:
+        best_pair = None
+        min_overlapping = 999999999999
+        for pair, overlapping in pair2overlapping.items():
+            if overlapping < min_overlapping:
+                best_pair = pair
+                min_overlapping = overlapping
+        if best_pair is None:
+            break
+
+        best_pairs.append(best_pair)
+        best_parents = {parent_piece_id(best_pair[0]), parent_piece_id(best_pair[1])}
+        pieces_with_best_pairs += [parent for parent in best_parents if parent not in pieces_with_best_pairs]
+        for conf_pair in list(pair2overlapping):
+            if {parent_piece_id(conf_pair[0]), parent_piece_id(conf_pair[1])} == best_parents \
+                    or best_pair[0] in conf_pair or best_pair[1] in conf_pair:
+                del pair2overlapping[conf_pair]
+
+    return best_pairs
+
+
+def make_pairs(num_pieces, confs_per_piece, seed):
+    rng = random.Random(seed)
+    confs = [f"frag_P{p}-&[{c}, 0]" for p in range(num_pieces) for c in range(confs_per_piece)]
+    pair2overlapping = {}
+    for i, conf1 in enumerate(confs):
+        for conf2 in confs[i + 1:]:
+            if parent_piece_id(conf1) != parent_piece_id(conf2):
+                # few distinct values, to have ties
+                pair2overlapping[(conf1, conf2)] = rng.randint(0, 20) / 10
+    return pair2overlapping
+
+
+class TestGreedyPairMatcher(unittest.TestCase):
+
+    def test_same_as_rescanning(self):
+        for seed in range(20):
+            pair2overlapping = make_pairs(6, 3, seed)
+            self.assertEqual(GreedyPairMatcher(pair2overlapping).select(6), reference_selection(pair2overlapping, 6))
+
+    def test_explicit_pieces(self):
+        pair2overlapping = {("a", "b"): 0.5, ("a", "c"): 0.1, ("d", "b"): 0.2, ("d", "c"): 0.7}
+        pair2pieces = {("a", "b"): ("P1", "P2"), ("a", "c"): ("P1", "P2"), ("d", "b"): ("P1", "P2"), ("d", "c"): ("P1", "P2")}
+        matcher = GreedyPairMatcher(pair2overlapping, pair2pieces)
+        self.assertEqual(matcher.select(), [("a", "c")])
+        self.assertEqual(matcher.covered_pieces, {"P1", "P2"})
+
+    def test_counters(self):
+        pair2overlapping = {("frag_A-1", "frag_B-1"): 0.1, ("frag_A-1", "frag_C-1"): 0.2, ("frag_B-2", "frag_C-1"): 0.3,
+                            ("frag_B-2", "frag_D-1"): 0.4}
+        matcher = GreedyPairMatcher(pair2overlapping)
+        self.assertEqual(matcher.select(4), [("frag_A-1", "frag_B-1"), ("frag_B-2", "frag_C-1")])
+        # the conflicting pairs popped from the heap are no greedy steps
+        self.assertEqual(matcher.num_selections, 2)
+        self.assertEqual(matcher.num_pops, 4)
+
+    def test_skips_invalid_overlapping(self):
+        pair2overlapping = {("frag_A-1", "frag_B-1"): float("nan"), ("frag_A-2", "frag_C-1"): float("inf"),
+                            ("frag_B-2", "frag_C-2"): 999999999999, ("frag_A-3", "frag_D-1"): 3}
+        matcher = GreedyPairMatcher(pair2overlapping)
+        self.assertEqual(matcher.pop_best(), (("frag_A-3", "frag_D-1"), 3))
+        self.assertIsNone(matcher.pop_best())
+
+    def test_stops_when_exhausted(self):
+        pair2overlapping = {("frag_A-1", "frag_B-1"): 1, ("frag_A-1", "frag_C-1"): 0}
+        self.assertEqual(GreedyPairMatcher(pair2overlapping).select(3), [("frag_A-1", "frag_C-1")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import sys
 sys.path.append("geometric_greedy_solver")
 
 import unittest
+from unittest import mock
 from src.assembler.my_http_client import SpringsHTTPClient 
 import json
 
@@ -34,5 +35,57 @@ class TestHTTPClient(unittest.TestCase):
         print(res)
 
 
+
+class FakeResponse():
+    def __init__(self, status, payload=None, reason=""):
+        self.status = status
+        self.reason = reason
+        self.data = json.dumps(payload).encode('utf-8')
+
+
+class TestBatchReconstruction(unittest.TestCase):
+
+    def setUp(self):
+        self.bodies = [{"matings": [{"firstPiece": f"RPf_{i:05d}_intact_mesh", "firstPieceLocalCoords": [i, i],
+                                     "secondPiece": "RPf_00197_intact_mesh", "secondPieceLocalCoords": [66, 493]}]}
+                       for i in range(3)]
+
+    def test_batch_endpoint(self):
+        http = SpringsHTTPClient()
+        responses = [{"piecesFinalCoords": [], "index": i} for i in range(3)]
+        with mock.patch.object(http.http, "request", return_value=FakeResponse(200, responses)) as request:
+            res = http.send_reconstruct_batch_request(self.bodies, collision="Off")
+
+        self.assertEqual(res, responses)
+        self.assertEqual(request.call_count, 1)
+        method, target = request.call_args[0]
+        self.assertEqual(method, 'POST')
+        self.assertTrue(target.endswith("/reconstructions/batch?collision=Off"))
+        self.assertEqual(json.loads(request.call_args[1]["body"]), {"problems": self.bodies})
+
+    def test_fallback_to_single_requests(self):
+        http = SpringsHTTPClient()
+
+        def fake_request(method, target, body=None, headers=None):
+            if "/batch" in target:
+                return FakeResponse(404, reason="Not Found")
+            return FakeResponse(200, {"echo": json.loads(body)})
+
+        with mock.patch.object(http.http, "request", side_effect=fake_request) as request:
+            res = http.send_reconstruct_batch_request(self.bodies)
+            self.assertEqual(res, [{"echo": body} for body in self.bodies])
+            self.assertEqual(request.call_count, 1 + len(self.bodies))
+
+            # the batch endpoint is not tried again
+            http.send_reconstruct_batch_request(self.bodies)
+            self.assertEqual(request.call_count, 1 + 2 * len(self.bodies))
+
+    def test_batch_errors_are_raised(self):
+        http = SpringsHTTPClient()
+        with mock.patch.object(http.http, "request", return_value=FakeResponse(500, reason="Internal Server Error")):
+            with self.assertRaises(Exception):
+                http.send_reconstruct_batch_request(self.bodies)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import unittest
+import subprocess
+import sys
+import os
+
+# Evaluation and solver workers are short lived, so their import cost is paid again for every task
+IMPORT_TIME_BUDGET_SECONDS = 2.0
+HEAVY_MODULES = ["matplotlib", "sklearn", "scipy.ndimage", "scipy.sparse", "skimage"]
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def import_times(code, cwd=REPO_DIR):
+    '''
+    Runs code in a fresh interpreter with -X importtime and returns the cumulative import time (in microseconds) of every imported module
+    '''
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, capture_output=True, text=True, check=True)
+    times = {}
+    top_level_total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+        if not name[1:].startswith(" "):
+            top_level_total += int(cumulative)
+    return times, top_level_total
+
+
+def import_script_code(script_name):
+    return f"import importlib.util as u; s = u.spec_from_file_location('m', {script_name!r}); s.loader.exec_module(u.module_from_spec(s))"
+
+
+class TestImportTime(unittest.TestCase):
+
+    def assert_fast_import(self, code, cwd=REPO_DIR):
+        times, total = import_times(code, cwd)
+        for heavy_module in HEAVY_MODULES:
+            self.assertNotIn(heavy_module, times, f"{heavy_module} is imported")
+        self.assertLess(total / 1e6, IMPORT_TIME_BUDGET_SECONDS)
+
+    def test_reconstruction_evaluation(self):
+        self.assert_fast_import(import_script_code("2D_reconstruction_evaluation.py"))
+
+    def test_adjacency_based_evaluation(self):
+        self.assert_fast_import(import_script_code("2D_adjacency_based_evaluation.py"))
+
+    def test_mating_graph(self):
+        self.assert_fast_import("from src.arbitrary_anchors import mating_graph", cwd=os.path.join(REPO_DIR, "geometric_greedy_solver"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.instrumentation import PipelineStats, LATENCY_BUCKETS_MS
+from src.solver_context import SolverContext
+from src.assembler import physical_assemler
+from src.assembler.local_simulator import LocalRigidSimulator
+from src.assembler.matings import VertexMating
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10)]
+
+
+class TestPipelineStats(unittest.TestCase):
+
+    def test_stages_add_up(self):
+        stats = PipelineStats()
+        for _ in range(2):
+            with stats.stage("segmenting"):
+                time.sleep(0.01)
+        with stats.stage("mating_graph"):
+            pass
+
+        stages = stats.to_dict()["stages"]
+        self.assertEqual(list(stages.keys()), ["segmenting", "mating_graph"])
+        self.assertEqual(stages["segmenting"]["calls"], 2)
+        self.assertGreaterEqual(stages["segmenting"]["seconds"], 0.02)
+
+    def test_stage_timed_on_error(self):
+        stats = PipelineStats()
+        with self.assertRaises(ValueError):
+            with stats.stage("simulate_pairs"):
+                raise ValueError()
+        self.assertEqual(stats.to_dict()["stages"]["simulate_pairs"]["calls"], 1)
+
+    def test_counters(self):
+        stats = PipelineStats()
+        stats.count("pairs")
+        stats.count("pairs", 4)
+        stats.set("graph_nodes", 12)
+        self.assertEqual(stats.to_dict()["counters"], {"pairs": 5, "graph_nodes": 12})
+
+    def test_requests_from_threads(self):
+        stats = PipelineStats()
+
+        def request(i):
+            with stats.request(num_simulations=2):
+                time.sleep(0.001 * (i % 3))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(request, range(100)))
+
+        result = stats.to_dict()
+        self.assertEqual(result["counters"], {"requests": 100, "requested_simulations": 200})
+        histogram = result["request_latency"]
+        self.assertEqual(histogram["count"], 100)
+        self.assertEqual(sum(histogram["counts"]), 100)
+        self.assertEqual(len(histogram["counts"]), len(LATENCY_BUCKETS_MS) + 1)
+        self.assertLessEqual(histogram["p50_ms"], histogram["max_ms"])
+
+    def test_empty_histogram(self):
+        histogram = PipelineStats().latency_histogram()
+        self.assertEqual((histogram["count"], sum(histogram["counts"])), (0, 0))
+        self.assertNotIn("mean_ms", histogram)
+
+    def test_write_json_and_trace(self):
+        stats = PipelineStats()
+        with stats.stage("final_assembly"):
+            with stats.request():
+                pass
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stats.write_json(os.path.join(tmp_dir, "stats", "stats.json"))
+            stats.write_chrome_trace(os.path.join(tmp_dir, "trace.json"))
+            with open(os.path.join(tmp_dir, "stats", "stats.json")) as f:
+                self.assertEqual(json.load(f)["stages"]["final_assembly"]["calls"], 1)
+            with open(os.path.join(tmp_dir, "trace.json")) as f:
+                events = json.load(f)["traceEvents"]
+
+        self.assertEqual([(event["name"], event["cat"], event["ph"]) for event in events],
+                         [("request", "http", "X"), ("final_assembly", "stage", "X")])
+        self.assertLessEqual(events[1]["ts"], events[0]["ts"])
+
+
+class TestSimulationRequestsStats(unittest.TestCase):
+
+    def test_requests_of_context(self):
+        context = SolverContext(simulator=LocalRigidSimulator({"A_intact_mesh": SQUARE, "B_intact_mesh": SQUARE}))
+        matings = [VertexMating("A_intact_mesh", [10, 0], "B_intact_mesh", [0, 0])]
+        physical_assemler.simulate(matings, context=context)
+        physical_assemler.simulate_batch([matings, matings, matings], context=context)
+
+        counters = context.stats.to_dict()["counters"]
+        self.assertEqual(counters, {"requests": 2, "requested_simulations": 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import math
+import numpy as np
+from unittest import mock
+from src.assembler.local_simulator import LocalRigidSimulator, rigid_align
+from src.assembler import physical_assemler
+from src.assembler.matings import VertexMating
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10)]
+
+
+def transform(points, angle, translation):
+    points = np.asarray(points, dtype=float)
+    rotation = np.array([[math.cos(angle), -math.sin(angle)], [math.sin(angle), math.cos(angle)]])
+    return points @ rotation.T + np.asarray(translation)
+
+
+class TestRigidAlign(unittest.TestCase):
+
+    def test_recovers_transformation(self):
+        src = [(0, 0), (3, 1), (5, 7)]
+        dst = transform(src, 0.7, (4, -2))
+        angle, translation = rigid_align(src, dst)
+        self.assertAlmostEqual(angle, 0.7)
+        np.testing.assert_allclose(translation, [4, -2], atol=1e-9)
+
+    def test_single_pair_keeps_rotation(self):
+        angle, translation = rigid_align([(1, 2)], [(4, 4)])
+        self.assertEqual(angle, 0.0)
+        np.testing.assert_allclose(translation, [3, 2])
+
+    def test_fixed_angle(self):
+        src = [(0, 0), (3, 1)]
+        dst = transform(src, 0.7, (4, -2))
+        angle, translation = rigid_align(src, dst, angle=0.7)
+        self.assertEqual(angle, 0.7)
+        np.testing.assert_allclose(translation, [4, -2], atol=1e-9)
+
+
+class TestLocalRigidSimulator(unittest.TestCase):
+
+    def setUp(self):
+        # the second square, rotated by 90 degrees around its origin, shares the edge x=10 of the first one
+        self.simulator = LocalRigidSimulator({"A_intact_mesh": SQUARE, "B_intact_mesh": SQUARE})
+        self.matings = [
+            {"firstPiece": "A_intact_mesh", "firstPieceLocalCoords": [10, 0], "secondPiece": "B_intact_mesh", "secondPieceLocalCoords": [0, 0]},
+            {"firstPiece": "A_intact_mesh", "firstPieceLocalCoords": [10, 10], "secondPiece": "B_intact_mesh", "secondPieceLocalCoords": [10, 0]}
+        ]
+
+    def test_response_shape(self):
+        response = self.simulator.reconstruct({"matings": self.matings})
+        self.assertEqual([p["pieceId"] for p in response["piecesFinalCoords"]], ["A_intact_mesh", "B_intact_mesh"])
+        self.assertEqual([p["pieceId"] for p in response["piecesFinalTransformations"]], ["A_intact_mesh", "B_intact_mesh"])
+        anchor = response["piecesFinalTransformations"][0]
+        self.assertEqual((anchor["rotationRadians"], anchor["translateVectorX"], anchor["translateVectorY"]), (0.0, 0.0, 0.0))
+
+    def test_mated_vertices_meet(self):
+        response = self.simulator.reconstruct({"matings": self.matings})
+        tsfm = response["piecesFinalTransformations"][1]
+        self.assertAlmostEqual(tsfm["rotationRadians"], math.pi / 2)
+        coords = np.array(response["piecesFinalCoords"][1]["coordinates"])
+        np.testing.assert_allclose(coords, transform(SQUARE, math.pi / 2, (10, 0)), atol=1e-9)
+
+    def test_fixed_rotation_of_anchor(self):
+        body = {"matings": self.matings, "fixedRotation": [{"piece": "A_intact_mesh", "initialAngleRadians": 0.5}]}
+        response = self.simulator.reconstruct(body)
+        self.assertEqual(response["piecesFinalTransformations"][0]["rotationRadians"], 0.5)
+        coords = np.array(response["piecesFinalCoords"][1]["coordinates"])
+        np.testing.assert_allclose(coords, transform(transform(SQUARE, math.pi / 2, (10, 0)), 0.5, (0, 0)), atol=1e-9)
+
+    def test_propagates_through_chain(self):
+        simulator = LocalRigidSimulator({"A_intact_mesh": SQUARE, "B_intact_mesh": SQUARE, "C_intact_mesh": SQUARE})
+        matings = [
+            {"firstPiece": "C_intact_mesh", "firstPieceLocalCoords": [0, 0], "secondPiece": "B_intact_mesh", "secondPieceLocalCoords": [0, 10]},
+            {"firstPiece": "C_intact_mesh", "firstPieceLocalCoords": [10, 0], "secondPiece": "B_intact_mesh", "secondPieceLocalCoords": [10, 10]}
+        ] + self.matings
+        response = simulator.reconstruct({"matings": matings})
+        # C is the anchor, B is placed on top of it and A through B
+        coords = {p["pieceId"]: np.array(p["coordinates"]) for p in response["piecesFinalCoords"]}
+        np.testing.assert_allclose(coords["B_intact_mesh"], transform(SQUARE, 0, (0, -10)), atol=1e-9)
+        np.testing.assert_allclose(coords["A_intact_mesh"], transform(SQUARE, -math.pi / 2, (0, 0)), atol=1e-9)
+
+    def test_simulate_backend(self):
+        matings = [VertexMating("A_intact_mesh", [10, 0], "B_intact_mesh", [0, 0]), VertexMating("A_intact_mesh", [10, 10], "B_intact_mesh", [10, 0])]
+        with mock.patch.object(physical_assemler, "http_", self.simulator), \
+             mock.patch.object(physical_assemler, "response_cache_", None):
+            response = physical_assemler.simulate(matings)
+        self.assertAlmostEqual(response["piecesFinalTransformations"][1]["rotationRadians"], math.pi / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import random
+from unittest import mock
+from src.piece import Piece
+from src.arbitrary_anchors import mating_graph
+from src.arbitrary_anchors.anchor_conf import AnchorConf
+from src.arbitrary_anchors import pair_filters
+
+
+def make_confs(num_pieces, num_segments, seed=0):
+    rng = random.Random(seed)
+    confs = []
+    for p in range(num_pieces):
+        piece = Piece(f"RPf_{p:05d}", None, None, count_in_shared_parameters=False)
+        points = [[rng.randint(0, 100), rng.randint(0, 100)] for _ in range(num_segments)]
+        for ii in range(num_segments):
+            anchors = [points[ii], points[(ii + 1) % num_segments]]
+            confs.append(AnchorConf(anchors, piece))
+            confs.append(AnchorConf(list(reversed(anchors)), piece))
+    return confs
+
+
+class TestLeanMatingGraph(unittest.TestCase):
+
+    def tearDown(self):
+        mating_graph.initGraph([])
+
+    def test_same_pairing_as_networkx(self):
+        confs = make_confs(4, 5)
+        mating_graph.initGraph(confs)
+        full_pairs = mating_graph.get_confs_pairing()
+        full_edges = mating_graph.get_inter_piece_edges(is_data=False)
+
+        mating_graph.initGraph(confs, lean=True)
+        lean_pairs = mating_graph.get_confs_pairing()
+
+        self.assertEqual(list(lean_pairs.keys()), list(full_pairs.keys()))
+        for pair in full_pairs:
+            self.assertIs(lean_pairs[pair][0], full_pairs[pair][0])
+            self.assertIs(lean_pairs[pair][1], full_pairs[pair][1])
+        self.assertEqual(mating_graph.get_inter_piece_edges(is_data=False), full_edges)
+        self.assertEqual(len(mating_graph.graph_.edges), 0)
+        for (node1, node2), (conf1, conf2) in full_pairs.items():
+            self.assertIs(mating_graph.get_node_data(node1)["conf"], conf1)
+            self.assertIs(mating_graph.get_node_data(node2)["conf"], conf2)
+
+    def test_min_length_ratio(self):
+        confs = make_confs(3, 6, seed=1)
+        mating_graph.initGraph(confs, lean=True, min_length_ratio=0.9)
+        pairs = mating_graph.get_confs_pairing()
+        num_dropped = mating_graph.default_graph_.get_num_dropped_by_length()
+
+        # the same pairs as the filter of the full graph
+        mating_graph.initGraph(confs)
+        self.assertEqual(mating_graph.default_graph_.get_num_dropped_by_length(), 0)
+        expected, expected_stats = pair_filters.filter_pairs(mating_graph.get_confs_pairing(), min_length_ratio=0.9)
+        self.assertEqual(list(pairs.keys()), list(expected.keys()))
+        self.assertEqual(num_dropped, expected_stats["dropped_by_length"])
+        _, lean_stats = pair_filters.filter_pairs(pairs)
+        self.assertEqual(pair_filters.add_dropped_by_length(lean_stats, num_dropped), expected_stats)
+        self.assertLess(len(pairs), len(mating_graph.get_confs_pairing()))
+
+    def test_remove_edges(self):
+        mating_graph.initGraph(make_confs(3, 3), lean=True)
+        edges = mating_graph.get_inter_piece_edges(is_data=False)
+        mating_graph.remove_edges([edges[1], tuple(reversed(edges[4]))])
+        self.assertEqual(mating_graph.get_inter_piece_edges(is_data=False), [edges[0], edges[2], edges[3]] + edges[5:])
+
+    def test_cannot_draw(self):
+        mating_graph.initGraph(make_confs(2, 3), lean=True)
+        with self.assertRaises(ValueError):
+            mating_graph.draw()
+
+    def test_segment_length(self):
+        self.assertEqual(AnchorConf([[0, 0], [3, 4], [3, 10]], None).segment_length(), 11)
+
+
+class TestLazyLayout(unittest.TestCase):
+
+    def tearDown(self):
+        mating_graph.initGraph([])
+
+    def test_layout_only_when_drawing(self):
+        with mock.patch.object(mating_graph.nx, "kamada_kawai_layout", wraps=mating_graph.nx.kamada_kawai_layout) as layout:
+            mating_graph.initGraph(make_confs(2, 2))
+            self.assertIsNone(mating_graph.pos_)
+            self.assertEqual(layout.call_count, 0)
+
+            pos = mating_graph.get_layout()
+            self.assertEqual(set(pos.keys()), set(mating_graph.graph_.nodes))
+            self.assertIs(mating_graph.get_layout(), pos)
+            self.assertEqual(layout.call_count, 1)
+
+            mating_graph.remove_edges(mating_graph.get_inter_piece_edges(is_data=False)[:1])
+            self.assertIsNone(mating_graph.pos_)
+            self.assertEqual(layout.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import math
+from src.assembler.overlap_scorer import OverlapScorer
+from src.assembler.local_simulator import LocalRigidSimulator
+from src.assembler import physical_assemler
+from src.arbitrary_anchors import compatibilities
+
+POLYGONS = {
+    "A_intact_mesh": [(0, 0), (10, 0), (10, 10), (0, 10)],
+    "B_intact_mesh": [(0, 0), (20, 0), (20, 5), (0, 5)],
+    "C_intact_mesh": [(0, 0), (8, 0), (4, 6)]
+}
+
+
+def make_response(pieces, transformations):
+    simulator = LocalRigidSimulator(POLYGONS)
+    response = {"piecesFinalCoords": [], "piecesFinalTransformations": []}
+    for piece, (angle, tx, ty) in zip(pieces, transformations):
+        coords = [[math.cos(angle) * x - math.sin(angle) * y + tx, math.sin(angle) * x + math.cos(angle) * y + ty]
+                  for x, y in simulator.get_polygon_coords(piece)]
+        response["piecesFinalCoords"].append({"pieceId": piece, "coordinates": coords})
+        response["piecesFinalTransformations"].append({"pieceId": piece, "rotationRadians": angle,
+                                                       "translateVectorX": tx, "translateVectorY": ty})
+    return response
+
+
+class TestOverlapScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.responses = [
+            make_response(["A_intact_mesh", "B_intact_mesh"], [(0, 0, 0), (0.3, 5, 2)]),
+            make_response(["A_intact_mesh", "C_intact_mesh"], [(1.2, 3, 3), (-2, 10, 4)]),
+            make_response(["B_intact_mesh", "C_intact_mesh"], [(0, 0, 0), (0, 100, 100)]),
+            make_response(["A_intact_mesh", "B_intact_mesh", "C_intact_mesh"], [(0, 0, 0), (0.5, 2, 1), (2, 6, 6)])
+        ]
+
+    def test_same_as_score_pairwise(self):
+        scores = OverlapScorer().score_many(self.responses)
+        for response, score in zip(self.responses, scores):
+            self.assertAlmostEqual(score, physical_assemler.score_pairwise(response), places=6)
+        self.assertEqual(scores[2], 0)
+
+    def test_overlapping_with_scorer(self):
+        pair2response = {f"pair{i}": response for i, response in enumerate(self.responses)}
+        bulk = compatibilities.overlapping(pair2response, scorer=OverlapScorer())
+        one_by_one = compatibilities.overlapping(pair2response)
+        self.assertEqual(list(bulk.keys()), list(pair2response.keys()))
+        for pair in pair2response:
+            self.assertAlmostEqual(bulk[pair], one_by_one[pair], places=6)
+
+    def test_scores_final_coords(self):
+        # the polygons are the final coordinates, whatever the transformations of the response
+        response = make_response(["A_intact_mesh", "B_intact_mesh"], [(0, 0, 0), (0.3, 5, 2)])
+        for tsfm in response["piecesFinalTransformations"]:
+            tsfm["translateVectorX"] += 1000
+        self.assertAlmostEqual(OverlapScorer().score(response), physical_assemler.score_pairwise(response), places=6)
+
+    def test_invalid_polygon(self):
+        self_crossing = [[0, 0], [20, 0], [20, 10], [5, -5], [0, 10]]
+        responses = [{"piecesFinalCoords": [{"pieceId": "A_intact_mesh", "coordinates": POLYGONS["A_intact_mesh"]},
+                                            {"pieceId": "D_intact_mesh", "coordinates": coords}]}
+                     for coords in (self_crossing, [[5, 5], [15, 5], [15, 15], [5, 15]])]
+        scores = OverlapScorer().score_many(responses)
+        for response, score in zip(responses, scores):
+            self.assertAlmostEqual(score, physical_assemler.score_pairwise(response), places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
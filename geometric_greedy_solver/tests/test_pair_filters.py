@@ -0,0 +1,58 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+from shapely import Polygon
+from src.piece import Piece
+from src.arbitrary_anchors.anchor_conf import AnchorConf
+from src.arbitrary_anchors import pair_filters
+
+
+def make_piece(piece_id, coords):
+    piece = Piece(piece_id, None, None, count_in_shared_parameters=False)
+    piece.polygon = Polygon(coords)
+    return piece
+
+
+class TestPairFilters(unittest.TestCase):
+
+    def setUp(self):
+        # a square and a "house" whose roof is a bent contour between (0,10) and (10,10)
+        self.square = make_piece("square", [(0, 0), (10, 0), (10, 10), (0, 10)])
+        self.house = make_piece("house", [(0, 0), (10, 0), (10, 10), (5, 15), (0, 10)])
+        self.long = make_piece("long", [(0, 0), (30, 0), (30, 1), (0, 1)])
+
+    def test_length_ratio(self):
+        conf1 = AnchorConf([[0, 0], [10, 0]], self.square)
+        conf2 = AnchorConf([[0, 0], [30, 0]], self.long)
+        self.assertAlmostEqual(pair_filters.length_ratio(conf1, conf2), 1 / 3)
+        self.assertEqual(pair_filters.length_ratio(conf2, conf1), pair_filters.length_ratio(conf1, conf2))
+        self.assertEqual(pair_filters.length_ratios([10, 0, 3], [30, 0, 0]).tolist(), [1 / 3, 1, 0])
+
+    def test_curvature_signature(self):
+        straight = AnchorConf([[0, 10], [10, 10]], self.square)
+        bent = AnchorConf([[10, 10], [0, 10]], self.house)
+        self.assertAlmostEqual(pair_filters.curvature_signature(straight), 1)
+        self.assertAlmostEqual(pair_filters.curvature_signature(bent), 2 * 50 ** 0.5 / 10)
+
+    def test_filter_pairs(self):
+        square_top = AnchorConf([[0, 10], [10, 10]], self.square)
+        house_roof = AnchorConf([[10, 10], [0, 10]], self.house)
+        house_bottom = AnchorConf([[10, 0], [0, 0]], self.house)
+        long_side = AnchorConf([[30, 0], [0, 0]], self.long)
+        pairs2confs = {"roof": (square_top, house_roof), "bottom": (square_top, house_bottom), "long": (square_top, long_side)}
+
+        kept, stats = pair_filters.filter_pairs(pairs2confs)
+        self.assertEqual(list(kept.keys()), ["roof", "bottom", "long"])
+
+        kept, stats = pair_filters.filter_pairs(pairs2confs, min_length_ratio=0.5, curvature_tolerance=0.1)
+        self.assertEqual(list(kept.keys()), ["bottom"])
+        self.assertEqual(stats, {"total": 3, "dropped_by_length": 1, "dropped_by_curvature": 1, "kept": 1, "dropped_fraction": 2 / 3})
+
+    def test_no_pairs(self):
+        kept, stats = pair_filters.filter_pairs({}, min_length_ratio=0.5)
+        self.assertEqual((kept, stats["dropped_fraction"]), ({}, 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,9 @@ import matplotlib.pyplot as plt
 from shapely import Polygon,Point
 from PIL import Image
 from src.assembler import restore_assembly_img
+from src.assembler.overlap_scorer import OverlapScorer
+from src.arbitrary_anchors import compatibilities
+import copy
 
 
 class TestSimulation(unittest.TestCase):
@@ -469,6 +472,19 @@ class TestDataRetrieval(unittest.TestCase):
 ]
     }
 
+    def test_overlap_scorer(self):
+        # the final coordinates of the springs server, and the same response with the second piece moved onto the first
+        moved = copy.deepcopy(self.toy_example_response)
+        moved_coords = moved["piecesFinalCoords"][1]["coordinates"]
+        moved["piecesFinalCoords"][1]["coordinates"] = [[x+100,y+100] for x,y in moved_coords]
+        pair2response = {"toy":self.toy_example_response,"moved":moved}
+
+        bulk = compatibilities.overlapping(pair2response,scorer=OverlapScorer())
+        baseline = compatibilities.overlapping(pair2response)
+        for pair in pair2response:
+            self.assertAlmostEqual(bulk[pair],baseline[pair],places=6)
+        self.assertGreater(bulk["moved"],bulk["toy"])
+
     def test_translation_vector(self):
         RPf_00194 = Piece("RPf_00194","RPobj_g28_o0028")
         RPf_00194.load_polygon()
@@ -0,0 +1,113 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import math
+import random
+import time
+import threading
+from unittest import mock
+from src.arbitrary_anchors import recipes
+from src.arbitrary_anchors.anchor_conf import AnchorConf
+
+
+class FakePiece():
+    def __init__(self, name):
+        self.name = name
+
+    def get_full_name(self):
+        return self.name
+
+
+def fake_simulate(matings, isDebug=False, **kwargs):
+    # answers in a random order, like a busy server
+    time.sleep(random.random() * 0.01)
+    return {"matings": [mating.as_dict() for mating in matings]}
+
+
+class TestConcurrentSimulation(unittest.TestCase):
+
+    def setUp(self):
+        pieces = [FakePiece(f"RPf_{i:05d}_intact_mesh") for i in range(6)]
+        confs = [AnchorConf([[i, 0], [0, i]], piece) for i, piece in enumerate(pieces)]
+        self.pairs2confs = {f"{conf1}<->{conf2}": (conf1, conf2) for i, conf1 in enumerate(confs) for conf2 in confs[i + 1:]}
+
+    def test_same_responses_in_same_order(self):
+        with mock.patch.object(recipes.physical_assemler, "simulate", side_effect=fake_simulate):
+            sequential = recipes.simulate(self.pairs2confs)
+            concurrent = recipes.simulate(self.pairs2confs, max_workers=4)
+
+        self.assertEqual(list(sequential.keys()), list(self.pairs2confs.keys()))
+        self.assertEqual(list(concurrent.keys()), list(sequential.keys()))
+        self.assertEqual(concurrent, sequential)
+
+    def test_batches(self):
+        def fake_simulate_batch(matings_list, isDebug=False, **kwargs):
+            return [fake_simulate(matings) for matings in matings_list]
+
+        with mock.patch.object(recipes.physical_assemler, "simulate", side_effect=fake_simulate):
+            sequential = recipes.simulate(self.pairs2confs)
+        with mock.patch.object(recipes.physical_assemler, "simulate_batch", side_effect=fake_simulate_batch) as simulate_batch:
+            batched = recipes.simulate(self.pairs2confs, batch_size=4)
+            self.assertEqual(simulate_batch.call_count, 4)
+            concurrent_batches = recipes.simulate(self.pairs2confs, max_workers=2, batch_size=4)
+
+        self.assertEqual(list(batched.keys()), list(sequential.keys()))
+        self.assertEqual(batched, sequential)
+        self.assertEqual(concurrent_batches, sequential)
+
+    def test_bounded_in_flight(self):
+        lock = threading.Lock()
+        state = {"in_flight": 0, "max_in_flight": 0}
+
+        def counting_simulate(matings, **kwargs):
+            with lock:
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            response = fake_simulate(matings)
+            with lock:
+                state["in_flight"] -= 1
+            return response
+
+        with mock.patch.object(recipes.physical_assemler, "simulate", side_effect=counting_simulate):
+            recipes.simulate(self.pairs2confs, max_workers=3)
+
+        self.assertLessEqual(state["max_in_flight"], 3)
+
+    def test_errors_are_raised(self):
+        with mock.patch.object(recipes.physical_assemler, "simulate", side_effect=ConnectionError("server down")):
+            with self.assertRaises(ConnectionError):
+                recipes.simulate(self.pairs2confs, max_workers=2)
+
+
+class TestAlign(unittest.TestCase):
+
+    def test_stacks_shortest_conf(self):
+        conf1 = AnchorConf([[0, 0], [10, 0], [10, 10]], FakePiece("A"))
+        conf2 = AnchorConf([[1, 1]], FakePiece("B"))
+        pairs, first_points, second_points, weights = recipes.stack_conf_pairs({"pair": (conf1, conf2), "other": (conf1, conf1)})
+
+        self.assertEqual(pairs, ["pair", "other"])
+        self.assertEqual(first_points.shape, (2, 3, 2))
+        self.assertEqual(weights.tolist(), [[1, 0, 0], [1, 1, 1]])
+        self.assertEqual(second_points[0, 0].tolist(), [1, 1])
+
+    def test_aligns_second_piece_onto_first(self):
+        conf1 = AnchorConf([[10, 0], [10, 10]], FakePiece("A"))
+        conf2 = AnchorConf([[0, 0], [10, 0]], FakePiece("B"))
+        conf3 = AnchorConf([[3, 4]], FakePiece("C"))
+        pairs, angles, translations = recipes.align({"AB": (conf1, conf2), "AC": (conf1, conf3)})
+
+        self.assertEqual(pairs, ["AB", "AC"])
+        self.assertAlmostEqual(angles[0], math.pi / 2)
+        self.assertEqual(translations[0].round(9).tolist(), [10, 0])
+        self.assertEqual(angles[1], 0)
+        self.assertEqual(translations[1].tolist(), [7, -4])
+
+    def test_no_pairs(self):
+        pairs, angles, translations = recipes.align({})
+        self.assertEqual((len(pairs), angles.shape, translations.shape), (0, (0,), (0, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import importlib.util
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_script(script_name, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIR, script_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+evaluation = load_script("2D_reconstruction_evaluation.py", "reconstruction_evaluation")
+
+
+def make_piece(rng, size):
+    # an RGBA piece: a blob of random pixels inside a transparent margin
+    width, height = size
+    alpha = np.zeros((height, width), dtype=np.uint8)
+    x0, y0 = rng.integers(0, width // 3), rng.integers(0, height // 3)
+    x1, y1 = rng.integers(2 * width // 3, width), rng.integers(2 * height // 3, height)
+    alpha[y0:y1, x0:x1] = 255 * (rng.random((y1 - y0, x1 - x0)) < 0.8)
+    rgb = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return Image.fromarray(np.dstack([rgb, alpha]), "RGBA")
+
+
+def alpha_mask(image):
+    return np.array(image.getchannel("A")) > 0
+
+
+def mask_on(bitmask, size):
+    return np.array(bitmask.to_image(size)) > 0
+
+
+def baseline_rmse_with_anchor(pieces_dir, results_csv, ground_truth_csv, pxls_to_m_scaler=(1/7.369)):
+    # calculate_rmse_with_anchor before the TransformationTable, on pandas DataFrames
+    results_df = pd.read_csv(results_csv)
+    ground_truth_df = pd.read_csv(ground_truth_csv)
+    merged_df = pd.merge(results_df, ground_truth_df, on='rpf', suffixes=('_result', '_gt'))
+
+    largest_piece = evaluation.find_largest_fragment(pieces_dir)
+    gt_largest_piece = ground_truth_df[ground_truth_df['rpf'] == largest_piece].iloc[0]
+    results_largest_piece = results_df[results_df['rpf'] == largest_piece].iloc[0]
+    dx = int(gt_largest_piece['x'] - results_largest_piece['x'])
+    dy = int(gt_largest_piece['y'] - results_largest_piece['y'])
+    drot = (gt_largest_piece['rot'] - results_largest_piece['rot'] + 360) % 360
+
+    merged_df = merged_df[merged_df['rpf'] != largest_piece]
+    merged_df['x_result'] = merged_df['x_result'] + dx
+    merged_df['y_result'] = merged_df['y_result'] + dy
+    merged_df['rot_result'] = (merged_df['rot_result'] + drot) % 360
+
+    rmse_translation = np.average(np.sqrt((merged_df['x_result'] - merged_df['x_gt'])**2 +
+                                          (merged_df['y_result'] - merged_df['y_gt'])**2) * pxls_to_m_scaler) * 1/np.sqrt(2)
+    rmse_rot = 1/np.sqrt(2) * np.average(np.sqrt((merged_df['rot_result'] % 360 - merged_df['rot_gt'] % 360)**2))
+    return {'RMSE_rot': rmse_rot % 360, 'RMSE_translation': rmse_translation}
+
+
+class TestBitMask(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_same_as_alpha_channel(self):
+        for _ in range(20):
+            image = make_piece(self.rng, tuple(self.rng.integers(8, 60, 2)))
+            mask = evaluation.BitMask.from_image(image)
+            self.assertEqual(mask.area(), np.sum(alpha_mask(image)))
+            np.testing.assert_array_equal(mask_on(mask, image.size), alpha_mask(image))
+
+    def test_intersection_area(self):
+        for _ in range(20):
+            image1 = make_piece(self.rng, (40, 30))
+            image2 = make_piece(self.rng, (40, 30))
+            dx, dy = self.rng.integers(-20, 20, 2)
+            mask1 = evaluation.BitMask.from_image(image1)
+            mask2 = evaluation.BitMask.from_image(image2).translate(dx, dy)
+            # image2 pasted at (dx, dy) on a canvas of image1
+            canvas = Image.new("RGBA", image1.size)
+            canvas.paste(image2, (int(dx), int(dy)))
+            self.assertEqual(mask1.intersection_area(mask2), np.sum(alpha_mask(image1) & alpha_mask(canvas)))
+
+
+class TestWarpMask(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+
+    def test_rotate_mask_as_pil_rotate(self):
+        for rot in [0, 90, 180, 270, 37, -45, 213.5, 359.9, 720 + 12]:
+            for center in [None, (3, 4), (20.5, 11)]:
+                image = make_piece(self.rng, tuple(self.rng.integers(10, 80, 2)))
+                rotated = evaluation.rotate_mask(evaluation.BitMask.from_image(image), image.size, rot, center=center)
+                np.testing.assert_array_equal(mask_on(rotated, image.size), alpha_mask(image.rotate(rot, center=center)),
+                                              f"rot {rot} center {center}")
+
+    def test_warp_mask_as_pil_transform(self):
+        for _ in range(20):
+            image = make_piece(self.rng, (50, 40))
+            size = tuple(int(value) for value in self.rng.integers(20, 70, 2))
+            rot = self.rng.uniform(-360, 360)
+            matrix = evaluation.rotation_matrix(size, rot, center=tuple(self.rng.uniform(0, 50, 2)))
+            warped = evaluation.warp_mask(evaluation.BitMask.from_image(image), matrix, size)
+            expected = image.transform(size, Image.AFFINE, matrix, resample=Image.NEAREST)
+            np.testing.assert_array_equal(mask_on(warped, size), alpha_mask(expected))
+
+    def test_place_mask_as_paste(self):
+        for _ in range(20):
+            image = make_piece(self.rng, (30, 40))
+            x, y, additional_x, additional_y = (int(value) for value in self.rng.integers(-20, 20, 4))
+            rot = self.rng.uniform(0, 360)
+            placed_image = evaluation.apply_transformations_on_piece(image, x, y, rot, additional_x, additional_y)
+            rotated = evaluation.rotate_mask(evaluation.BitMask.from_image(image), image.size, rot)
+            placed = evaluation.place_mask(rotated, x, y, placed_image.size, additional_x, additional_y)
+            np.testing.assert_array_equal(mask_on(placed, placed_image.size), alpha_mask(placed_image))
+
+
+class TestScoring(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pieces_dir = os.path.join(self.tmp_dir.name, "pieces")
+        os.makedirs(self.pieces_dir)
+        self.rng = np.random.default_rng(2)
+        self.rpfs = [f"RPf_{i:05d}_intact_mesh.png" for i in range(5)]
+        for i, rpf in enumerate(self.rpfs):
+            make_piece(self.rng, (30 + 10 * i, 40)).save(os.path.join(self.pieces_dir, rpf))
+
+        gt_translations = self.rng.integers(0, 100, (len(self.rpfs), 2))
+        gt_rotations = self.rng.integers(0, 360, len(self.rpfs))
+        self.gt_csv = self.write_csv("gt.csv", gt_translations, gt_rotations)
+        # results around the ground truth, translated as a whole
+        self.results_csvs = []
+        for i in range(4):
+            translations = gt_translations + self.rng.integers(-40, 40, 2) + self.rng.uniform(-5, 5, (len(self.rpfs), 2))
+            rotations = gt_rotations + self.rng.uniform(-10, 10, len(self.rpfs))
+            self.results_csvs.append(self.write_csv(f"result{i}.csv", translations, rotations, shuffle=True))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, name, translations, rotations, shuffle=False):
+        df = pd.DataFrame({"rpf": self.rpfs, "x": translations[:, 0], "y": translations[:, 1], "rot": rotations})
+        if shuffle:
+            df = df.sample(frac=1, random_state=0)
+        path = os.path.join(self.tmp_dir.name, name)
+        df.to_csv(path, index=False)
+        return path
+
+    def test_rmse_batch_as_baseline(self):
+        results, rpfs = evaluation.stack_transformations(self.results_csvs)
+        batch = evaluation.calculate_rmse_batch(self.pieces_dir, results, rpfs, self.gt_csv)
+        for i, results_csv in enumerate(self.results_csvs):
+            expected = baseline_rmse_with_anchor(self.pieces_dir, results_csv, self.gt_csv)
+            one = evaluation.calculate_rmse_with_anchor(self.pieces_dir, results_csv, self.gt_csv)
+            for key in expected:
+                self.assertAlmostEqual(batch[key][i], expected[key], places=9)
+                self.assertAlmostEqual(one[key], expected[key], places=9)
+
+    def test_gt_cache(self):
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        computed = evaluation.load_gt_artifacts(self.pieces_dir, self.gt_csv, cache_dir=cache_dir)
+        with mock.patch.object(evaluation, "compute_gt_artifacts", side_effect=AssertionError("not read from the cache")):
+            cached = evaluation.load_gt_artifacts(self.pieces_dir, self.gt_csv, cache_dir=cache_dir)
+
+        self.assertEqual(cached.largest_piece, computed.largest_piece)
+        self.assertEqual(cached.gt_canvas_size, computed.gt_canvas_size)
+        for rpf in self.rpfs:
+            self.assertEqual(cached.areas[rpf], computed.areas[rpf])
+            self.assertEqual(cached.gt_masks[rpf].offset, computed.gt_masks[rpf].offset)
+            np.testing.assert_array_equal(cached.gt_masks[rpf].to_array(), computed.gt_masks[rpf].to_array())
+        for results_csv in self.results_csvs:
+            q_pos = evaluation.calculate_position_score(self.pieces_dir, results_csv, self.gt_csv, gt_artifacts=cached)
+            self.assertGreater(q_pos, 0)
+            self.assertEqual(q_pos, evaluation.calculate_position_score(self.pieces_dir, results_csv, self.gt_csv))
+
+    def test_gt_cache_invalidated_by_csv(self):
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        evaluation.load_gt_artifacts(self.pieces_dir, self.gt_csv, cache_dir=cache_dir)
+
+        # the same file name with other ground truth transformations
+        gt_df = pd.read_csv(self.gt_csv)
+        gt_df["rot"] = (gt_df["rot"] + 90) % 360
+        gt_df["x"] = gt_df["x"] + 500
+        gt_df.to_csv(self.gt_csv, index=False)
+
+        artifacts = evaluation.load_gt_artifacts(self.pieces_dir, self.gt_csv, cache_dir=cache_dir)
+        expected = evaluation.compute_gt_artifacts(self.pieces_dir, self.gt_csv)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+        self.assertEqual(artifacts.gt_canvas_size, expected.gt_canvas_size)
+        for rpf in self.rpfs:
+            np.testing.assert_array_equal(artifacts.gt_masks[rpf].to_array(), expected.gt_masks[rpf].to_array())
+
+        # the dataset version is part of the key too
+        evaluation.load_gt_artifacts(self.pieces_dir, self.gt_csv, cache_dir=cache_dir, dataset_version="other")
+        self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import os
+import tempfile
+import time
+from unittest import mock
+from src.assembler.response_cache import ResponseCache
+from src.assembler import physical_assemler
+from src.assembler.matings import VertexMating
+
+
+def make_body(i):
+    return {"matings": [{"firstPiece": "RPf_00194_intact_mesh", "firstPieceLocalCoords": [i, i],
+                         "secondPiece": "RPf_00197_intact_mesh", "secondPieceLocalCoords": [66, 493]}]}
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hit_and_miss(self):
+        cache = ResponseCache(self.cache_dir)
+        self.assertIsNone(cache.get(make_body(1), "Off"))
+        cache.put(make_body(1), {"piecesFinalCoords": [1]}, "Off")
+        self.assertEqual(cache.get(make_body(1), "Off"), {"piecesFinalCoords": [1]})
+        # the collision mode is part of the key
+        self.assertIsNone(cache.get(make_body(1), "OffThenOn"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_canonical_key(self):
+        body = make_body(1)
+        reordered = {"matings": [dict(reversed(list(body["matings"][0].items())))]}
+        self.assertEqual(ResponseCache.key(body, "Off"), ResponseCache.key(reordered, "Off"))
+        self.assertNotEqual(ResponseCache.key(body, "Off"), ResponseCache.key(make_body(2), "Off"))
+
+    def test_namespaces(self):
+        # the responses of a simulator are never returned for another one sharing the directory
+        ResponseCache(self.cache_dir, namespace="springs").put(make_body(1), {"a": 1})
+        local_cache = ResponseCache(self.cache_dir, namespace="local")
+        self.assertIsNone(local_cache.get(make_body(1)))
+        local_cache.put(make_body(1), {"a": 2})
+        self.assertEqual(ResponseCache(self.cache_dir, namespace="springs").get(make_body(1)), {"a": 1})
+        self.assertEqual(ResponseCache(self.cache_dir, namespace="local").get(make_body(1)), {"a": 2})
+
+    def test_persistent(self):
+        ResponseCache(self.cache_dir).put(make_body(1), {"a": 1})
+        self.assertEqual(ResponseCache(self.cache_dir).get(make_body(1)), {"a": 1})
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(self.cache_dir, max_entries=2)
+        cache.put(make_body(1), {"a": 1})
+        cache.put(make_body(2), {"a": 2})
+        cache.get(make_body(1))
+        cache.put(make_body(3), {"a": 3})
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertIsNone(cache.get(make_body(2)))
+        self.assertEqual(cache.get(make_body(1)), {"a": 1})
+        self.assertEqual(cache.get(make_body(3)), {"a": 3})
+
+        # the order of use is kept on disk
+        time.sleep(0.01)
+        cache.get(make_body(1))
+        reopened = ResponseCache(self.cache_dir, max_entries=1)
+        self.assertEqual(reopened.get(make_body(1)), {"a": 1})
+        self.assertIsNone(reopened.get(make_body(3)))
+
+    def test_lazy_index(self):
+        ResponseCache(self.cache_dir).put(make_body(1), {"a": 1})
+        with mock.patch.object(os, "listdir", side_effect=AssertionError("scanned on construction")):
+            cache = ResponseCache(self.cache_dir, max_entries=1)
+        cache.put(make_body(2), {"a": 2})
+        # the entry of the other cache is indexed and evicted on the first request
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertIsNone(ResponseCache(self.cache_dir).get(make_body(1)))
+        self.assertEqual(ResponseCache(self.cache_dir).get(make_body(2)), {"a": 2})
+
+
+class TestCachedSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        physical_assemler.set_response_cache(ResponseCache(self.tmp_dir.name))
+        self.matings = [VertexMating("RPf_00194_intact_mesh", [738, 1002], "RPf_00197_intact_mesh", [55, 448])]
+
+    def tearDown(self):
+        physical_assemler.set_response_cache(None)
+        self.tmp_dir.cleanup()
+
+    def test_simulate_uses_cache(self):
+        with mock.patch.object(physical_assemler.http_, "send_reconstruct_request", return_value={"piecesFinalCoords": []}) as request:
+            first = physical_assemler.simulate(self.matings)
+            second = physical_assemler.simulate(self.matings)
+            self.assertEqual(first, second)
+            self.assertEqual(request.call_count, 1)
+
+            # debug runs always reach the server
+            physical_assemler.simulate(self.matings, isDebug=True)
+            self.assertEqual(request.call_count, 2)
+
+    def test_simulate_batch_sends_only_misses(self):
+        other_matings = [VertexMating("RPf_00194_intact_mesh", [0, 0], "RPf_00197_intact_mesh", [1, 1])]
+        with mock.patch.object(physical_assemler.http_, "send_reconstruct_request", return_value={"index": 0}):
+            physical_assemler.simulate(self.matings)
+
+        with mock.patch.object(physical_assemler.http_, "send_reconstruct_batch_request", return_value=[{"index": 1}]) as request:
+            responses = physical_assemler.simulate_batch([self.matings, other_matings])
+
+        self.assertEqual(responses, [{"index": 0}, {"index": 1}])
+        self.assertEqual(len(request.call_args[0][0]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -56,5 +56,33 @@ class TestCenterOfMass(unittest.TestCase):
         self._run_toy_example(RPf_00197_final_coords_postman)
 
 
+class TestRigidAlign(unittest.TestCase):
+
+    def test_batch_recovers_transformations(self):
+        rng = np.random.default_rng(0)
+        src = rng.uniform(-100, 100, (5, 4, 2))
+        angles = rng.uniform(-np.pi, np.pi, 5)
+        translations = rng.uniform(-50, 50, (5, 2))
+        dst = np.einsum("nij,npj->npi", rigid_transformations.rotation_matrices(angles), src) + translations[:, np.newaxis]
+
+        found_angles, found_translations = rigid_transformations.rigid_align(src, dst)
+        np.testing.assert_allclose(found_angles, angles, atol=1e-9)
+        np.testing.assert_allclose(found_translations, translations, atol=1e-9)
+
+    def test_padding_is_ignored(self):
+        src = np.array([[[0, 0], [10, 0], [99, 99]], [[1, 2], [0, 0], [0, 0]]], dtype=float)
+        dst = np.array([[[5, 5], [5, 15], [-7, 3]], [[4, 4], [0, 0], [0, 0]]], dtype=float)
+        weights = np.array([[1, 1, 0], [1, 0, 0]])
+
+        angles, translations = rigid_transformations.rigid_align(src, dst, weights)
+        np.testing.assert_allclose(angles, [np.pi / 2, 0], atol=1e-12)
+        np.testing.assert_allclose(translations, [[5, 5], [3, 2]], atol=1e-12)
+
+    def test_single_set(self):
+        angle, translation = rigid_transformations.rigid_align([[0, 0], [10, 0]], [[5, 5], [5, 15]])
+        self.assertAlmostEqual(angle, np.pi / 2)
+        np.testing.assert_allclose(translation, [5, 5], atol=1e-12)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import unittest
+import sys
+sys.path.append("geometric_greedy_solver")
+
+import math
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from shapely import Polygon
+from src import shared_parameters
+from src.piece import Piece
+from src.solver_context import SolverContext
+from src.arbitrary_anchors.anchor_conf import AnchorConf
+from src.arbitrary_anchors import recipes
+from src.arbitrary_anchors import compatibilities
+from src.assembler import physical_assemler
+from src.assembler.local_simulator import LocalRigidSimulator
+from src.assembler.response_cache import ResponseCache
+from src import solver
+
+
+def make_context(size):
+    # two squares of the given size, their pieces only known to the context
+    context = SolverContext()
+    context.simulator = LocalRigidSimulator(active_pieces=context.active_pieces)
+    for piece_id in ["RPf_00001", "RPf_00002"]:
+        piece = Piece(piece_id, None, None, active_pieces=context.active_pieces)
+        piece.polygon = Polygon([(0, 0), (size, 0), (size, size), (0, size)])
+    return context
+
+
+def solve(context):
+    piece1, piece2 = context.active_pieces["RPf_00001"], context.active_pieces["RPf_00002"]
+    size = piece1.get_polygon().bounds[2]
+    confs = [AnchorConf([[size, 0], [size, size]], piece1), AnchorConf([[0, 0], [size, 0]], piece2),
+             AnchorConf([[size, size], [size, 0]], piece1)]
+    context.mating_graph.init(confs)
+    pairs2confs = context.mating_graph.get_confs_pairing()
+    pair2response = recipes.simulate(pairs2confs, context=context)
+    return pairs2confs, pair2response, compatibilities.overlapping(pair2response, context=context)
+
+
+class TestSolverContext(unittest.TestCase):
+
+    def test_pieces_are_not_shared(self):
+        context = make_context(10)
+        self.assertEqual(set(context.active_pieces.keys()), {"RPf_00001", "RPf_00002"})
+        self.assertNotIn(context.active_pieces["RPf_00001"], shared_parameters.active_pieces.values())
+        self.assertEqual(make_context(20).active_pieces["RPf_00001"].get_polygon().area, 400)
+
+    def test_graphs_are_not_shared(self):
+        context1, context2 = make_context(10), make_context(10)
+        solve(context1)
+        self.assertEqual(len(context1.mating_graph.get_confs_pairing()), 2)
+        self.assertEqual(context2.mating_graph.get_confs_pairing(), {})
+
+    def test_simulator_and_cache_of_context(self):
+        context = make_context(10)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            context.response_cache = ResponseCache(cache_dir)
+            with mock.patch.object(physical_assemler, "http_") as module_http:
+                pairs2confs, pair2response, pair2overlapping = solve(context)
+                solve(context)
+            module_http.send_reconstruct_request.assert_not_called()
+            self.assertEqual(context.response_cache.stats()["hits"], 2)
+
+        # the second piece is rotated onto the first one by the first conf, next to it by the reversed one
+        overlappings = {}
+        for pair, confs in pairs2confs.items():
+            conf1 = [conf for conf in confs if conf.parent_piece.piece_id == "RPf_00001"][0]
+            overlappings[tuple(conf1.anchor_points[0])] = pair2overlapping[pair]
+        self.assertAlmostEqual(overlappings[(10, 0)], 2)
+        self.assertAlmostEqual(overlappings[(10, 10)], 0)
+
+    def test_concurrent_objects(self):
+        contexts = [make_context(size) for size in (10, 20, 30, 40)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(solve, contexts))
+
+        for context, (_, pair2response, _) in zip(contexts, results):
+            size = context.active_pieces["RPf_00001"].get_polygon().bounds[2]
+            response = list(pair2response.values())[0]
+            tsfm = response["piecesFinalTransformations"][1]
+            self.assertAlmostEqual(tsfm["rotationRadians"], math.pi / 2)
+            self.assertAlmostEqual(tsfm["translateVectorX"], size)
+
+    def test_cache_namespace_of_simulator(self):
+        # the springs and the local responses of the same request do not share a cache entry
+        with tempfile.TemporaryDirectory() as cache_dir:
+            springs_cache = solver.make_context("springs", simulation_cache_dir=cache_dir).response_cache
+            local_cache = solver.make_context("local", simulation_cache_dir=cache_dir).response_cache
+            body = {"matings": []}
+            springs_cache.put(body, {"simulator": "springs"})
+            self.assertIsNone(local_cache.get(body))
+            local_cache.put(body, {"simulator": "local"})
+            self.assertEqual(springs_cache.get(body), {"simulator": "springs"})
+            self.assertEqual(local_cache.get(body), {"simulator": "local"})
+
+    def test_overlap_scorer_of_simulator(self):
+        # the responses of both simulators are scored in bulk
+        self.assertIsNotNone(solver.make_context("springs").overlap_scorer)
+        self.assertIsNotNone(solver.make_context("local").overlap_scorer)
+
+
+if __name__ == '__main__':
+    unittest.main()